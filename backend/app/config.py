@@ -10,20 +10,161 @@ BASE_DIR = Path(__file__).resolve().parent.parent
 
 class Settings:
     PROJECT_NAME: str = "LLM CookBook"
+    LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO")
     OPENAI_API_KEY: str = os.getenv("OPENAI_API_KEY", "")
 
     # your data files
-    DATA_PATH: str = str(BASE_DIR / "app" / "data" / "recipes.csv")
-    EMBEDDING_CACHE_PATH: str = str(
-        BASE_DIR / "app" / "data" / "precomputed_embeddings.pkl"
-    )
+    DATA_PATH: str = os.getenv("DATA_PATH", str(BASE_DIR / "app" / "data" / "recipes.csv"))
     SUBSTITUTION_DICT_PATH: str = str(
         BASE_DIR / "app" / "data" / "substitution_dict.json"
     )
 
+    # on-disk search index (manifest + mmap'd embeddings and FAISS index)
+    INDEX_DIR: str = os.getenv("INDEX_DIR", str(BASE_DIR / "app" / "data" / "index"))
+    EMBEDDING_MODEL_NAME: str = os.getenv("EMBEDDING_MODEL_NAME", "all-MiniLM-L6-v2")
+    # embedding runtime: "torch" (SentenceTransformer) or "onnx" (the model
+    # exported to ONNX with int8 weights, see services/embedding_backends.py)
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "torch")
+    ONNX_MODEL_DIR: str = os.getenv(
+        "ONNX_MODEL_DIR", str(BASE_DIR / "app" / "data" / "onnx_model")
+    )
+    # intra-op CPU threads of the embedding model (either backend); 0 = default
+    EMBEDDING_THREADS: int = int(os.getenv("EMBEDDING_THREADS", "0"))
+    # dtype of embeddings.npy: float32 | float16 | int8
+    EMBEDDING_STORAGE: str = os.getenv("EMBEDDING_STORAGE", "float32")
+
+    # FAISS backend: flat | sq_fp16 | sq8 | ivf_flat | ivf_pq | hnsw
+    # (see services/index_factory.py)
+    INDEX_BACKEND: str = os.getenv("INDEX_BACKEND", "flat")
+    IVF_NLIST: int = int(os.getenv("IVF_NLIST", "1024"))
+    PQ_M: int = int(os.getenv("PQ_M", "16"))
+    PQ_NBITS: int = int(os.getenv("PQ_NBITS", "8"))
+    HNSW_M: int = int(os.getenv("HNSW_M", "32"))
+    HNSW_EF_CONSTRUCTION: int = int(os.getenv("HNSW_EF_CONSTRUCTION", "200"))
+    # default per-query recall/latency knobs, overridable per request
+    SEARCH_NPROBE: int = int(os.getenv("SEARCH_NPROBE", "16"))
+    SEARCH_EF_SEARCH: int = int(os.getenv("SEARCH_EF_SEARCH", "64"))
+
+    # retrieval: "hybrid" fuses FAISS with the inverted ingredient index
+    # (services/lexical_index.py) by reciprocal rank fusion, "vector" is FAISS only
+    SEARCH_MODE: str = os.getenv("SEARCH_MODE", "hybrid")
+    RRF_K: int = int(os.getenv("RRF_K", "60"))
+    # candidates taken from each ranking per requested result
+    HYBRID_CANDIDATES: int = int(os.getenv("HYBRID_CANDIDATES", "3"))
+    # answer from the lexical index alone (no encode) when top_k recipes use
+    # every query ingredient
+    LEXICAL_SKIP_MODEL: bool = os.getenv("LEXICAL_SKIP_MODEL", "1").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # filtered search (services/search_filters.py): row masks cached per filter
+    # set; below this share of matching rows FAISS searches only the matching
+    # ids (IDSelector), above it a proportionally over-fetched search is filtered
+    FILTER_CACHE_SIZE: int = int(os.getenv("FILTER_CACHE_SIZE", "32"))
+    FILTER_SELECTOR_THRESHOLD: float = float(os.getenv("FILTER_SELECTOR_THRESHOLD", "0.1"))
+
+    # batch endpoints: /recipes/search/batch and /recipes/generate/batch
+    SEARCH_BATCH_MAX_QUERIES: int = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "1000"))
+    GENERATE_BATCH_MAX_ITEMS: int = int(os.getenv("GENERATE_BATCH_MAX_ITEMS", "100"))
+    # generation jobs of one batch in flight at once (Ollama itself is also
+    # capped by LLM_MAX_CONCURRENCY)
+    GENERATE_BATCH_CONCURRENCY: int = int(os.getenv("GENERATE_BATCH_CONCURRENCY", "4"))
+
+    # load the search engine at import time instead of in the background, so a
+    # `gunicorn --preload` master loads it once and forked workers share it
+    PRELOAD_SEARCH_ENGINE: bool = os.getenv("PRELOAD_SEARCH_ENGINE", "0").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+
+    # Prometheus-style histograms/counters served at /metrics (utils/metrics.py),
+    # and an opt-in Server-Timing header with each request's stage times
+    METRICS_ENABLED: bool = os.getenv("METRICS_ENABLED", "1").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    SERVER_TIMING: bool = os.getenv("SERVER_TIMING", "0").lower() in ("1", "true", "yes")
+
+    # query-embedding micro-batching (services/embedding_batcher.py)
+    EMBED_MAX_BATCH_SIZE: int = int(os.getenv("EMBED_MAX_BATCH_SIZE", "32"))
+    EMBED_MAX_WAIT_MS: float = float(os.getenv("EMBED_MAX_WAIT_MS", "5"))
+
+    # local cuisine classifier: k-NN vote over labelled recipe embeddings,
+    # with the LLM (detect_cuisine) as a fallback for low confidence; it is
+    # started once the vote comes back unsure or takes over
+    # CUISINE_LLM_HEDGE_MS
+    CUISINE_COLUMN: str = os.getenv("CUISINE_COLUMN", "predicted_cuisine")
+    CUISINE_KNN_K: int = int(os.getenv("CUISINE_KNN_K", "25"))
+    CUISINE_MIN_CONFIDENCE: float = float(os.getenv("CUISINE_MIN_CONFIDENCE", "0.5"))
+    CUISINE_LLM_FALLBACK: bool = os.getenv("CUISINE_LLM_FALLBACK", "1").lower() in (
+        "1",
+        "true",
+        "yes",
+    )
+    CUISINE_LLM_HEDGE_MS: float = float(os.getenv("CUISINE_LLM_HEDGE_MS", "50"))
+
+    # LRU + TTL cache of query vectors and hit ids, keyed on the ingredient set
+    QUERY_CACHE_SIZE: int = int(os.getenv("QUERY_CACHE_SIZE", "4096"))
+    QUERY_CACHE_TTL_S: float = float(os.getenv("QUERY_CACHE_TTL_S", "3600"))
+
     # any other constants
     OLLAMA_URL: str = os.getenv("OLLAMA_URL", "http://localhost:11434/api/generate")
     MODEL_NAME: str = os.getenv("MODEL_NAME", "nous-hermes")
 
+    # Ollama backends behind the LLM router (services/llm_router.py): a
+    # comma-separated list of /api/generate URLs, defaulting to OLLAMA_URL,
+    # and optionally a matching list of per-backend concurrency limits
+    # (missing entries use LLM_MAX_CONCURRENCY)
+    OLLAMA_URLS: list = [
+        u.strip() for u in os.getenv("OLLAMA_URLS", OLLAMA_URL).split(",") if u.strip()
+    ]
+    LLM_BACKEND_CONCURRENCY: list = [
+        int(c) for c in os.getenv("LLM_BACKEND_CONCURRENCY", "").split(",") if c.strip()
+    ]
+    # short tasks (cuisine detection) can go to a small, fast model
+    LLM_CUISINE_MODEL: str = os.getenv("LLM_CUISINE_MODEL", MODEL_NAME)
+    # /api/tags probe per backend (0 disables); consecutive failures that
+    # open a backend's circuit, and how long it stays open before a probe
+    LLM_HEALTH_INTERVAL_S: float = float(os.getenv("LLM_HEALTH_INTERVAL_S", "10"))
+    LLM_BREAKER_FAILURES: int = int(os.getenv("LLM_BREAKER_FAILURES", "3"))
+    LLM_BREAKER_COOLDOWN_S: float = float(os.getenv("LLM_BREAKER_COOLDOWN_S", "30"))
+
+    # shared async Ollama client (services/llm_client.py), per backend
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "4"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_CONNECT_TIMEOUT_S: float = float(os.getenv("LLM_CONNECT_TIMEOUT_S", "5"))
+    LLM_TIMEOUT_S: float = float(os.getenv("LLM_TIMEOUT_S", "30"))
+    LLM_CUISINE_TIMEOUT_S: float = float(os.getenv("LLM_CUISINE_TIMEOUT_S", "10"))
+    LLM_MAX_RETRIES: int = int(os.getenv("LLM_MAX_RETRIES", "2"))
+    LLM_RETRY_BACKOFF_S: float = float(os.getenv("LLM_RETRY_BACKOFF_S", "0.5"))
+    # constrain recipe output with Ollama's `format`: "schema" sends the
+    # GeneratedRecipe JSON schema, "json" only forces valid JSON, "none" neither
+    LLM_OUTPUT_FORMAT: str = os.getenv("LLM_OUTPUT_FORMAT", "schema")
+    # follow-up calls asking only for the recipe fields that failed to parse
+    LLM_FIELD_RETRIES: int = int(os.getenv("LLM_FIELD_RETRIES", "1"))
+    # prompt prefix reuse (services/recipe_generator.py): the static part of
+    # recipe prompts goes in Ollama's `system` ("system") or atop the prompt
+    # ("inline"), and keep_alive keeps models (and their KV cache) loaded
+    # between requests; "" leaves Ollama's default
+    LLM_PROMPT_MODE: str = os.getenv("LLM_PROMPT_MODE", "system")
+    LLM_KEEP_ALIVE: str = os.getenv("LLM_KEEP_ALIVE", "30m")
+    # similar recipes from the search index added to the prompt as examples
+    LLM_GROUNDING_EXAMPLES: int = int(os.getenv("LLM_GROUNDING_EXAMPLES", "0"))
+
+    # persistent /recipes/generate response cache (services/generation_cache.py);
+    # an empty path or 0 entries disables it, similarity 0 disables
+    # near-duplicate (ingredient-embedding) matching
+    GENERATION_CACHE_PATH: str = os.getenv(
+        "GENERATION_CACHE_PATH", str(BASE_DIR / "app" / "data" / "generation_cache.sqlite3")
+    )
+    GENERATION_CACHE_MAX_ENTRIES: int = int(os.getenv("GENERATION_CACHE_MAX_ENTRIES", "10000"))
+    GENERATION_CACHE_SIMILARITY: float = float(
+        os.getenv("GENERATION_CACHE_SIMILARITY", "0")
+    )
+
 
 settings = Settings()
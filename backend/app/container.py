@@ -0,0 +1,49 @@
+"""
+Application container: the long-lived services one app instance shares
+across requests (search engine, LLM router, generation cache, recipe
+generator). It is created in the FastAPI lifespan hook, stored on
+app.state.container, and handed to routes through the dependencies in
+app/dependencies.py, so nothing is built at import time and each app (or
+test) gets its own set.
+"""
+from dataclasses import dataclass
+from typing import Optional
+
+from app.services.generation_cache import GenerationCache
+from app.services.llm_router import LLMRouter
+from app.services.recipe_generator import RecipeGenerator
+from app.services.search_engine import SearchEngineLoader
+
+
+@dataclass
+class AppContainer:
+    search: SearchEngineLoader
+    llm: LLMRouter
+    generation_cache: GenerationCache
+    generator: RecipeGenerator
+
+    @classmethod
+    def create(cls, search: Optional[SearchEngineLoader] = None) -> "AppContainer":
+        """
+        Wire up the services. search may be a loader that is already ready
+        (a preloaded engine); otherwise a fresh one loads on start().
+        """
+        search = search or SearchEngineLoader()
+        llm = LLMRouter()
+        cache = GenerationCache(search=search)
+        return cls(
+            search=search,
+            llm=llm,
+            generation_cache=cache,
+            generator=RecipeGenerator(llm, cache, search),
+        )
+
+    def start(self) -> None:
+        # load the search index in the background so the API starts serving now
+        self.search.start()
+        self.llm.start()
+
+    async def aclose(self) -> None:
+        self.search.close()
+        await self.llm.aclose()
+        self.generation_cache.close()
@@ -0,0 +1,48 @@
+"""
+FastAPI dependencies resolving the services of the app's AppContainer.
+"""
+from fastapi import Depends, HTTPException, Request
+
+from app.container import AppContainer
+from app.services.generation_cache import GenerationCache
+from app.services.llm_router import LLMRouter
+from app.services.recipe_generator import RecipeGenerator
+from app.services.search_engine import EngineNotReady, SearchEngineLoader
+from app.services.vector_index import RecipeVectorIndex
+
+
+def get_container(request: Request) -> AppContainer:
+    return request.app.state.container
+
+
+def get_search_loader(
+    container: AppContainer = Depends(get_container),
+) -> SearchEngineLoader:
+    return container.search
+
+
+def get_vector_engine(
+    loader: SearchEngineLoader = Depends(get_search_loader),
+) -> RecipeVectorIndex:
+    try:
+        return loader.get()
+    except EngineNotReady as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"Recipe search is not ready yet ({e}).",
+            headers={"Retry-After": "5"},
+        )
+
+
+def get_generator(container: AppContainer = Depends(get_container)) -> RecipeGenerator:
+    return container.generator
+
+
+def get_llm(container: AppContainer = Depends(get_container)) -> LLMRouter:
+    return container.llm
+
+
+def get_generation_cache(
+    container: AppContainer = Depends(get_container),
+) -> GenerationCache:
+    return container.generation_cache
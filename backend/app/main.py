@@ -1,14 +1,53 @@
-from sys import prefix
+import logging
+from contextlib import asynccontextmanager
+from typing import Optional
+
 from fastapi import FastAPI
+from app.config import settings
 from app.routes import (
+    health,
     parse_ingredients,
+    recipe_ingest,
     recipe_search,
     recipe_generate,
 )
+from app.container import AppContainer
+from app.utils.metrics import MetricsMiddleware
+from app.services.search_engine import SearchEngineLoader, preload_engine
+
+logging.basicConfig(
+    level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+
+
+def create_app(preloaded: Optional[SearchEngineLoader] = None) -> FastAPI:
+    """
+    Build the API. Services live in an AppContainer created by the lifespan
+    hook (so once per worker, after any fork); preloaded is a search engine
+    loaded ahead of time that the container adopts instead of loading its own.
+    """
+
+    @asynccontextmanager
+    async def lifespan(app: FastAPI):
+        container = AppContainer.create(search=preloaded)
+        app.state.container = container
+        container.start()
+        yield
+        await container.aclose()
+
+    app = FastAPI(title="LLM CookBook", lifespan=lifespan)
+    if settings.METRICS_ENABLED or settings.SERVER_TIMING:
+        app.add_middleware(MetricsMiddleware)
+
+    # Include API routes
+    app.include_router(health.router)
+    app.include_router(parse_ingredients.router, prefix="/parse-ingredients")
+    app.include_router(recipe_search.router, prefix="/recipes")
+    app.include_router(recipe_generate.router, prefix="/recipes")
+    app.include_router(recipe_ingest.router, prefix="/recipes")
+    return app
 
-app = FastAPI(title="LLM CookBook")
 
-# Include API routes
-app.include_router(parse_ingredients.router, prefix="/parse-ingredients")
-app.include_router(recipe_search.router, prefix="/recipes")
-app.include_router(recipe_generate.router, prefix="/recipes")
+# with PRELOAD_SEARCH_ENGINE=1 under `gunicorn --preload`, the master loads the
+# read-only index and model here once and the forked workers share them
+app = create_app(preloaded=preload_engine())
@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse
+from app.dependencies import get_search_loader
+from app.services.search_engine import SearchEngineLoader
+from app.utils.metrics import metrics
+
+router = APIRouter()
+
+
+@router.get("/health")
+def health():
+    """
+    Liveness: the process is up and serving requests.
+    """
+    return {"status": "ok"}
+
+
+@router.get("/ready")
+def ready(search: SearchEngineLoader = Depends(get_search_loader)):
+    """
+    Readiness: the search engine has finished loading.
+    """
+    status = search.status()
+    return JSONResponse(status, status_code=200 if search.ready else 503)
+
+
+@router.get("/metrics")
+def prometheus_metrics():
+    """
+    Latency histograms and counters in the Prometheus text format.
+    """
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
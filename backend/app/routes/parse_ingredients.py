@@ -1,10 +1,14 @@
 from fastapi import APIRouter
-from typing import List
-from app.utils.text_utils import clean_ingredient
+from app.utils.ingredient_parser import parse_ingredients
 
 router = APIRouter()
 
 @router.post("/")
 def parse_ingredients_endpoint(ingredients: list[str]):
-    cleaned = [clean_ingredient(i) for i in ingredients]
-    return {"parsed": cleaned} 
\ No newline at end of file
+    parsed = parse_ingredients(ingredients)
+    return {
+        "parsed": [p.name for p in parsed],
+        "structured": [
+            {"quantity": p.quantity, "unit": p.unit, "name": p.name} for p in parsed
+        ],
+    }
@@ -1,13 +1,45 @@
-from fastapi import APIRouter
-from app.schemas.recipe import RecipeGenerateRequest
-from app.services.recipe_generator import generate_recipe_from_ingredients
+import asyncio
+import json
+import logging
+from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
+from app.config import settings
+from app.dependencies import get_generation_cache, get_generator, get_llm
+from app.schemas.recipe import RecipeGenerateBatchRequest, RecipeGenerateRequest
+from app.services.generation_cache import GenerationCache
+from app.services.llm_router import LLMRouter
+from app.services.recipe_generator import RecipeGenerator
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
 
 @router.post("/generate")
-async def generate_recipe(request: RecipeGenerateRequest):
-    return generate_recipe_from_ingredients(
+async def generate_recipe(
+    request: RecipeGenerateRequest,
+    generator: RecipeGenerator = Depends(get_generator),
+):
+    return await generator.generate(
+        ingredients=request.ingredients,
+        dietary_preference=request.dietary_preference,
+        max_prep_time=request.max_prep_time,
+        max_cook_time=request.max_cook_time,
+        excluded_allergens=request.excluded_allergens,
+        preferred_cuisine=request.preferred_cuisine,
+    )
+
+
+@router.post("/generate/stream")
+async def generate_recipe_stream(
+    request: RecipeGenerateRequest,
+    generator: RecipeGenerator = Depends(get_generator),
+):
+    """
+    Same as /generate, streamed as NDJSON: one event per line, with each
+    top-level recipe field sent as soon as the model has finished it.
+    """
+    events = generator.stream(
         ingredients=request.ingredients,
         dietary_preference=request.dietary_preference,
         max_prep_time=request.max_prep_time,
@@ -15,3 +47,51 @@ async def generate_recipe(request: RecipeGenerateRequest):
         excluded_allergens=request.excluded_allergens,
         preferred_cuisine=request.preferred_cuisine,
     )
+
+    async def lines():
+        async for event in events:
+            yield json.dumps(event) + "\n"
+
+    return StreamingResponse(
+        lines(),
+        media_type="application/x-ndjson",
+    )
+
+
+@router.post("/generate/batch")
+async def generate_recipe_batch(
+    request: RecipeGenerateBatchRequest,
+    generator: RecipeGenerator = Depends(get_generator),
+):
+    """
+    Generate a recipe for each request, at most GENERATE_BATCH_CONCURRENCY
+    at a time. Results come back in request order; each item is the body
+    /generate would have returned, or {"error": ...} if that job failed.
+    """
+    semaphore = asyncio.Semaphore(settings.GENERATE_BATCH_CONCURRENCY)
+
+    async def run(item: RecipeGenerateRequest) -> dict:
+        async with semaphore:
+            try:
+                return await generate_recipe(item, generator)
+            except Exception as e:
+                logger.exception("Batch generation item failed")
+                return {"error": f"Generation failed: {e}"}
+
+    results = await asyncio.gather(*(run(item) for item in request.requests))
+    failed = sum(1 for r in results if "error" in r)
+    return {"results": results, "succeeded": len(results) - failed, "failed": failed}
+
+
+@router.get("/generate/stats")
+def generate_stats(
+    cache: GenerationCache = Depends(get_generation_cache),
+    generator: RecipeGenerator = Depends(get_generator),
+    llm: LLMRouter = Depends(get_llm),
+):
+    return {
+        "generation_cache": cache.stats(),
+        "parsing": generator.parse_stats(),
+        "prefill": generator.prefill_stats(),
+        "llm": llm.stats(),
+    }
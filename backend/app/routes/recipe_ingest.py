@@ -0,0 +1,48 @@
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from typing import List
+from app.dependencies import get_vector_engine
+from app.schemas.recipe import RecipeIn
+from app.services.vector_index import RecipeVectorIndex
+
+router = APIRouter()
+
+
+@router.post("/ingest")
+async def ingest_recipes(
+    recipes: List[RecipeIn],
+    vector_engine: RecipeVectorIndex = Depends(get_vector_engine),
+):
+    """
+    Embed and index new recipes without rebuilding the corpus index.
+    """
+    ids = await asyncio.to_thread(
+        vector_engine.add_recipes, [r.model_dump() for r in recipes]
+    )
+    return {"ids": ids}
+
+
+@router.put("/{recipe_id}")
+async def update_recipe(
+    recipe_id: int,
+    recipe: RecipeIn,
+    vector_engine: RecipeVectorIndex = Depends(get_vector_engine),
+):
+    try:
+        await asyncio.to_thread(
+            vector_engine.update_recipe, recipe_id, recipe.model_dump()
+        )
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Recipe {recipe_id} not found")
+    return {"id": recipe_id}
+
+
+@router.delete("/{recipe_id}")
+async def delete_recipe(
+    recipe_id: int,
+    vector_engine: RecipeVectorIndex = Depends(get_vector_engine),
+):
+    removed = await asyncio.to_thread(vector_engine.delete_recipes, [recipe_id])
+    if not removed:
+        raise HTTPException(status_code=404, detail=f"Recipe {recipe_id} not found")
+    return {"deleted": removed}
@@ -1,17 +1,95 @@
-from fastapi import APIRouter
-from typing import List
+from fastapi import APIRouter, Body, Depends, HTTPException
+from typing import List, Union
+from app.dependencies import get_vector_engine
+from app.schemas.recipe import RecipeSearchBatchRequest, RecipeSearchRequest
+from app.services.search_filters import SearchFilters
 from app.services.vector_index import RecipeVectorIndex
-from app.utils.text_utils import clean_ingredient
+from app.utils.metrics import stage
+from app.utils.text_utils import clean_ingredients
 
 router = APIRouter()
-vector_engine = RecipeVectorIndex()
+
+
+def _as_search_request(request) -> RecipeSearchRequest:
+    if isinstance(request, list):
+        return RecipeSearchRequest(ingredients=request)
+    return request
+
+
+def _filters(request: RecipeSearchRequest, where: str = "") -> SearchFilters:
+    try:
+        return SearchFilters.create(
+            excluded_allergens=request.excluded_allergens,
+            max_prep_time=request.max_prep_time,
+            max_cook_time=request.max_cook_time,
+            cuisine=request.cuisine,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=f"{where}{e}")
 
 
 @router.post("/search")
-def search_recipes(user_ingredients: List[str]):
-    parsed_ingredients = [clean_ingredient(i) for i in user_ingredients]
-    result = vector_engine.retrieve(parsed_ingredients)
+async def search_recipes(
+    request: Union[RecipeSearchRequest, List[str]] = Body(...),
+    vector_engine: RecipeVectorIndex = Depends(get_vector_engine),
+):
+    """
+    Body is either a plain list of ingredients or a RecipeSearchRequest
+    with filters; filtered results only contain recipes that satisfy them.
+    """
+    request = _as_search_request(request)
+    filters = _filters(request)
+
+    with stage("clean_ingredients"):
+        parsed_ingredients = clean_ingredients(request.ingredients)
+    result = await vector_engine.aretrieve(
+        parsed_ingredients, top_k=request.top_k, filters=filters
+    )
 
     if not result:
         return {"message": "No match found. You may want to generate a recipe. "}
     return {"results": result}
+
+
+@router.post("/search/batch")
+async def search_recipes_batch(
+    request: RecipeSearchBatchRequest,
+    vector_engine: RecipeVectorIndex = Depends(get_vector_engine),
+):
+    """
+    Many searches in one call: all queries are embedded in one encode call
+    and searched with one multi-row FAISS search. Results come back in
+    query order, an empty list where nothing matched.
+    """
+    queries = []
+    with stage("clean_ingredients"):
+        for n, item in enumerate(request.queries):
+            item = _as_search_request(item)
+            filters = _filters(item, where=f"queries[{n}]: ")
+            queries.append((clean_ingredients(item.ingredients), item.top_k, filters))
+
+    results = await vector_engine.aretrieve_batch(
+        queries, nprobe=request.nprobe, ef_search=request.ef_search
+    )
+    return {"results": results}
+
+
+@router.get("/search/stats")
+def search_stats(vector_engine: RecipeVectorIndex = Depends(get_vector_engine)):
+    return {
+        "embedding": vector_engine.embedder.stats(),
+        "query_cache": vector_engine.query_cache.stats(),
+        "filter_cache": vector_engine.filter_cache.stats(),
+        "lexical": (
+            {
+                "tokens": len(vector_engine.lexical.vocab),
+                "nbytes": vector_engine.lexical.nbytes,
+            }
+            if vector_engine.lexical is not None
+            else None
+        ),
+        "delta": {
+            "added": len(vector_engine.delta),
+            "tombstones": len(vector_engine.delta.tombstones),
+        },
+    }
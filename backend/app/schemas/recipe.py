@@ -1,5 +1,7 @@
-from pydantic import BaseModel
-from typing import List, Optional
+from pydantic import BaseModel, ConfigDict, Field
+from typing import List, Optional, Union
+
+from app.config import settings
 
 
 class RecipeGenerateRequest(BaseModel):
@@ -9,3 +11,56 @@ class RecipeGenerateRequest(BaseModel):
     max_cook_time: Optional[int] = None
     excluded_allergens: Optional[List[str]] = None
     preferred_cuisine: Optional[str] = None
+
+
+class RecipeSearchRequest(BaseModel):
+    ingredients: List[str]
+    excluded_allergens: Optional[List[str]] = None
+    max_prep_time: Optional[float] = None
+    max_cook_time: Optional[float] = None
+    cuisine: Optional[str] = None
+    top_k: int = Field(5, ge=1, le=50)
+
+
+class RecipeSearchBatchRequest(BaseModel):
+    # each query is a RecipeSearchRequest or, as for /search, a plain list
+    queries: List[Union[RecipeSearchRequest, List[str]]] = Field(
+        ..., min_length=1, max_length=settings.SEARCH_BATCH_MAX_QUERIES
+    )
+    nprobe: Optional[int] = Field(None, ge=1)
+    ef_search: Optional[int] = Field(None, ge=1)
+
+
+class RecipeGenerateBatchRequest(BaseModel):
+    requests: List[RecipeGenerateRequest] = Field(
+        ..., min_length=1, max_length=settings.GENERATE_BATCH_MAX_ITEMS
+    )
+
+
+class RecipeIn(BaseModel):
+    title: str
+    ingredients: List[str]
+    instructions: List[str]
+    prep_time: Optional[float] = None
+    cook_time: Optional[float] = None
+    servings: Optional[float] = None
+    # used by cuisine-filtered search; recipes without one never match a
+    # cuisine filter, like base rows with an unknown cuisine
+    cuisine: Optional[str] = None
+
+
+class GeneratedRecipe(BaseModel):
+    """
+    What the LLM must return for /recipes/generate. Its JSON schema is sent
+    as Ollama's `format`, and model output is validated against it.
+    """
+
+    # models often write "prep_time": 10
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    title: str = Field(..., min_length=1)
+    prep_time: str
+    cook_time: str
+    servings: str
+    ingredients: List[str] = Field(..., min_length=1)
+    instructions: List[str] = Field(..., min_length=1)
@@ -0,0 +1,55 @@
+"""
+Local cuisine classifier: a k-nearest-neighbour vote over the recipe
+embeddings already in the search index, using the labelled cuisine column of
+recipes.csv. It answers in milliseconds, so the LLM (detect_cuisine) is only
+needed when the neighbours disagree.
+"""
+import asyncio
+from collections import defaultdict
+from typing import Iterable, List, NamedTuple, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.vector_index import RecipeVectorIndex
+from app.utils.text_utils import clean_ingredients
+
+
+class CuisinePrediction(NamedTuple):
+    cuisine: Optional[str]
+    confidence: float  # share of the distance-weighted vote
+
+
+class KNNCuisineClassifier:
+    def __init__(self, engine: RecipeVectorIndex, k: int = settings.CUISINE_KNN_K):
+        self.engine = engine
+        self.k = k
+
+    def predict_vector(
+        self, query_vec: np.ndarray, exclude_ids: Iterable[int] = ()
+    ) -> CuisinePrediction:
+        store = self.engine.store
+        skip = set(exclude_ids) | self.engine.delta.tombstones
+        # bounded like RecipeVectorIndex._search_ids: a neighbourhood that is
+        # mostly skipped rows just gets a smaller vote
+        D, I = self.engine.index.search(query_vec, self.k + min(len(skip), 4 * self.k))
+
+        votes: dict = defaultdict(float)
+        for dist, idx in zip(D[0].tolist(), I[0].tolist()):
+            if idx < 0 or idx in skip:
+                continue
+            code = int(store.cuisine_codes[idx])
+            if code >= 0:
+                votes[code] += 1.0 / (1.0 + dist)
+
+        total = sum(votes.values())
+        if not total:
+            return CuisinePrediction(None, 0.0)
+        best = max(votes, key=votes.get)
+        return CuisinePrediction(store.cuisine_labels[best], votes[best] / total)
+
+    async def apredict(self, ingredients: List[str]) -> CuisinePrediction:
+        # the same query text the search index embeds for these ingredients
+        terms = tuple(sorted({i for i in clean_ingredients(ingredients) if i}))
+        query_vec = await self.engine.embedder.embed(self.engine.query_text(terms))
+        return await asyncio.to_thread(self.predict_vector, query_vec)
@@ -0,0 +1,311 @@
+"""
+Embedding model runtimes, selected with ``settings.EMBEDDING_BACKEND``:
+
+    torch  SentenceTransformer in PyTorch fp32 (the reference)
+    onnx   the same model exported to ONNX, weights dynamically quantized to
+           int8, run through onnxruntime. Does not import torch, which cuts
+           startup time and resident memory on CPU-only nodes.
+
+Both expose the slice of the SentenceTransformer API the app uses
+(encode, get_sentence_embedding_dimension), so the batcher, the search
+index and the index builder take either.
+
+The ONNX model is exported once, ahead of time (needs torch and
+sentence-transformers, plus onnxruntime for the quantization step):
+    python -m app.services.embedding_backends export
+
+and checked against the torch model for cosine drift and top-k overlap,
+also with float16 / int8 corpus storage (see services/index_store.py):
+    python -m app.services.embedding_backends parity --corpus 5000 --queries 500
+"""
+import argparse
+import json
+import os
+import time
+from typing import List, Optional, Sequence, Union
+
+import numpy as np
+
+from app.config import settings
+
+BACKENDS = ("torch", "onnx")
+
+ONNX_MODEL_FILE = "model.onnx"
+ONNX_INT8_FILE = "model_int8.onnx"
+TOKENIZER_FILE = "tokenizer.json"
+CONFIG_FILE = "embedder.json"
+
+
+class OnnxEmbedder:
+    """
+    Tokenizer + ONNX transformer + mean pooling (+ L2 normalization when the
+    exported model had it), reproducing SentenceTransformer.encode.
+    """
+
+    def __init__(self, model_dir: str, threads: int = 0):
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        with open(os.path.join(model_dir, CONFIG_FILE), "r", encoding="utf-8") as f:
+            self.config = json.load(f)
+        self.tokenizer = Tokenizer.from_file(os.path.join(model_dir, TOKENIZER_FILE))
+        self.tokenizer.enable_truncation(max_length=self.config["max_seq_length"])
+        self.tokenizer.enable_padding(
+            pad_id=self.config["pad_token_id"], pad_token=self.config["pad_token"]
+        )
+
+        options = ort.SessionOptions()
+        if threads:
+            options.intra_op_num_threads = threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(
+            os.path.join(model_dir, self.config["model_file"]),
+            options,
+            providers=["CPUExecutionProvider"],
+        )
+        self._inputs = {i.name for i in self.session.get_inputs()}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config["dimension"]
+
+    def encode(
+        self,
+        sentences: Union[str, Sequence[str]],
+        batch_size: int = 32,
+        **_,
+    ) -> np.ndarray:
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        out = np.empty((len(texts), self.config["dimension"]), dtype="float32")
+        # sort by length so each batch pads to a similar size
+        order = np.argsort([len(t) for t in texts], kind="stable")
+        for start in range(0, len(texts), batch_size):
+            rows = order[start : start + batch_size]
+            out[rows] = self._encode_batch([texts[i] for i in rows])
+        return out[0] if single else out
+
+    def _encode_batch(self, texts: List[str]) -> np.ndarray:
+        encoded = self.tokenizer.encode_batch(texts)
+        feed = {
+            "input_ids": np.array([e.ids for e in encoded], dtype="int64"),
+            "attention_mask": np.array([e.attention_mask for e in encoded], dtype="int64"),
+            "token_type_ids": np.array([e.type_ids for e in encoded], dtype="int64"),
+        }
+        hidden = self.session.run(None, {k: v for k, v in feed.items() if k in self._inputs})[0]
+        mask = feed["attention_mask"][:, :, None].astype("float32")
+        pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+        if self.config["normalize"]:
+            pooled /= np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+        return pooled
+
+
+def load_embedding_model(
+    backend: Optional[str] = None,
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+    threads: int = 0,
+):
+    """
+    The embedding model for this backend. threads (0 = runtime default)
+    caps intra-op CPU threads, for callers running several models at once.
+    """
+    backend = backend or settings.EMBEDDING_BACKEND
+    if backend == "onnx":
+        if not os.path.exists(os.path.join(settings.ONNX_MODEL_DIR, CONFIG_FILE)):
+            raise FileNotFoundError(
+                f"No ONNX model in {settings.ONNX_MODEL_DIR}; export it with "
+                "`python -m app.services.embedding_backends export`"
+            )
+        return OnnxEmbedder(settings.ONNX_MODEL_DIR, threads=threads)
+    if backend == "torch":
+        import torch
+        from sentence_transformers import SentenceTransformer
+
+        if threads:
+            torch.set_num_threads(threads)
+        return SentenceTransformer(model_name)
+    raise ValueError(f"Unknown embedding backend {backend!r}; expected one of {BACKENDS}")
+
+
+# ── export ───────────────────────────────────────────────────
+
+
+def export_onnx(
+    model_name: str = settings.EMBEDDING_MODEL_NAME,
+    out_dir: str = settings.ONNX_MODEL_DIR,
+    quantize: bool = True,
+) -> str:
+    """
+    Export the transformer of a SentenceTransformer to ONNX and, with
+    quantize, add a dynamically int8-quantized copy. Returns the path of
+    the model the embedder will load.
+    """
+    import torch
+    from sentence_transformers import SentenceTransformer
+    from sentence_transformers.models import Normalize
+
+    st = SentenceTransformer(model_name, device="cpu")
+    transformer = st[0].auto_model.eval()
+    tokenizer = st.tokenizer
+    os.makedirs(out_dir, exist_ok=True)
+    tokenizer.save_pretrained(out_dir)  # writes tokenizer.json for fast tokenizers
+
+    sample = tokenizer(["a pinch of salt"], return_tensors="pt")
+    names = [n for n in ("input_ids", "attention_mask", "token_type_ids") if n in sample]
+    dynamic = {n: {0: "batch", 1: "tokens"} for n in names}
+    dynamic["last_hidden_state"] = {0: "batch", 1: "tokens"}
+    fp32_path = os.path.join(out_dir, ONNX_MODEL_FILE)
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(sample[n] for n in names),
+            fp32_path,
+            input_names=names,
+            output_names=["last_hidden_state"],
+            dynamic_axes=dynamic,
+            opset_version=14,
+        )
+
+    model_file = ONNX_MODEL_FILE
+    if quantize:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(
+            fp32_path, os.path.join(out_dir, ONNX_INT8_FILE), weight_type=QuantType.QInt8
+        )
+        model_file = ONNX_INT8_FILE
+
+    config = {
+        "model_name": model_name,
+        "model_file": model_file,
+        "dimension": st.get_sentence_embedding_dimension(),
+        "max_seq_length": st.max_seq_length,
+        "normalize": any(isinstance(m, Normalize) for m in st),
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+    }
+    with open(os.path.join(out_dir, CONFIG_FILE), "w", encoding="utf-8") as f:
+        json.dump(config, f, indent=2)
+    return os.path.join(out_dir, model_file)
+
+
+# ── parity check ─────────────────────────────────────────────
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    return x / np.clip(np.linalg.norm(x, axis=1, keepdims=True), 1e-12, None)
+
+
+def _top_k(corpus: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    # exact L2 ranking, the same order IndexFlatL2 returns
+    d = (queries**2).sum(1)[:, None] - 2 * queries @ corpus.T + (corpus**2).sum(1)[None, :]
+    top = np.argpartition(d, k - 1, axis=1)[:, :k]
+    order = np.take_along_axis(d, top, axis=1).argsort(axis=1)
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _overlap(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / truth.size
+
+
+def parity_report(
+    corpus_texts: Sequence[str],
+    query_texts: Sequence[str],
+    k: int = 10,
+    candidate=None,
+    reference=None,
+) -> List[dict]:
+    """
+    Compare the candidate model (default: onnx) with the reference (torch):
+    per-text cosine between their embeddings, and overlap@k of each
+    candidate setup's rankings with the all-reference fp32 ranking.
+    """
+    from app.services.index_store import STORAGE_DTYPES, decode_embeddings, encode_embeddings
+
+    reference = reference or load_embedding_model("torch")
+    candidate = candidate or load_embedding_model("onnx")
+
+    def embed(model, texts):
+        t0 = time.perf_counter()
+        vecs = np.asarray(model.encode(list(texts), batch_size=64), dtype="float32")
+        return vecs, time.perf_counter() - t0
+
+    ref_corpus, ref_s = embed(reference, corpus_texts)
+    cand_corpus, cand_s = embed(candidate, corpus_texts)
+    ref_queries, _ = embed(reference, query_texts)
+    cand_queries, _ = embed(candidate, query_texts)
+    truth = _top_k(ref_corpus, ref_queries, k)
+
+    cosine = (_normalize(ref_corpus) * _normalize(cand_corpus)).sum(axis=1)
+    rows = [
+        {
+            "check": "cosine(reference, candidate)",
+            "mean": float(cosine.mean()),
+            "min": float(cosine.min()),
+            "p01": float(np.percentile(cosine, 1)),
+            "reference_texts_per_s": len(corpus_texts) / ref_s,
+            "candidate_texts_per_s": len(corpus_texts) / cand_s,
+        }
+    ]
+    # (queries, corpus, corpus storage dtype); the first row isolates the
+    # query model, i.e. switching backends without rebuilding the index
+    setups = [("candidate", "reference", "float32")]
+    setups += [("candidate", "candidate", dtype) for dtype in STORAGE_DTYPES]
+    setups += [("reference", "reference", dtype) for dtype in STORAGE_DTYPES[1:]]
+    vectors = {
+        "reference": (ref_queries, ref_corpus),
+        "candidate": (cand_queries, cand_corpus),
+    }
+    for query_model, corpus_model, dtype in setups:
+        queries = vectors[query_model][0]
+        stored = decode_embeddings(*encode_embeddings(vectors[corpus_model][1], dtype))
+        rows.append(
+            {
+                "check": f"{query_model} queries / {corpus_model} corpus ({dtype})",
+                f"overlap@{k}": _overlap(_top_k(stored, queries, k), truth),
+            }
+        )
+    return rows
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="ONNX embedding backend tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="export (and quantize) the ONNX model")
+    export.add_argument("--no-quantize", action="store_true")
+    parity = sub.add_parser("parity", help="compare the ONNX model with torch")
+    parity.add_argument("--corpus", type=int, default=5000)
+    parity.add_argument("--queries", type=int, default=500)
+    parity.add_argument("--k", type=int, default=10)
+    parity.add_argument("--json", help="also write the rows to this file")
+    args = parser.parse_args()
+
+    if args.command == "export":
+        print(export_onnx(quantize=not args.no_quantize))
+        return
+
+    import pandas as pd
+
+    df = pd.read_csv(
+        settings.DATA_PATH, usecols=["cleaned_text", "ingredients"], nrows=args.corpus
+    )
+    corpus = df["cleaned_text"].fillna("").astype(str).tolist()
+    # queries look like search requests: a recipe's ingredient list
+    queries = df["ingredients"].fillna("").astype(str).sample(
+        n=min(args.queries, len(df)), random_state=0
+    ).tolist()
+    rows = parity_report(corpus, queries, k=args.k)
+    for r in rows:
+        values = ", ".join(
+            f"{key}={v:.4f}" if isinstance(v, float) else f"{key}={v}"
+            for key, v in r.items()
+            if key != "check"
+        )
+        print(f"{r['check']:<50} {values}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,158 @@
+"""
+Micro-batching front end for SentenceTransformer.encode.
+
+Concurrent /recipes/search requests each need one query embedding. Instead
+of running many batch-size-1 forward passes on the request threads, callers
+enqueue their text and get a future back; a dedicated worker thread drains
+whatever arrives within max_wait_ms (up to max_batch_size texts) and encodes
+it in a single call.
+
+The worker thread is started on first use and again in a forked child
+(threads do not survive fork), so a batcher created in a gunicorn --preload
+master works in every worker.
+"""
+import asyncio
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+_STOP = object()
+
+
+class EmbeddingBatcher:
+    def __init__(self, model, max_batch_size: int = 32, max_wait_ms: float = 5.0):
+        self.model = model
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+
+        self._queue: "queue.Queue" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._requests = 0
+        self._batches = 0
+        self._largest_batch = 0
+        self._errors = 0
+        self._encode_seconds = 0.0
+        self._latency_seconds = 0.0
+        self._max_latency = 0.0
+
+    def _ensure_started(self) -> None:
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            if self._pid is not None:
+                # forked: the parent's thread and queue waiters are gone
+                self._queue = queue.Queue()
+                self._lock = threading.Lock()
+            self._thread = threading.Thread(
+                target=self._run, name="embedding-batcher", daemon=True
+            )
+            self._thread.start()
+            self._pid = os.getpid()
+
+    def submit(self, text: str) -> Future:
+        self._ensure_started()
+        fut: Future = Future()
+        self._queue.put((text, fut, time.perf_counter()))
+        return fut
+
+    def encode(self, text: str) -> np.ndarray:
+        """
+        Blocking helper for synchronous callers.
+        """
+        return self.submit(text).result()
+
+    async def embed(self, text: str) -> np.ndarray:
+        return await asyncio.wrap_future(self.submit(text))
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if self._thread is None or self._pid != os.getpid():
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+
+    def stats(self) -> dict:
+        with self._lock:
+            uptime = time.monotonic() - self._started_at
+            return {
+                "requests": self._requests,
+                "batches": self._batches,
+                "errors": self._errors,
+                "mean_batch_size": self._requests / self._batches if self._batches else 0.0,
+                "largest_batch": self._largest_batch,
+                "queue_depth": self._queue.qsize(),
+                "requests_per_second": self._requests / uptime if uptime else 0.0,
+                "encode_texts_per_second": (
+                    self._requests / self._encode_seconds if self._encode_seconds else 0.0
+                ),
+                "mean_latency_ms": (
+                    1000 * self._latency_seconds / self._requests if self._requests else 0.0
+                ),
+                "max_latency_ms": 1000 * self._max_latency,
+            }
+
+    def _collect(self, first) -> Tuple[List[tuple], bool]:
+        batch = [first]
+        stop = False
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            try:
+                item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                stop = True
+                break
+            batch.append(item)
+        return batch, stop
+
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()
+            if first is _STOP:
+                return
+            batch, stop = self._collect(first)
+
+            # skip callers that gave up (e.g. client disconnected) while queued
+            live = [item for item in batch if item[1].set_running_or_notify_cancel()]
+            if live:
+                self._encode_batch(live)
+            if stop:
+                return
+
+    def _encode_batch(self, batch: List[tuple]) -> None:
+        texts = [text for text, _, _ in batch]
+        t0 = time.perf_counter()
+        try:
+            vecs = np.asarray(
+                self.model.encode(texts, batch_size=len(texts)), dtype="float32"
+            )
+        except Exception as e:
+            for _, fut, _ in batch:
+                fut.set_exception(e)
+            with self._lock:
+                self._errors += len(batch)
+            return
+
+        done = time.perf_counter()
+        latencies = [done - enqueued for _, _, enqueued in batch]
+        for (_, fut, _), vec in zip(batch, vecs):
+            fut.set_result(vec.reshape(1, -1))
+
+        with self._lock:
+            self._requests += len(batch)
+            self._batches += 1
+            self._largest_batch = max(self._largest_batch, len(batch))
+            self._encode_seconds += done - t0
+            self._latency_seconds += sum(latencies)
+            self._max_latency = max(self._max_latency, max(latencies))
@@ -0,0 +1,313 @@
+"""
+Persistent cache for /recipes/generate results.
+
+Entries are keyed on the fully rendered prompt plus model name and stored in
+SQLite, so they survive restarts and are shared by every worker on the host.
+On an exact-key miss, an optional near-duplicate lookup embeds the
+ingredient set and reuses an entry whose prompt differs only in the
+ingredients (same constraints, cuisine and model), if the cosine similarity
+of the two ingredient sets is at least GENERATION_CACHE_SIMILARITY.
+Concurrent identical requests are coalesced onto one in-flight LLM call,
+and the table is bounded with least-recently-used eviction.
+Near-duplicate matching hands one user's generation to another, so it is
+off unless GENERATION_CACHE_SIMILARITY is set above 0.
+"""
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.config import settings
+from app.services.search_engine import SearchEngineLoader
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS generations (
+    key TEXT PRIMARY KEY,
+    signature TEXT NOT NULL,
+    model TEXT NOT NULL,
+    ingredients TEXT NOT NULL,
+    embedding BLOB,
+    response TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS generations_signature ON generations (signature);
+CREATE INDEX IF NOT EXISTS generations_last_access ON generations (last_access);
+"""
+
+
+def _sha256(*parts: str) -> str:
+    return hashlib.sha256("\0".join(parts).encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    """
+    One in-flight lookup-or-generate, shared by every caller with its key.
+    """
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class GenerationCache:
+    def __init__(
+        self,
+        path: str = settings.GENERATION_CACHE_PATH,
+        max_entries: int = settings.GENERATION_CACHE_MAX_ENTRIES,
+        similarity: float = settings.GENERATION_CACHE_SIMILARITY,
+        search: Optional[SearchEngineLoader] = None,
+    ):
+        self.path = path
+        # embeds ingredient sets for near-duplicate matching once it is ready
+        self.search = search
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, _Flight] = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.path) and self.max_entries > 0
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, timeout=10)
+            # WAL lets several workers read while one writes
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    # ── blocking SQLite helpers (run via asyncio.to_thread) ───
+
+    def _get_exact(self, key: str) -> Optional[dict]:
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute(
+                "SELECT response FROM generations WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE generations SET last_access = ? WHERE key = ?", (time.time(), key)
+            )
+            conn.commit()
+        return json.loads(row[0])
+
+    def _get_similar(self, signature: str, vec: np.ndarray) -> Optional[dict]:
+        with self._lock:
+            conn = self._connect()
+            rows = conn.execute(
+                "SELECT key, embedding, response FROM generations "
+                "WHERE signature = ? AND embedding IS NOT NULL",
+                (signature,),
+            ).fetchall()
+            if not rows:
+                return None
+            matrix = np.stack([np.frombuffer(r[1], dtype="float32") for r in rows])
+            scores = matrix @ vec
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+            conn.execute(
+                "UPDATE generations SET last_access = ? WHERE key = ?",
+                (time.time(), rows[best][0]),
+            )
+            conn.commit()
+        return json.loads(rows[best][2])
+
+    def _put(
+        self,
+        key: str,
+        signature: str,
+        model: str,
+        ingredients: List[str],
+        vec: Optional[np.ndarray],
+        response: dict,
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            conn.execute(
+                "INSERT OR REPLACE INTO generations "
+                "(key, signature, model, ingredients, embedding, response, created, last_access) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    signature,
+                    model,
+                    json.dumps(ingredients),
+                    vec.astype("float32").tobytes() if vec is not None else None,
+                    json.dumps(response),
+                    now,
+                    now,
+                ),
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM generations").fetchone()
+            excess = count - self.max_entries
+            if excess > 0:
+                conn.execute(
+                    "DELETE FROM generations WHERE key IN ("
+                    "SELECT key FROM generations ORDER BY last_access ASC LIMIT ?)",
+                    (excess,),
+                )
+                self.evictions += excess
+            conn.commit()
+
+    # ── async API ────────────────────────────────────────────
+
+    async def _ingredient_vector(self, ingredients: List[str]) -> Optional[np.ndarray]:
+        if self.similarity <= 0 or self.search is None or not self.search.ready:
+            return None
+        terms = sorted({i.strip().lower() for i in ingredients if i.strip()})
+        vec = await self.search.get().embedder.embed(" ".join(terms))
+        vec = vec.reshape(-1)
+        norm = float(np.linalg.norm(vec))
+        return vec / norm if norm else None
+
+    async def get_or_generate(
+        self,
+        model: str,
+        prompt: str,
+        signature: str,
+        ingredients: List[str],
+        produce: Callable[[], Awaitable[dict]],
+    ) -> dict:
+        """
+        Return the cached response for this prompt, or await produce() once
+        (shared by all concurrent callers with the same prompt) and cache it.
+        Only successful recipes (no "error" key) are stored.
+
+        The shared call runs in its own task, so a cancelled caller (e.g. a
+        client that disconnected) only stops waiting; the call itself is
+        cancelled when its last waiter is gone.
+        """
+        if not self.enabled:
+            return await produce()
+
+        key = _sha256(model, prompt)
+        flight = self._inflight.get(key)
+        if flight is None:
+            flight = _Flight(
+                asyncio.ensure_future(
+                    self._lookup_or_produce(key, model, signature, ingredients, produce)
+                )
+            )
+            self._inflight[key] = flight
+            flight.task.add_done_callback(lambda _, f=flight: self._land(key, f))
+        else:
+            self.coalesced += 1
+
+        flight.waiters += 1
+        try:
+            return await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+            raise
+        finally:
+            flight.waiters -= 1
+
+    def _land(self, key: str, flight: _Flight) -> None:
+        if self._inflight.get(key) is flight:
+            del self._inflight[key]
+        if not flight.task.cancelled():
+            flight.task.exception()  # mark retrieved when nobody was waiting
+
+    async def _lookup_or_produce(self, key, model, signature, ingredients, produce) -> dict:
+        cached = await asyncio.to_thread(self._get_exact, key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        vec = await self._ingredient_vector(ingredients)
+        if vec is not None:
+            cached = await asyncio.to_thread(self._get_similar, _sha256(model, signature), vec)
+            if cached is not None:
+                self.near_hits += 1
+                return cached
+
+        self.misses += 1
+        result = await produce()
+        if "error" not in result:
+            await asyncio.to_thread(
+                self._put, key, _sha256(model, signature), model, ingredients, vec, result
+            )
+        return result
+
+    async def lookup(self, model: str, prompt: str, signature: str, ingredients: List[str]):
+        """
+        Cache-only lookup (exact, then near-duplicate) for the streaming route.
+        """
+        if not self.enabled:
+            return None
+        cached = await asyncio.to_thread(self._get_exact, _sha256(model, prompt))
+        if cached is None:
+            vec = await self._ingredient_vector(ingredients)
+            if vec is not None:
+                cached = await asyncio.to_thread(
+                    self._get_similar, _sha256(model, signature), vec
+                )
+                if cached is not None:
+                    self.near_hits += 1
+                    return cached
+            self.misses += 1
+            return None
+        self.hits += 1
+        return cached
+
+    async def store(
+        self, model: str, prompt: str, signature: str, ingredients: List[str], result: dict
+    ) -> None:
+        if not self.enabled or "error" in result:
+            return
+        vec = await self._ingredient_vector(ingredients)
+        await asyncio.to_thread(
+            self._put,
+            _sha256(model, prompt),
+            _sha256(model, signature),
+            model,
+            ingredients,
+            vec,
+            result,
+        )
+
+    def stats(self) -> dict:
+        entries = 0
+        if self.enabled:
+            with self._lock:
+                (entries,) = self._connect().execute(
+                    "SELECT COUNT(*) FROM generations"
+                ).fetchone()
+        lookups = self.hits + self.near_hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "near_hits": self.near_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.near_hits) / lookups if lookups else 0.0,
+            "coalesced": self.coalesced,
+            "evictions": self.evictions,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,263 @@
+"""
+Offline builder for the search index. The API server only loads what this
+writes; it never embeds the corpus itself.
+
+recipes.csv is streamed in chunks of --chunk-size rows. Each chunk's
+cleaned_text is embedded by a pool of worker processes (one model copy and
+a share of the CPU threads each), and written to its own shard file:
+
+    INDEX_DIR/shards/build.json         inputs the shards were made from
+    INDEX_DIR/shards/shard_000012.npy   embeddings of rows 12*chunk .. 13*chunk
+
+Shards are written atomically, so after a crash or Ctrl-C rerunning the
+command embeds only the missing chunks. Once every shard exists, they are
+assembled into the embeddings, the FAISS index, the recipe store and the
+lexical index, and saved with a new manifest under the build lock.
+
+Usage (from backend/):
+    python -m app.services.index_builder                 # all cores
+    python -m app.services.index_builder --workers 4 --chunk-size 2000
+    python -m app.services.index_builder --force         # rebuild even if current
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import replace
+from typing import Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.embedding_backends import load_embedding_model
+from app.services.index_factory import IndexSpec, build_faiss_index
+from app.services.index_store import (
+    IndexManifest,
+    build_lock,
+    file_sha256,
+    read_manifest,
+    save_index,
+)
+from app.services.lexical_index import LexicalIndex
+from app.services.recipe_store import RecipeStore
+
+logger = logging.getLogger(__name__)
+
+SHARD_DIR = "shards"
+SHARD_INFO_FILE = "build.json"
+TEXT_COLUMN = "cleaned_text"
+
+
+def expected_manifest() -> IndexManifest:
+    """
+    What the server will expect; dimension and rows are filled in on assembly.
+    """
+    return IndexManifest(
+        model_name=settings.EMBEDDING_MODEL_NAME,
+        dimension=None,
+        rows=None,
+        data_sha256=file_sha256(settings.DATA_PATH),
+        index_spec=IndexSpec.from_settings().describe(),
+        embedding_dtype=settings.EMBEDDING_STORAGE,
+        embedding_backend=settings.EMBEDDING_BACKEND,
+    )
+
+
+def index_is_current(index_dir: str, manifest: IndexManifest) -> bool:
+    found = read_manifest(index_dir)
+    return found is not None and not manifest.diff(found)
+
+
+# ── worker process ──────────────────────────────────────────
+
+_model = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    global _model
+    # workers split the cores instead of each grabbing all of them
+    _model = load_embedding_model(model_name=model_name, threads=threads)
+
+
+def _embed_shard(path: str, texts: List[str], batch_size: int) -> Tuple[str, int, float]:
+    t0 = time.perf_counter()
+    vecs = np.asarray(_model.encode(texts, batch_size=batch_size), dtype="float32")
+    tmp = f"{path}.tmp.npy"
+    np.save(tmp, vecs)
+    os.replace(tmp, path)
+    return path, len(texts), time.perf_counter() - t0
+
+
+# ── builder ─────────────────────────────────────────────────
+
+
+class IndexBuilder:
+    def __init__(
+        self,
+        index_dir: str = settings.INDEX_DIR,
+        data_path: str = settings.DATA_PATH,
+        workers: Optional[int] = None,
+        chunk_size: int = 5000,
+        batch_size: int = 64,
+    ):
+        self.index_dir = index_dir
+        self.data_path = data_path
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self.shard_dir = os.path.join(index_dir, SHARD_DIR)
+
+    def shard_path(self, n: int) -> str:
+        return os.path.join(self.shard_dir, f"shard_{n:06d}.npy")
+
+    def _prepare_shard_dir(self, manifest: IndexManifest) -> None:
+        """
+        Keep existing shards only if they were made from the same inputs.
+        """
+        info = {
+            "data_sha256": manifest.data_sha256,
+            "model_name": manifest.model_name,
+            "embedding_backend": manifest.embedding_backend,
+            "chunk_size": self.chunk_size,
+        }
+        info_path = os.path.join(self.shard_dir, SHARD_INFO_FILE)
+        try:
+            with open(info_path, "r", encoding="utf-8") as f:
+                if json.load(f) == info:
+                    return
+        except (OSError, ValueError):
+            pass
+        if os.path.isdir(self.shard_dir):
+            logger.info("Discarding shards built from other inputs")
+            shutil.rmtree(self.shard_dir)
+        os.makedirs(self.shard_dir)
+        with open(info_path, "w", encoding="utf-8") as f:
+            json.dump(info, f)
+
+    def _chunks(self) -> Iterator[Tuple[int, List[str]]]:
+        reader = pd.read_csv(
+            self.data_path, usecols=[TEXT_COLUMN], chunksize=self.chunk_size
+        )
+        for n, chunk in enumerate(reader):
+            yield n, chunk[TEXT_COLUMN].fillna("").astype(str).tolist()
+
+    def embed_corpus(self) -> int:
+        """
+        Embed every chunk that has no shard yet; returns the shard count.
+        """
+        threads = max(1, (os.cpu_count() or 1) // self.workers)
+        ctx = multiprocessing.get_context("spawn")
+        started = time.perf_counter()
+        done_rows = skipped = 0
+        n_shards = 0
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(settings.EMBEDDING_MODEL_NAME, threads),
+        ) as pool:
+            pending = set()
+            for n, texts in self._chunks():
+                n_shards = n + 1
+                if os.path.exists(self.shard_path(n)):
+                    skipped += 1
+                    continue
+                # bounded read-ahead keeps only a few chunks in memory
+                if len(pending) >= 2 * self.workers:
+                    finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    done_rows += self._report(finished, started)
+                pending.add(
+                    pool.submit(_embed_shard, self.shard_path(n), texts, self.batch_size)
+                )
+            finished, _ = wait(pending)
+            done_rows += self._report(finished, started)
+        logger.info(
+            "Embedded %d rows in %.1fs (%d shards reused)",
+            done_rows,
+            time.perf_counter() - started,
+            skipped,
+        )
+        return n_shards
+
+    @staticmethod
+    def _report(finished, started: float) -> int:
+        rows = 0
+        for fut in finished:
+            path, n, seconds = fut.result()  # re-raises worker errors
+            rows += n
+            logger.info(
+                "%s: %d rows in %.1fs (%.0fs elapsed)",
+                os.path.basename(path),
+                n,
+                seconds,
+                time.perf_counter() - started,
+            )
+        return rows
+
+    def assemble(self, manifest: IndexManifest, n_shards: int) -> IndexManifest:
+        shards = [np.load(self.shard_path(n), mmap_mode="r") for n in range(n_shards)]
+        rows = sum(len(s) for s in shards)
+        dimension = shards[0].shape[1] if shards else 0
+        embeddings = np.empty((rows, dimension), dtype="float32")
+        start = 0
+        for shard in shards:
+            embeddings[start : start + len(shard)] = shard
+            start += len(shard)
+
+        df = pd.read_csv(self.data_path)
+        if len(df) != rows:
+            raise RuntimeError(f"{rows} embedded rows but {len(df)} rows in the CSV")
+        store = RecipeStore.from_frame(df)
+        spec = IndexSpec.from_settings()
+        logger.info("Building %s FAISS index over %d rows", spec.describe(), rows)
+        index = build_faiss_index(embeddings, spec)
+        lexical = LexicalIndex.build(store.ingredients)
+
+        manifest = replace(manifest, dimension=dimension, rows=rows)
+        save_index(self.index_dir, manifest, embeddings, index, store=store, lexical=lexical)
+        return manifest
+
+    def build(self, force: bool = False, keep_shards: bool = False) -> bool:
+        """
+        Build the index unless it is already current; returns True if built.
+        """
+        manifest = expected_manifest()
+        if not force and index_is_current(self.index_dir, manifest):
+            logger.info("Index in %s is up to date", self.index_dir)
+            return False
+
+        os.makedirs(self.index_dir, exist_ok=True)
+        self._prepare_shard_dir(manifest)
+        n_shards = self.embed_corpus()
+        with build_lock(self.index_dir):
+            self.assemble(manifest, n_shards)
+        if not keep_shards:
+            shutil.rmtree(self.shard_dir, ignore_errors=True)
+        logger.info("Index written to %s", self.index_dir)
+        return True
+
+
+def _main():
+    parser = argparse.ArgumentParser(description="Build the recipe search index")
+    parser.add_argument("--workers", type=int, default=None, help="default: all cores")
+    parser.add_argument("--chunk-size", type=int, default=5000)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--force", action="store_true", help="rebuild even if current")
+    parser.add_argument("--keep-shards", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(
+        level=settings.LOG_LEVEL, format="%(asctime)s %(levelname)s %(message)s"
+    )
+    IndexBuilder(
+        workers=args.workers, chunk_size=args.chunk_size, batch_size=args.batch_size
+    ).build(force=args.force, keep_shards=args.keep_shards)
+
+
+if __name__ == "__main__":
+    _main()
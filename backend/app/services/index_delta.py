@@ -0,0 +1,282 @@
+"""
+Incremental additions, updates and deletions on top of the read-only base index.
+
+The base index in INDEX_DIR is memory-mapped read-only, so changes go into a
+small delta kept next to it:
+
+    delta/base.json    data hash and row count of the base it applies to
+    delta/log.jsonl    append-only operations ("add" with recipes, "delete")
+    delta/add_*.npy    embeddings of each added batch
+    delta/.log.lock    advisory lock held while appending to the log
+
+Added recipes live in an in-memory ID-mapped flat FAISS index whose ids
+continue after the base rows; deleted or updated base rows become tombstones
+that are filtered out of base results. The log is replayed on startup, so
+only new rows are ever embedded. A full rebuild of the base (recipes.csv
+changed) retires the old delta.
+
+Several processes may write the same delta (a running server and the CLI).
+Each write takes the log lock, first applies whatever other processes
+appended since it last read the log, then allocates ids and appends, so ids
+are never handed out twice.
+
+CLI (from backend/; applies to disk, a running server sees it at its next
+write or restart):
+    python -m app.services.index_delta add new_recipes.jsonl
+    python -m app.services.index_delta delete 1234 1235
+"""
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, List, Optional, Sequence, Set
+
+import faiss
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent writers just race
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+DELTA_DIR = "delta"
+BASE_FILE = "base.json"
+LOG_FILE = "log.jsonl"
+LOG_LOCK_FILE = ".log.lock"
+
+
+class IndexDelta:
+    def __init__(self, index_dir: str, base_rows: int, dimension: int, base_sha256: str):
+        self.root = os.path.join(index_dir, DELTA_DIR)
+        self.base_rows = base_rows
+        self.base_sha256 = base_sha256
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dimension))
+        self.recipes: Dict[int, dict] = {}
+        # base row ids hidden from results (deleted, or superseded by an update)
+        self.tombstones: Set[int] = set()
+        self.next_id = base_rows
+        self._lock = threading.RLock()
+        self._batches = 0
+        # bytes of log.jsonl already applied
+        self._log_offset = 0
+        self._replay()
+
+    # ── queries ──────────────────────────────────────────────
+
+    def __len__(self) -> int:
+        return len(self.recipes)
+
+    def __contains__(self, recipe_id: int) -> bool:
+        if recipe_id in self.recipes:
+            return True
+        return 0 <= recipe_id < self.base_rows and recipe_id not in self.tombstones
+
+    def search(self, query_vec: np.ndarray, k: int):
+        with self._lock:
+            if self.index.ntotal == 0:
+                n = len(query_vec)
+                return np.empty((n, 0), dtype="float32"), np.empty((n, 0), dtype="int64")
+            return self.index.search(query_vec, min(k, self.index.ntotal))
+
+    def tombstone_ids(self) -> np.ndarray:
+        """
+        Snapshot of the tombstones; the set itself changes under writers.
+        """
+        with self._lock:
+            return np.fromiter(self.tombstones, dtype="int64", count=len(self.tombstones))
+
+    # ── mutations ────────────────────────────────────────────
+
+    def add(
+        self,
+        recipes: List[dict],
+        embeddings: np.ndarray,
+        ids: Optional[Sequence[int]] = None,
+    ) -> List[int]:
+        """
+        Insert recipes with their embeddings. Without ids, new ids are
+        allocated; with ids, existing recipes are replaced (update).
+        """
+        embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+        with self._lock, self._log_lock():
+            self._read_log()
+            if ids is None:
+                ids = list(range(self.next_id, self.next_id + len(recipes)))
+            ids = [int(i) for i in ids]
+            batch = self._write_batch(embeddings)
+            self._apply_add(ids, recipes, embeddings)
+            self._append({"op": "add", "ids": ids, "recipes": recipes, "embeddings": batch})
+        return ids
+
+    def delete(self, ids: Iterable[int]) -> List[int]:
+        with self._lock, self._log_lock():
+            self._read_log()
+            removed = [int(i) for i in ids if int(i) in self]
+            if removed:
+                self._apply_delete(removed)
+                self._append({"op": "delete", "ids": removed})
+        return removed
+
+    def _apply_add(self, ids: List[int], recipes: List[dict], embeddings: np.ndarray):
+        replaced = [i for i in ids if i in self.recipes]
+        if replaced:
+            self.index.remove_ids(np.array(replaced, dtype="int64"))
+        self.tombstones.update(i for i in ids if i < self.base_rows)
+        self.index.add_with_ids(embeddings, np.array(ids, dtype="int64"))
+        self.recipes.update(zip(ids, recipes))
+        self.next_id = max(self.next_id, max(ids, default=-1) + 1)
+
+    def _apply_delete(self, ids: List[int]):
+        in_delta = [i for i in ids if i in self.recipes]
+        if in_delta:
+            self.index.remove_ids(np.array(in_delta, dtype="int64"))
+            for i in in_delta:
+                del self.recipes[i]
+        self.tombstones.update(i for i in ids if i < self.base_rows)
+
+    # ── persistence ──────────────────────────────────────────
+
+    def _base_info(self) -> dict:
+        return {"data_sha256": self.base_sha256, "base_rows": self.base_rows}
+
+    def _replay(self) -> None:
+        base_path = os.path.join(self.root, BASE_FILE)
+        if not os.path.exists(base_path):
+            return
+        with open(base_path, "r", encoding="utf-8") as f:
+            if json.load(f) != self._base_info():
+                stale = f"{self.root}.stale-{int(time.time())}"
+                logger.warning("Base index was rebuilt; moving old delta to %s", stale)
+                os.replace(self.root, stale)
+                return
+
+        with self._log_lock():
+            self._read_log()
+        logger.info(
+            "Replayed index delta: %d added, %d tombstoned",
+            len(self.recipes),
+            len(self.tombstones),
+        )
+
+    def _read_log(self) -> None:
+        """
+        Apply log entries past _log_offset. Called with the log lock held,
+        so every line is complete unless a writer crashed mid-append.
+        """
+        log_path = os.path.join(self.root, LOG_FILE)
+        if not os.path.exists(log_path):
+            return
+        with open(log_path, "rb") as f:
+            f.seek(self._log_offset)
+            for line in f:
+                self._log_offset += len(line)
+                if not line.strip():
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn line from a crash mid-append
+                    logger.warning("Skipping unreadable delta log entry")
+                    continue
+                if entry["op"] == "add":
+                    embeddings = np.load(os.path.join(self.root, entry["embeddings"]))
+                    self._apply_add(entry["ids"], entry["recipes"], embeddings)
+                    self._batches += 1
+                elif entry["op"] == "delete":
+                    self._apply_delete(entry["ids"])
+
+    @contextmanager
+    def _log_lock(self):
+        self._ensure_root()
+        with open(os.path.join(self.root, LOG_LOCK_FILE), "w") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _ensure_root(self) -> None:
+        if not os.path.isdir(self.root):
+            os.makedirs(self.root, exist_ok=True)
+        base_path = os.path.join(self.root, BASE_FILE)
+        if not os.path.exists(base_path):
+            with open(base_path, "w", encoding="utf-8") as f:
+                json.dump(self._base_info(), f)
+
+    def _write_batch(self, embeddings: np.ndarray) -> str:
+        # the embeddings file is complete before the log line that names it
+        self._ensure_root()
+        self._batches += 1
+        name = f"add_{self._batches:06d}_{time.time_ns()}.npy"
+        np.save(os.path.join(self.root, name), embeddings)
+        return name
+
+    def _append(self, entry: dict) -> None:
+        line = (json.dumps(entry) + "\n").encode("utf-8")
+        with open(os.path.join(self.root, LOG_FILE), "ab+") as f:
+            end = f.seek(0, os.SEEK_END)
+            if end:
+                # terminate a torn line left by a crashed writer
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    line = b"\n" + line
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+            self._log_offset = f.tell()
+
+
+def _read_recipes(path: str) -> List[dict]:
+    from app.config import settings
+    from app.schemas.recipe import RecipeIn
+
+    if path.endswith(".csv"):
+        import pandas as pd
+        from app.services.recipe_store import parse_list_value
+
+        df = pd.read_csv(path)
+        for col in ("ingredients", "instructions"):
+            df[col] = df[col].map(parse_list_value)
+        df = df.astype(object).where(df.notna(), None)
+        if settings.CUISINE_COLUMN in df.columns and "cuisine" not in df.columns:
+            df = df.rename(columns={settings.CUISINE_COLUMN: "cuisine"})
+        rows = df.to_dict(orient="records")
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            rows = [json.loads(line) for line in f if line.strip()]
+    return [RecipeIn(**row).model_dump() for row in rows]
+
+
+def _main():
+    from app.services.vector_index import RecipeVectorIndex
+
+    parser = argparse.ArgumentParser(description="Add or delete indexed recipes")
+    sub = parser.add_subparsers(dest="command", required=True)
+    add = sub.add_parser("add", help="embed and add recipes from a .jsonl or .csv file")
+    add.add_argument("path")
+    delete = sub.add_parser("delete", help="remove recipes by id")
+    delete.add_argument("ids", nargs="+", type=int)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    engine = RecipeVectorIndex()
+    try:
+        if args.command == "add":
+            ids = engine.add_recipes(_read_recipes(args.path))
+            print(f"Added {len(ids)} recipes (ids {ids[0]}..{ids[-1]})" if ids else "Nothing to add")
+        else:
+            removed = engine.delete_recipes(args.ids)
+            print(f"Deleted {len(removed)} recipes: {removed}")
+    finally:
+        engine.embedder.close()
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,233 @@
+"""
+FAISS index backends for recipe search and a recall/latency report to pick one.
+
+Backends (``settings.INDEX_BACKEND``):
+    flat      exact brute-force L2 scan, the reference for recall
+    sq_fp16   brute-force scan over float16 codes; half the memory of flat
+    sq8       brute-force scan over 8-bit scalar-quantized codes; a quarter
+    ivf_flat  inverted file over k-means cells, full vectors; tune with nprobe
+    ivf_pq    inverted file with product-quantized codes; smallest, tune with nprobe
+    hnsw      graph index; tune with efSearch
+
+Report usage (from backend/):
+    python -m app.services.index_factory --backends ivf_flat hnsw --k 10
+"""
+import argparse
+import json
+import time
+from dataclasses import dataclass, replace
+from typing import Iterable, List, Optional
+
+import faiss
+import numpy as np
+
+from app.config import settings
+
+BACKENDS = ("flat", "sq_fp16", "sq8", "ivf_flat", "ivf_pq", "hnsw")
+
+_SQ_TYPES = {
+    "sq_fp16": faiss.ScalarQuantizer.QT_fp16,
+    "sq8": faiss.ScalarQuantizer.QT_8bit,
+}
+
+# faiss warns below ~39 training points per centroid
+MIN_POINTS_PER_CENTROID = 39
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    backend: str = "flat"
+    nlist: int = 1024
+    pq_m: int = 16
+    pq_nbits: int = 8
+    hnsw_m: int = 32
+    ef_construction: int = 200
+
+    @classmethod
+    def from_settings(cls) -> "IndexSpec":
+        return cls(
+            backend=settings.INDEX_BACKEND,
+            nlist=settings.IVF_NLIST,
+            pq_m=settings.PQ_M,
+            pq_nbits=settings.PQ_NBITS,
+            hnsw_m=settings.HNSW_M,
+            ef_construction=settings.HNSW_EF_CONSTRUCTION,
+        )
+
+    def describe(self) -> str:
+        """
+        Stable string of the build parameters that matter for this backend,
+        recorded in the index manifest so a settings change forces a rebuild.
+        """
+        if self.backend == "ivf_flat":
+            return f"ivf_flat:nlist={self.nlist}"
+        if self.backend == "ivf_pq":
+            return f"ivf_pq:nlist={self.nlist},m={self.pq_m},nbits={self.pq_nbits}"
+        if self.backend == "hnsw":
+            return f"hnsw:m={self.hnsw_m},efc={self.ef_construction}"
+        if self.backend in _SQ_TYPES:
+            return self.backend
+        return "flat"
+
+
+def build_faiss_index(embeddings: np.ndarray, spec: IndexSpec) -> faiss.Index:
+    """
+    Create, train (for IVF backends) and fill an index for these embeddings.
+    """
+    if spec.backend not in BACKENDS:
+        raise ValueError(
+            f"Unknown index backend {spec.backend!r}; expected one of {BACKENDS}"
+        )
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    n, d = embeddings.shape
+
+    if spec.backend == "flat":
+        index = faiss.IndexFlatL2(d)
+    elif spec.backend in _SQ_TYPES:
+        index = faiss.IndexScalarQuantizer(d, _SQ_TYPES[spec.backend], faiss.METRIC_L2)
+        index.train(embeddings)  # per-dimension value ranges
+    elif spec.backend == "hnsw":
+        index = faiss.IndexHNSWFlat(d, spec.hnsw_m)
+        index.hnsw.efConstruction = spec.ef_construction
+    else:
+        # shrink nlist for small corpora instead of failing k-means
+        nlist = max(1, min(spec.nlist, n // MIN_POINTS_PER_CENTROID))
+        quantizer = faiss.IndexFlatL2(d)
+        if spec.backend == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, d, nlist)
+        else:
+            if d % spec.pq_m:
+                raise ValueError(f"PQ_M={spec.pq_m} must divide dimension {d}")
+            if n < 2**spec.pq_nbits:
+                raise ValueError(
+                    f"ivf_pq with nbits={spec.pq_nbits} needs at least "
+                    f"{2 ** spec.pq_nbits} rows to train, got {n}"
+                )
+            index = faiss.IndexIVFPQ(quantizer, d, nlist, spec.pq_m, spec.pq_nbits)
+        index.train(embeddings)
+
+    index.add(embeddings)
+    return index
+
+
+def search_params(
+    index: faiss.Index,
+    nprobe: Optional[int] = None,
+    ef_search: Optional[int] = None,
+    sel: Optional[faiss.IDSelector] = None,
+) -> Optional[faiss.SearchParameters]:
+    """
+    Per-query search parameters for this index type. Passed to
+    index.search(params=...) rather than mutating the shared index, so
+    concurrent requests can use different recall/latency trade-offs.
+    sel restricts the search to the selected ids (filtered search).
+    """
+    base = faiss.downcast_index(index)
+    extra = {} if sel is None else {"sel": sel}
+    if isinstance(base, faiss.IndexIVF) and (nprobe or extra):
+        return faiss.SearchParametersIVF(
+            nprobe=min(nprobe or base.nprobe, base.nlist), **extra
+        )
+    if isinstance(base, faiss.IndexHNSW) and (ef_search or extra):
+        return faiss.SearchParametersHNSW(
+            efSearch=ef_search or base.hnsw.efSearch, **extra
+        )
+    return faiss.SearchParameters(**extra) if extra else None
+
+
+def recall_report(
+    embeddings: np.ndarray,
+    backends: Iterable[str],
+    k: int = 10,
+    n_queries: int = 1000,
+    nprobes: Iterable[int] = (1, 4, 16, 64),
+    ef_searches: Iterable[int] = (16, 32, 64, 128),
+    seed: int = 0,
+) -> List[dict]:
+    """
+    Build each backend over embeddings and measure recall@k against an exact
+    flat search, plus mean search latency, for every tuning value.
+    Queries are corpus rows sampled with a fixed seed.
+    """
+    embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+    rng = np.random.default_rng(seed)
+    picks = rng.choice(len(embeddings), size=min(n_queries, len(embeddings)), replace=False)
+    queries = embeddings[picks]
+
+    exact = build_faiss_index(embeddings, IndexSpec(backend="flat"))
+    _, truth = exact.search(queries, k)
+
+    rows: List[dict] = []
+    for backend in backends:
+        spec = replace(IndexSpec.from_settings(), backend=backend)
+        t0 = time.perf_counter()
+        index = build_faiss_index(embeddings, spec)
+        build_s = time.perf_counter() - t0
+
+        if backend in ("ivf_flat", "ivf_pq"):
+            knobs = [("nprobe", v) for v in nprobes]
+        elif backend == "hnsw":
+            knobs = [("efSearch", v) for v in ef_searches]
+        else:
+            knobs = [(None, None)]
+
+        for knob, value in knobs:
+            params = search_params(
+                index,
+                nprobe=value if knob == "nprobe" else None,
+                ef_search=value if knob == "efSearch" else None,
+            )
+            t0 = time.perf_counter()
+            _, found = index.search(queries, k, params=params)
+            elapsed = time.perf_counter() - t0
+            rows.append(
+                {
+                    "backend": spec.describe(),
+                    "param": knob,
+                    "value": value,
+                    f"recall@{k}": _recall(found, truth),
+                    "ms_per_query": 1000 * elapsed / len(queries),
+                    "build_s": build_s,
+                    "index_bytes": _serialized_size(index),
+                }
+            )
+    return rows
+
+
+def _recall(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found.tolist(), truth.tolist()))
+    return hits / truth.size
+
+
+def _serialized_size(index: faiss.Index) -> int:
+    return int(faiss.serialize_index(index).size)
+
+
+def _main():
+    from app.services.index_store import read_embeddings
+
+    parser = argparse.ArgumentParser(description="Recall@k vs flat for each backend")
+    parser.add_argument("--backends", nargs="+", default=list(BACKENDS[1:]))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--json", help="also write the rows to this file")
+    args = parser.parse_args()
+
+    embeddings = read_embeddings(settings.INDEX_DIR)
+    rows = recall_report(embeddings, args.backends, k=args.k, n_queries=args.queries)
+
+    recall_col = f"recall@{args.k}"
+    print(f"{'backend':<40} {'param':<10} {recall_col:>10} {'ms/query':>10} {'MB':>8}")
+    for r in rows:
+        param = f"{r['param']}={r['value']}" if r["param"] else "-"
+        print(
+            f"{r['backend']:<40} {param:<10} {r[recall_col]:>10.3f} "
+            f"{r['ms_per_query']:>10.3f} {r['index_bytes'] / 2**20:>8.1f}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    _main()
@@ -0,0 +1,247 @@
+"""
+Versioned on-disk format for the recipe search index.
+
+Everything lives in one directory (``settings.INDEX_DIR``):
+
+    manifest.json    format version, model name and embedding backend, dimension,
+                     row count, data hash, index backend parameters
+    embeddings.npy   corpus embeddings, opened with mmap; float32, or float16 /
+                     int8 (with embeddings_scale.npy) per EMBEDDING_STORAGE
+    index.faiss      FAISS index written by faiss.write_index, opened with mmap
+    store/           columnar recipe fields (see services/recipe_store.py)
+
+Because both data files are memory-mapped read-only, every uvicorn worker on
+the same host shares a single copy through the OS page cache instead of each
+unpickling a private one. For the FAISS index that takes the right read flag
+per backend (see _faiss_read_flags): flat, sq_fp16, sq8 and hnsw map their
+codes zero-copy with IO_FLAG_MMAP_IFC, the IVF backends map their inverted
+lists with IO_FLAG_MMAP. What still loads into private memory is small: the
+IVF coarse quantizer (nlist centroids) and HNSW bookkeeping. On a faiss
+without IO_FLAG_MMAP_IFC (older than 1.10) flat, sq_* and hnsw are read
+fully into RAM in every worker.
+"""
+import hashlib
+import json
+import os
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, fields
+from typing import Optional, Tuple
+
+import faiss
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks, concurrent builds just race
+    fcntl = None
+
+FORMAT_VERSION = 4
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+EMBEDDINGS_SCALE_FILE = "embeddings_scale.npy"
+INDEX_FILE = "index.faiss"
+LOCK_FILE = ".build.lock"
+
+STORAGE_DTYPES = ("float32", "float16", "int8")
+
+
+class IndexMismatchError(Exception):
+    """Raised when the on-disk index is missing or was built from other inputs."""
+
+
+@dataclass(frozen=True)
+class IndexManifest:
+    model_name: str
+    dimension: int
+    # derived from the data; None in an expected manifest means "don't check"
+    rows: Optional[int]
+    data_sha256: str
+    index_spec: str = "flat"
+    embedding_dtype: str = "float32"
+    # torch and onnx (int8 weights) embeddings differ slightly; queries must
+    # be embedded by the runtime the corpus was
+    embedding_backend: str = "torch"
+    format_version: int = FORMAT_VERSION
+
+    def diff(self, other: "IndexManifest") -> list[str]:
+        """
+        Names of the fields set on this manifest whose values differ in other.
+        """
+        return [
+            f.name
+            for f in fields(self)
+            if getattr(self, f.name) is not None
+            and getattr(self, f.name) != getattr(other, f.name)
+        ]
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def encode_embeddings(
+    embeddings: np.ndarray, dtype: str
+) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Embeddings in a storage dtype, plus the per-dimension scale for int8
+    (symmetric: value = code * scale).
+    """
+    if dtype not in STORAGE_DTYPES:
+        raise ValueError(
+            f"Unknown embedding storage {dtype!r}; expected one of {STORAGE_DTYPES}"
+        )
+    embeddings = np.asarray(embeddings, dtype="float32")
+    if dtype != "int8":
+        return embeddings.astype(dtype), None
+    scale = np.abs(embeddings).max(axis=0, initial=0.0) / 127.0
+    scale = np.where(scale > 0, scale, 1.0).astype("float32")
+    codes = np.clip(np.rint(embeddings / scale), -127, 127).astype(np.int8)
+    return codes, scale
+
+
+def decode_embeddings(stored: np.ndarray, scale: Optional[np.ndarray] = None) -> np.ndarray:
+    vecs = np.asarray(stored, dtype="float32")
+    return vecs * scale if scale is not None else vecs
+
+
+def read_embeddings(index_dir: str) -> np.ndarray:
+    """
+    The corpus embeddings as float32, whatever dtype they are stored in.
+    """
+    stored = np.load(os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r")
+    if stored.dtype == np.float32:
+        return stored
+    scale_path = os.path.join(index_dir, EMBEDDINGS_SCALE_FILE)
+    scale = np.load(scale_path) if stored.dtype == np.int8 else None
+    return decode_embeddings(stored, scale)
+
+
+def read_manifest(index_dir: str) -> Optional[IndexManifest]:
+    path = os.path.join(index_dir, MANIFEST_FILE)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return IndexManifest(**data)
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _faiss_read_flags(index_spec: str) -> int:
+    # IO_FLAG_MMAP alone maps only IVF inverted lists; for IndexFlatCodes
+    # (flat, scalar quantizer, HNSW storage) it still copies the codes into
+    # anonymous memory, and IO_FLAG_MMAP_IFC rejects IVF indexes
+    if index_spec.startswith("ivf_") or not hasattr(faiss, "IO_FLAG_MMAP_IFC"):
+        return faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY
+    return faiss.IO_FLAG_MMAP_IFC | faiss.IO_FLAG_READ_ONLY
+
+
+def load_index(
+    index_dir: str, expected: IndexManifest
+) -> Tuple[np.ndarray, faiss.Index]:
+    """
+    Memory-map the embeddings (in their stored dtype) and FAISS index from
+    index_dir.
+    Raises IndexMismatchError if the manifest is absent or does not match
+    expected, so the caller knows it has to be rebuilt.
+    """
+    found = read_manifest(index_dir)
+    if found is None:
+        raise IndexMismatchError(f"no manifest in {index_dir}")
+    changed = expected.diff(found)
+    if changed:
+        raise IndexMismatchError(f"manifest changed: {', '.join(changed)}")
+
+    try:
+        embeddings = np.load(
+            os.path.join(index_dir, EMBEDDINGS_FILE), mmap_mode="r"
+        )
+        index = faiss.read_index(
+            os.path.join(index_dir, INDEX_FILE),
+            _faiss_read_flags(found.index_spec),
+        )
+    except (OSError, RuntimeError, ValueError) as e:
+        raise IndexMismatchError(f"unreadable index files: {e}") from e
+
+    if (
+        embeddings.shape != (found.rows, found.dimension)
+        or embeddings.dtype != np.dtype(found.embedding_dtype)
+        or index.ntotal != found.rows
+    ):
+        raise IndexMismatchError("index files do not match manifest shape")
+    return embeddings, index
+
+
+def save_index(
+    index_dir: str,
+    manifest: IndexManifest,
+    embeddings: np.ndarray,
+    index: faiss.Index,
+    store=None,
+    lexical=None,
+) -> None:
+    """
+    Write a new index generation, plus the recipe store and lexical index if
+    given. embeddings are float32 and stored as manifest.embedding_dtype.
+    The manifest is removed first and written last, so a crash part-way
+    through leaves a directory that fails load_index and gets rebuilt rather
+    than one that loads stale files.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    manifest_path = os.path.join(index_dir, MANIFEST_FILE)
+    if os.path.exists(manifest_path):
+        os.remove(manifest_path)
+
+    if store is not None:
+        store.save(index_dir)
+    if lexical is not None:
+        lexical.save(index_dir)
+
+    stored, scale = encode_embeddings(embeddings, manifest.embedding_dtype)
+    _atomic_write(
+        os.path.join(index_dir, EMBEDDINGS_FILE),
+        lambda tmp: np.save(tmp, np.ascontiguousarray(stored)),
+    )
+    if scale is not None:
+        _atomic_write(
+            os.path.join(index_dir, EMBEDDINGS_SCALE_FILE), lambda tmp: np.save(tmp, scale)
+        )
+    _atomic_write(
+        os.path.join(index_dir, INDEX_FILE),
+        lambda tmp: faiss.write_index(index, tmp),
+    )
+
+    def write_manifest(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(asdict(manifest), f, indent=2)
+
+    _atomic_write(manifest_path, write_manifest)
+
+
+@contextmanager
+def build_lock(index_dir: str):
+    """
+    Exclusive lock held by the index builder while it writes the index, so
+    servers starting meanwhile wait and load the finished result.
+    """
+    os.makedirs(index_dir, exist_ok=True)
+    with open(os.path.join(index_dir, LOCK_FILE), "w") as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def _atomic_write(path: str, writer) -> None:
+    # np.save appends ".npy" to names that lack it, so keep the real suffix last
+    root, ext = os.path.splitext(path)
+    tmp = f"{root}.tmp{ext}"
+    writer(tmp)
+    os.replace(tmp, path)
@@ -0,0 +1,250 @@
+"""
+Inverted ingredient index for lexical recipe retrieval.
+
+Every ingredient line of the corpus is normalized with clean_ingredients and
+split into word tokens; each token maps to the sorted ids of the recipes
+that use it. Posting lists are stored gap-encoded (differences between
+consecutive ids) in the narrowest unsigned dtype that holds their largest
+gap, so common tokens with dense postings mostly cost one byte per recipe.
+
+A query ingredient ("chicken breast") matches a recipe that has all of its
+words. Recipes are ranked by coverage (share of query ingredients matched),
+then by BM25 over the matched words. Set lookups are far cheaper than
+running the embedding model, so RecipeVectorIndex can answer queries with
+full-coverage matches without encoding them, and fuses lexical and vector
+rankings otherwise.
+
+Layout (INDEX_DIR/lexical/):
+    vocab.*.npy       tokens (StringColumn)
+    postings_u8.npy, postings_u16.npy, postings_u32.npy
+                      concatenated gap arrays of each width
+    width.npy         uint8 byte width of each token's gaps
+    offset.npy        int64 start of each token's gaps in its width's array
+    df.npy            int64 document frequency (posting length)
+    doc_len.npy       uint16 distinct tokens per recipe
+"""
+import logging
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from app.services.recipe_store import ListColumn, StringColumn
+from app.utils.text_utils import clean_ingredients
+
+logger = logging.getLogger(__name__)
+
+LEXICAL_DIR = "lexical"
+_WIDTHS = {1: np.uint8, 2: np.uint16, 4: np.uint32}
+
+# words that describe preparation or size rather than the ingredient
+STOPWORDS = frozenset(
+    """
+    a an and or to for with without into in on at as the about
+    chopped minced diced sliced grated shredded crushed ground peeled
+    fresh freshly large medium small finely roughly thinly cut divided
+    plus more taste optional packed softened melted beaten cubed
+    """.split()
+)
+
+# BM25 parameters
+K1 = 1.2
+B = 0.75
+
+
+def tokenize(cleaned: str) -> List[str]:
+    return [w for w in cleaned.split() if len(w) > 1 and w not in STOPWORDS]
+
+
+class LexicalHits(NamedTuple):
+    ids: np.ndarray  # int64, best first
+    coverage: np.ndarray  # float32, share of query ingredients matched
+    scores: np.ndarray  # float32 BM25
+
+
+class LexicalIndex:
+    def __init__(
+        self,
+        vocab: StringColumn,
+        postings: Dict[int, np.ndarray],
+        width: np.ndarray,
+        offset: np.ndarray,
+        df: np.ndarray,
+        doc_len: np.ndarray,
+    ):
+        self.vocab = vocab
+        self.postings = postings
+        self.width = width
+        self.offset = offset
+        self.df = df
+        self.doc_len = doc_len
+        self.n_docs = len(doc_len)
+        self.avg_doc_len = float(np.mean(doc_len)) if self.n_docs else 0.0
+        self._token_ids = {t: i for i, t in enumerate(vocab.slice(0, len(vocab)))}
+        self._idf = np.log(1.0 + (self.n_docs - df + 0.5) / (df + 0.5)).astype(
+            "float32"
+        )
+
+    # ── construction ─────────────────────────────────────────
+
+    @classmethod
+    def build(cls, ingredients: ListColumn) -> "LexicalIndex":
+        n_docs = len(ingredients)
+        cleaned = clean_ingredients(ingredients.items.slice(0, len(ingredients.items)))
+        row_of_item = np.repeat(np.arange(n_docs), np.diff(ingredients.row_offsets))
+
+        token_ids: Dict[str, int] = {}
+        doc_tokens: List[set] = [set() for _ in range(n_docs)]
+        for row, text in zip(row_of_item.tolist(), cleaned):
+            tokens = doc_tokens[row]
+            for word in tokenize(text):
+                tokens.add(token_ids.setdefault(word, len(token_ids)))
+
+        # (token, doc) pairs sorted by token then doc give every posting list
+        pairs_tok = np.fromiter(
+            (t for tokens in doc_tokens for t in tokens), dtype=np.int64
+        )
+        doc_len = np.array([len(t) for t in doc_tokens], dtype=np.uint16)
+        pairs_doc = np.repeat(
+            np.arange(n_docs, dtype=np.int64), doc_len.astype(np.int64)
+        )
+        order = np.lexsort((pairs_doc, pairs_tok))
+        pairs_tok, pairs_doc = pairs_tok[order], pairs_doc[order]
+        df = np.bincount(pairs_tok, minlength=len(token_ids)).astype(np.int64)
+        starts = np.concatenate(([0], np.cumsum(df)[:-1]))
+
+        width = np.zeros(len(token_ids), dtype=np.uint8)
+        offset = np.zeros(len(token_ids), dtype=np.int64)
+        chunks: Dict[int, List[np.ndarray]] = {w: [] for w in _WIDTHS}
+        filled = {w: 0 for w in _WIDTHS}
+        for tok, (start, count) in enumerate(zip(starts.tolist(), df.tolist())):
+            ids = pairs_doc[start : start + count]
+            gaps = np.diff(ids, prepend=0)
+            w = 1 if gaps.max() < 2**8 else 2 if gaps.max() < 2**16 else 4
+            width[tok] = w
+            offset[tok] = filled[w]
+            chunks[w].append(gaps.astype(_WIDTHS[w]))
+            filled[w] += count
+        postings = {
+            w: np.concatenate(c) if c else np.zeros(0, dtype=_WIDTHS[w])
+            for w, c in chunks.items()
+        }
+
+        vocab = StringColumn.from_strings(sorted(token_ids, key=token_ids.get))
+        return cls(vocab, postings, width, offset, df, doc_len)
+
+    # ── persistence ──────────────────────────────────────────
+
+    def save(self, index_dir: str) -> None:
+        root = os.path.join(index_dir, LEXICAL_DIR)
+        os.makedirs(root, exist_ok=True)
+        # unlink rather than overwrite: a running server has these files
+        # mmap'd, and truncating them in place would crash it (SIGBUS)
+        for name in os.listdir(root):
+            os.remove(os.path.join(root, name))
+        self.vocab.save(os.path.join(root, "vocab"))
+        for w, arr in self.postings.items():
+            np.save(os.path.join(root, f"postings_u{8 * w}.npy"), arr)
+        for name in ("width", "offset", "df", "doc_len"):
+            np.save(os.path.join(root, f"{name}.npy"), getattr(self, name))
+
+    @classmethod
+    def load(
+        cls, index_dir: str, n_docs: int, mmap: bool = True
+    ) -> Optional["LexicalIndex"]:
+        """
+        The saved index, or None if it is missing or for another corpus size.
+        """
+        root = os.path.join(index_dir, LEXICAL_DIR)
+        mode = "r" if mmap else None
+        try:
+            vocab = StringColumn.load(os.path.join(root, "vocab"), mmap=False)
+            postings = {
+                w: np.load(os.path.join(root, f"postings_u{8 * w}.npy"), mmap_mode=mode)
+                for w in _WIDTHS
+            }
+            arrays = {
+                name: np.load(os.path.join(root, f"{name}.npy"), mmap_mode=mode)
+                for name in ("width", "offset", "df", "doc_len")
+            }
+        except (OSError, ValueError):
+            return None
+        if len(arrays["doc_len"]) != n_docs:
+            return None
+        return cls(vocab, postings, **arrays)
+
+    @property
+    def nbytes(self) -> int:
+        return (
+            self.vocab.nbytes
+            + sum(a.nbytes for a in self.postings.values())
+            + self.width.nbytes
+            + self.offset.nbytes
+            + self.df.nbytes
+            + self.doc_len.nbytes
+        )
+
+    # ── queries ──────────────────────────────────────────────
+
+    def posting(self, token_id: int) -> np.ndarray:
+        w = int(self.width[token_id])
+        start = int(self.offset[token_id])
+        gaps = self.postings[w][start : start + int(self.df[token_id])]
+        return np.cumsum(gaps, dtype=np.int64)
+
+    def search(
+        self,
+        terms: Sequence[str],
+        k: int,
+        allowed: Optional[np.ndarray] = None,
+    ) -> LexicalHits:
+        """
+        Top-k recipes for these clean_ingredient query terms, restricted to
+        rows where allowed (a bool mask over recipe ids) is True.
+        """
+        ids_parts, weight_parts = [], []
+        n_terms = 0
+        for term in terms:
+            words = tokenize(term)
+            if not words:
+                continue
+            n_terms += 1
+            token_ids = [self._token_ids.get(w) for w in words]
+            if any(t is None for t in token_ids):
+                continue  # a word no recipe uses: this term matches nothing
+            # rarest word first keeps the intersections small
+            token_ids.sort(key=lambda t: self.df[t])
+            ids = self.posting(token_ids[0])
+            for t in token_ids[1:]:
+                if not len(ids):
+                    break
+                ids = np.intersect1d(ids, self.posting(t), assume_unique=True)
+            if len(ids):
+                ids_parts.append(ids)
+                weight_parts.append(
+                    np.full(len(ids), self._idf[token_ids].sum(), dtype=np.float32)
+                )
+
+        if not ids_parts:
+            empty = np.zeros(0, dtype=np.float32)
+            return LexicalHits(np.zeros(0, dtype=np.int64), empty, empty)
+
+        all_ids = np.concatenate(ids_parts)
+        if allowed is not None:
+            keep = allowed[all_ids]
+            all_ids = all_ids[keep]
+            weight_parts = [np.concatenate(weight_parts)[keep]]
+        ids, inverse = np.unique(all_ids, return_inverse=True)
+        matched = np.bincount(inverse, minlength=len(ids))
+        idf_sum = np.bincount(
+            inverse, weights=np.concatenate(weight_parts), minlength=len(ids)
+        )
+        # every token occurs once per recipe (tf = 1), so BM25 reduces to
+        # idf scaled by the document-length norm
+        dl = self.doc_len[ids].astype(np.float32)
+        norm = (K1 + 1) / (1 + K1 * (1 - B + B * dl / max(self.avg_doc_len, 1.0)))
+        scores = (idf_sum * norm).astype(np.float32)
+        coverage = (matched / n_terms).astype(np.float32)
+
+        top = np.lexsort((-scores, -coverage))[:k]
+        return LexicalHits(ids[top], coverage[top], scores[top])
@@ -0,0 +1,210 @@
+"""
+Shared async HTTP client for every Ollama call.
+
+One connection-pooled httpx.AsyncClient (keep-alive) per app instead of
+a new TCP connection per requests.post, a semaphore capping how many
+generations run against Ollama at once, and retries with exponential
+backoff for connection failures and overloaded-server responses. Calls never
+block the event loop, so a slow generation doesn't stall other requests.
+"""
+import asyncio
+import json
+import logging
+import random
+from typing import AsyncIterator, List, Optional
+
+import httpx
+
+from app.config import settings
+from app.utils.metrics import record_llm_body
+
+logger = logging.getLogger(__name__)
+
+# worth retrying: nothing was generated yet, or the server asked us to back off
+RETRY_STATUS = {429, 502, 503, 504}
+RETRY_ERRORS = (
+    httpx.ConnectError,
+    httpx.ConnectTimeout,
+    httpx.PoolTimeout,
+    httpx.RemoteProtocolError,
+)
+
+
+class LLMError(Exception):
+    """
+    An Ollama call failed. status is the HTTP status when the server
+    answered with an error, None when it could not be reached or timed out.
+    """
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+class OllamaClient:
+    def __init__(
+        self,
+        url: str = settings.OLLAMA_URL,
+        model: str = settings.MODEL_NAME,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        max_connections: int = settings.LLM_MAX_CONNECTIONS,
+        connect_timeout: float = settings.LLM_CONNECT_TIMEOUT_S,
+        timeout: float = settings.LLM_TIMEOUT_S,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        backoff: float = settings.LLM_RETRY_BACKOFF_S,
+        keep_alive: str = settings.LLM_KEEP_ALIVE,
+    ):
+        self.url = url
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.max_connections = max_connections
+        self.connect_timeout = connect_timeout
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.keep_alive = keep_alive
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        # created lazily so it binds to the running event loop
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections,
+                ),
+                timeout=httpx.Timeout(self.timeout, connect=self.connect_timeout),
+            )
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    def _payload(self, prompt: str, model: Optional[str], stream: bool, extra: dict) -> dict:
+        payload = {"model": model or self.model, "prompt": prompt, "stream": stream}
+        if self.keep_alive:
+            # keep the model loaded, so its KV cache for a shared prompt
+            # prefix survives until the next request
+            payload["keep_alive"] = self.keep_alive
+        return {**payload, **extra}
+
+    async def _sleep_before_retry(self, attempt: int, reason) -> None:
+        delay = self.backoff * (2**attempt) * (0.5 + random.random())
+        logger.warning(
+            "Ollama call failed (%s); retry %d/%d in %.2fs",
+            reason,
+            attempt + 1,
+            self.max_retries,
+            delay,
+        )
+        await asyncio.sleep(delay)
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **extra,
+    ) -> dict:
+        """
+        Non-streaming /api/generate call; returns Ollama's JSON body.
+        extra is merged into the request (e.g. format=..., options=...).
+        """
+        client = self._get_client()
+        payload = self._payload(prompt, model, False, extra)
+        request_timeout = (
+            httpx.Timeout(timeout, connect=self.connect_timeout) if timeout else None
+        )
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    kwargs = {"json": payload}
+                    if request_timeout is not None:
+                        kwargs["timeout"] = request_timeout
+                    resp = await client.post(self.url, **kwargs)
+                except RETRY_ERRORS as e:
+                    if attempt == self.max_retries:
+                        raise LLMError(f"Ollama unreachable: {e!r}") from e
+                    await self._sleep_before_retry(attempt, repr(e))
+                    continue
+                except httpx.HTTPError as e:
+                    raise LLMError(f"Ollama request failed: {e!r}") from e
+
+                if resp.status_code in RETRY_STATUS and attempt < self.max_retries:
+                    await self._sleep_before_retry(attempt, f"HTTP {resp.status_code}")
+                    continue
+                if resp.status_code >= 400:
+                    raise LLMError(
+                        f"Ollama returned HTTP {resp.status_code}: {resp.text[:200]}",
+                        status=resp.status_code,
+                    )
+                try:
+                    body = resp.json()
+                except ValueError as e:
+                    raise LLMError(f"Ollama returned invalid JSON: {e}") from e
+                record_llm_body(payload["model"], body)
+                return body
+        raise LLMError("Ollama request failed")
+
+    async def stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        **extra,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming /api/generate call yielding each NDJSON chunk. Retries only
+        happen before the first chunk, so callers never see duplicated output.
+        The read timeout bounds the gap between chunks.
+        """
+        client = self._get_client()
+        payload = self._payload(prompt, model, True, extra)
+        yielded = False
+        async with self._semaphore:
+            for attempt in range(self.max_retries + 1):
+                try:
+                    async with client.stream("POST", self.url, json=payload) as resp:
+                        if resp.status_code in RETRY_STATUS and attempt < self.max_retries:
+                            await self._sleep_before_retry(attempt, f"HTTP {resp.status_code}")
+                            continue
+                        if resp.status_code >= 400:
+                            body = (await resp.aread()).decode("utf-8", "replace")
+                            raise LLMError(
+                                f"Ollama returned HTTP {resp.status_code}: {body[:200]}",
+                                status=resp.status_code,
+                            )
+                        async for line in resp.aiter_lines():
+                            if not line:
+                                continue
+                            try:
+                                chunk = json.loads(line)
+                            except ValueError as e:
+                                raise LLMError(f"Ollama sent invalid JSON: {e}") from e
+                            yielded = True
+                            if chunk.get("done"):
+                                record_llm_body(payload["model"], chunk)
+                            yield chunk
+                        return
+                except RETRY_ERRORS as e:
+                    if yielded or attempt == self.max_retries:
+                        raise LLMError(f"Ollama unreachable: {e!r}") from e
+                    await self._sleep_before_retry(attempt, repr(e))
+                except httpx.HTTPError as e:
+                    raise LLMError(f"Ollama request failed: {e!r}") from e
+
+    async def list_models(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Names of the models the server has pulled (GET /api/tags).
+        """
+        client = self._get_client()
+        tags_url = httpx.URL(self.url).copy_with(path="/api/tags")
+        try:
+            resp = await client.get(tags_url, timeout=timeout or self.connect_timeout)
+            resp.raise_for_status()
+            return [m["name"] for m in resp.json().get("models", [])]
+        except (httpx.HTTPError, ValueError, KeyError) as e:
+            raise LLMError(f"Ollama health check failed: {e!r}") from e
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
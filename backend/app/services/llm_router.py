@@ -0,0 +1,300 @@
+"""
+Routing of LLM calls over a pool of Ollama backends (settings.OLLAMA_URLS).
+
+Each backend is an OllamaClient with its own connection pool and
+concurrency limit. A call goes to the available backend with the fewest
+outstanding requests relative to its limit, preferring backends that have
+the requested model pulled. That way a small cuisine model
+(LLM_CUISINE_MODEL) and the recipe model can live on different hosts.
+
+Failures are handled per backend with a circuit breaker:
+LLM_BREAKER_FAILURES consecutive failures (unreachable, timed out, or HTTP
+5xx) open it, and no calls are sent there for LLM_BREAKER_COOLDOWN_S.
+After that a single probe call is let through, and its outcome closes or
+reopens the circuit. A background health check (GET /api/tags every
+LLM_HEALTH_INTERVAL_S) does the same without waiting for traffic, and
+records each backend's models. A failed call is retried once on each other
+backend; a stream is only retried before its first chunk.
+
+LLMRouter exposes the same generate/stream calls as OllamaClient, so the
+generator and the cuisine detector use either.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import AsyncIterator, List, Optional, Sequence, Set
+
+from app.config import settings
+from app.services.llm_client import LLMError, OllamaClient
+from app.utils.metrics import LLM_BACKEND_REQUESTS
+
+logger = logging.getLogger(__name__)
+
+
+def _counts_as_failure(error: LLMError) -> bool:
+    # unreachable, timed out or a server error; a 4xx (e.g. unknown model)
+    # says nothing about the backend's health
+    return error.status is None or error.status >= 500
+
+
+class LLMBackend:
+    """
+    One Ollama host: its client, in-flight count and circuit breaker state.
+    """
+
+    def __init__(
+        self,
+        url: str,
+        max_concurrency: int = settings.LLM_MAX_CONCURRENCY,
+        max_retries: int = settings.LLM_MAX_RETRIES,
+        failure_threshold: int = settings.LLM_BREAKER_FAILURES,
+        cooldown: float = settings.LLM_BREAKER_COOLDOWN_S,
+    ):
+        self.url = url
+        self.client = OllamaClient(
+            url=url, max_concurrency=max_concurrency, max_retries=max_retries
+        )
+        self.max_concurrency = max_concurrency
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.outstanding = 0
+        self.failures = 0  # consecutive
+        self.open_until = 0.0
+        # models from the last health check; None until one succeeded
+        self.models: Optional[Set[str]] = None
+        self.requests = 0
+        self.errors = 0
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def available(self) -> bool:
+        state = self.state
+        # half-open: one probe call at a time
+        return state == "closed" or (state == "half_open" and self.outstanding == 0)
+
+    def load(self) -> float:
+        return self.outstanding / self.max_concurrency
+
+    def serves(self, model: str) -> bool:
+        if not self.models:
+            return False
+        return model in self.models or (":" not in model and f"{model}:latest" in self.models)
+
+    def record_success(self) -> None:
+        if self.failures >= self.failure_threshold:
+            logger.info("LLM backend %s recovered, closing its circuit", self.url)
+        self.failures = 0
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        self.errors += 1
+        if self.failures >= self.failure_threshold:
+            if self.failures == self.failure_threshold:
+                logger.warning(
+                    "LLM backend %s failed %d times in a row, opening its circuit for %.0fs",
+                    self.url,
+                    self.failures,
+                    self.cooldown,
+                )
+            self.open_until = time.monotonic() + self.cooldown
+
+    def stats(self) -> dict:
+        return {
+            "url": self.url,
+            "state": self.state,
+            "outstanding": self.outstanding,
+            "max_concurrency": self.max_concurrency,
+            "requests": self.requests,
+            "errors": self.errors,
+            "models": sorted(self.models) if self.models is not None else None,
+        }
+
+
+class LLMRouter:
+    def __init__(
+        self,
+        backends: Optional[Sequence[LLMBackend]] = None,
+        model: str = settings.MODEL_NAME,
+        health_interval: float = settings.LLM_HEALTH_INTERVAL_S,
+    ):
+        self.backends: List[LLMBackend] = list(backends or self._backends_from_settings())
+        if not self.backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.model = model
+        self.health_interval = health_interval
+        self._health_task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def _backends_from_settings() -> List[LLMBackend]:
+        urls = settings.OLLAMA_URLS
+        limits = settings.LLM_BACKEND_CONCURRENCY
+        # with several backends, retrying on another one beats backing off
+        # on the same one
+        retries = settings.LLM_MAX_RETRIES if len(urls) == 1 else 0
+        return [
+            LLMBackend(
+                url,
+                max_concurrency=limits[i] if i < len(limits) else settings.LLM_MAX_CONCURRENCY,
+                max_retries=retries,
+            )
+            for i, url in enumerate(urls)
+        ]
+
+    # ── selection ────────────────────────────────────────────
+
+    def _pick(self, model: str, tried: Set[LLMBackend]) -> Optional[LLMBackend]:
+        candidates = [b for b in self.backends if b not in tried and b.available()]
+        if not candidates:
+            return None
+        with_model = [b for b in candidates if b.serves(model)]
+        # least outstanding relative to capacity; random among equals so
+        # idle backends share the load
+        return min(with_model or candidates, key=lambda b: (b.load(), random.random()))
+
+    def _no_backend(self, model: str, last: Optional[LLMError]) -> LLMError:
+        if last is not None:
+            return last
+        return LLMError(f"No healthy LLM backend for model {model!r}")
+
+    def _record_error(self, backend: LLMBackend, error: LLMError) -> None:
+        if _counts_as_failure(error):
+            backend.record_failure()
+            LLM_BACKEND_REQUESTS.inc(backend=backend.url, outcome="failed")
+        else:
+            LLM_BACKEND_REQUESTS.inc(backend=backend.url, outcome="rejected")
+
+    def _record_ok(self, backend: LLMBackend) -> None:
+        backend.record_success()
+        LLM_BACKEND_REQUESTS.inc(backend=backend.url, outcome="ok")
+
+    # ── calls ────────────────────────────────────────────────
+
+    async def generate(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **extra,
+    ) -> dict:
+        """
+        OllamaClient.generate on the least loaded healthy backend, failing
+        over to the others.
+        """
+        model = model or self.model
+        tried: Set[LLMBackend] = set()
+        last: Optional[LLMError] = None
+        while True:
+            backend = self._pick(model, tried)
+            if backend is None:
+                raise self._no_backend(model, last)
+            tried.add(backend)
+            backend.outstanding += 1
+            backend.requests += 1
+            try:
+                body = await backend.client.generate(prompt, model=model, timeout=timeout, **extra)
+            except LLMError as e:
+                self._record_error(backend, e)
+                last = e
+                continue
+            finally:
+                backend.outstanding -= 1
+            self._record_ok(backend)
+            return body
+
+    async def stream(
+        self,
+        prompt: str,
+        model: Optional[str] = None,
+        **extra,
+    ) -> AsyncIterator[dict]:
+        """
+        OllamaClient.stream on the least loaded healthy backend. Fails over
+        only until the first chunk, so callers never see mixed output.
+        """
+        model = model or self.model
+        tried: Set[LLMBackend] = set()
+        last: Optional[LLMError] = None
+        while True:
+            backend = self._pick(model, tried)
+            if backend is None:
+                raise self._no_backend(model, last)
+            tried.add(backend)
+            backend.outstanding += 1
+            backend.requests += 1
+            yielded = recorded = False
+            try:
+                async for chunk in backend.client.stream(prompt, model=model, **extra):
+                    yielded = True
+                    if chunk.get("done") and not recorded:
+                        # callers usually stop at the done chunk, so this
+                        # generator may never resume past its yield
+                        self._record_ok(backend)
+                        recorded = True
+                    yield chunk
+            except LLMError as e:
+                self._record_error(backend, e)
+                if yielded:
+                    raise
+                last = e
+                continue
+            finally:
+                backend.outstanding -= 1
+            if not recorded:
+                self._record_ok(backend)
+            return
+
+    # ── health checks ────────────────────────────────────────
+
+    async def check_health(self) -> None:
+        """
+        Probe every backend once; a failed probe opens its circuit at once,
+        a successful one closes it and refreshes its model list.
+        """
+
+        async def probe(backend: LLMBackend):
+            try:
+                models = await backend.client.list_models()
+            except LLMError as e:
+                if backend.state == "closed":
+                    logger.warning("LLM backend %s failed its health check: %s", backend.url, e)
+                backend.failures = max(backend.failures + 1, backend.failure_threshold)
+                backend.open_until = time.monotonic() + backend.cooldown
+                return
+            backend.models = set(models)
+            backend.record_success()
+
+        await asyncio.gather(*(probe(b) for b in self.backends))
+
+    async def _health_loop(self) -> None:
+        while True:
+            try:
+                await self.check_health()
+            except Exception:
+                logger.exception("LLM health check failed")
+            await asyncio.sleep(self.health_interval)
+
+    def start(self) -> None:
+        """
+        Start the periodic health check; needs a running event loop.
+        """
+        if self.health_interval > 0 and self._health_task is None:
+            self._health_task = asyncio.get_running_loop().create_task(self._health_loop())
+
+    def stats(self) -> dict:
+        return {"model": self.model, "backends": [b.stats() for b in self.backends]}
+
+    async def aclose(self) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        for backend in self.backends:
+            await backend.client.aclose()
@@ -1,41 +1,78 @@
-import requests
+import asyncio
 import json
-import re
-from typing import List, Optional
+import logging
+import time
+from typing import AsyncIterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from pydantic import ValidationError
+
 from app.config import settings
+from app.schemas.recipe import GeneratedRecipe
+from app.services.cuisine_classifier import KNNCuisineClassifier
+from app.services.generation_cache import GenerationCache
+from app.services.llm_client import LLMError
+from app.services.llm_router import LLMRouter
+from app.services.search_engine import SearchEngineLoader
+from app.services.search_filters import SearchFilters
 from app.utils.allergen_utils import detect_allergens, ALLERGEN_SYNONYMS
 from app.utils.cuisine_utils import detect_cuisine
+from app.utils.json_stream import IncrementalObjectParser, repair_json_object
+from app.utils.metrics import RECIPE_PARSE, stage
 from app.utils.substitute import substitute_ingredients
+from app.utils.text_utils import clean_ingredients
+
+logger = logging.getLogger(__name__)
+
+RECIPE_FIELDS = list(GeneratedRecipe.model_fields)
+
 
-OLLAMA_URL = settings.OLLAMA_URL
-MODEL_NAME = settings.MODEL_NAME
+def _normalize_detected(detected) -> Optional[str]:
+    if isinstance(detected, list):
+        return detected[0] if detected else None
+    if isinstance(detected, str):
+        return detected if detected.lower() != "international" else None
+    return None
 
 
-def generate_recipe_from_ingredients(
+# The part of every recipe prompt that never changes. It goes first (as
+# Ollama's `system`, or at the top of the prompt), so while the model stays
+# loaded Ollama reuses its KV cache for it and only prefills the request's part.
+RECIPE_SYSTEM_PROMPT = (
+    "You are a world-renowned chef with over 20 years of experience. "
+    "You write complete, original recipes.\n"
+    "Respond with ONLY a single JSON object that begins with '{' and ends with '}', "
+    "without markdown fences (```), bullets, or extra text, in this shape:\n"
+    '{"title": string, "prep_time": string, "cook_time": string, "servings": string, '
+    '"ingredients": [list of strings], "instructions": [list of strings]}\n'
+)
+
+
+def format_examples(recipes: Sequence[dict], max_ingredients: int = 10) -> str:
+    """
+    Search hits as compact few-shot context: title and the first few
+    ingredients each, no instructions.
+    """
+    lines = []
+    for r in recipes:
+        items = [str(i)[:40] for i in (r.get("ingredients") or [])[:max_ingredients]]
+        lines.append(f"- {r.get('title', '')}: {', '.join(items)}")
+    return "\n".join(lines)
+
+
+def build_recipe_prompt(
     ingredients: List[str],
+    cuisine: Optional[str] = None,
     dietary_preference: Optional[str] = None,
     max_prep_time: Optional[int] = None,
     max_cook_time: Optional[int] = None,
     excluded_allergens: Optional[List[str]] = None,
-    preferred_cuisine: Optional[str] = None,
-) -> dict:
-    # 0) Substitute any excluded-allergen ingredients first
-    if excluded_allergens:
-        ingredients = substitute_ingredients(ingredients, excluded_allergens)
-
-    # 1) Decide cuisine
-    if preferred_cuisine:
-        cuisine = preferred_cuisine
-    else:
-        detected = detect_cuisine(ingredients)
-        if isinstance(detected, list):
-            cuisine = detected[0] if detected else None
-        elif isinstance(detected, str):
-            cuisine = detected if detected.lower() != "international" else None
-        else:
-            cuisine = None
-
-    # 2) Build human-readable constraints
+    examples: Optional[Sequence[dict]] = None,
+) -> str:
+    """
+    The per-request part of a recipe prompt; RECIPE_SYSTEM_PROMPT comes
+    before it. examples are similar recipes from the search index.
+    """
+    # Build human-readable constraints
     constraints: List[str] = []
     if cuisine:
         constraints.append(f"Please style the recipe in {cuisine} cuisine.")
@@ -55,73 +92,534 @@ def generate_recipe_from_ingredients(
             + "; ".join(parts)
         )
 
-    constraint_text = "\n".join(constraints)
-
-    # 3) Craft the JSON‑only prompt (no fences, no bullets)
-    prompt = (
-        "You are a world-renowned chef with over 20 years of experience.\n"
-        "Using only these ingredients: "
-        f"{', '.join(ingredients)}, create a complete, original recipe.\n"
-        f"{constraint_text}\n\n"
-        "Respond with ONLY a single JSON object that begins with '{' and ends with '}'.\n"
-        "Do NOT include any markdown fences (```), bullets, or extra text.\n\n"
-        "The JSON schema:\n"
-        "{\n"
-        '  "title": string,\n'
-        '  "prep_time": string,\n'
-        '  "cook_time": string,\n'
-        '  "servings": string,\n'
-        '  "ingredients": [list of strings],\n'
-        '  "instructions": [list of strings]\n'
-        "}\n"
+    parts = []
+    if examples:
+        parts.append(
+            "Similar recipes, for reference only (do not copy them):\n"
+            + format_examples(examples)
+        )
+    parts.append(
+        f"Using only these ingredients: {', '.join(ingredients)}, "
+        "create a complete, original recipe."
     )
+    parts.extend(constraints)
+    return "\n".join(parts) + "\n"
+
+
+def prompt_request(prompt: str) -> Tuple[str, dict]:
+    """
+    The prompt to send and the extra Ollama fields carrying the static
+    prefix, per LLM_PROMPT_MODE: "system" sends RECIPE_SYSTEM_PROMPT as
+    `system`, "inline" puts it at the top of the prompt (for models whose
+    template drops the system message).
+    """
+    if settings.LLM_PROMPT_MODE == "system":
+        return prompt, {"system": RECIPE_SYSTEM_PROMPT}
+    return f"{RECIPE_SYSTEM_PROMPT}\n{prompt}", {}
+
+
+def _cache_text(prompt: str) -> str:
+    # cache keys include the static prefix, so changing it does not serve
+    # answers written for the old one
+    return f"{RECIPE_SYSTEM_PROMPT}\n{prompt}"
+
+
+def output_format(fields: Optional[Sequence[str]] = None):
+    """
+    Ollama `format` value for a recipe, or for only these fields of one,
+    per LLM_OUTPUT_FORMAT; None sends no format.
+    """
+    if settings.LLM_OUTPUT_FORMAT == "json":
+        return "json"
+    if settings.LLM_OUTPUT_FORMAT != "schema":
+        return None
+    schema = GeneratedRecipe.model_json_schema()
+    schema.pop("description", None)  # the class docstring, not meant for the model
+    if fields is not None:
+        properties = schema["properties"]
+        schema = {
+            **schema,
+            "properties": {f: properties[f] for f in fields},
+            "required": list(fields),
+        }
+    return schema
 
-    # 4) Call the model
-    resp = requests.post(
-        OLLAMA_URL,
-        json={"model": MODEL_NAME, "prompt": prompt, "stream": False},
-        timeout=30,
+
+def build_field_retry_prompt(prompt: str, partial: dict, fields: List[str]) -> str:
+    """
+    Follow-up prompt asking only for the fields of a recipe that were
+    missing or invalid, keeping the valid part as context.
+    """
+    return (
+        f"{prompt}\n"
+        "Part of this recipe has already been written:\n"
+        f"{json.dumps(partial, ensure_ascii=False)}\n\n"
+        "Respond with ONLY a JSON object containing the remaining fields "
+        f"({', '.join(fields)}), consistent with the part above.\n"
     )
-    raw: str = resp.json().get("response", "")
 
-    # ——— Sanitize raw output —————————————————————————————
+
+def sanitize_llm_output(raw: str) -> str:
     raw = raw.strip()
 
-    # 4a) If it’s wrapped in code fences, drop them
+    # If it’s wrapped in code fences, drop them
     if raw.startswith("```") and raw.endswith("```"):
         lines = raw.splitlines()
         raw = "\n".join(lines[1:-1]).strip()
 
-    # 4b) Unwrap any surrounding quotes and decode escaped chars
+    # The whole object sent as one quoted string: decode it as a JSON string,
+    # which handles \n and \" and leaves non-ASCII text intact
     if raw.startswith('"') and raw.endswith('"'):
-        raw = raw[1:-1].replace('\\"', '"')
-    # Decode literal \n, \t, etc.
-    raw = raw.encode("utf-8").decode("unicode_escape")
+        try:
+            decoded = json.loads(raw)
+        except ValueError:
+            decoded = None
+        if isinstance(decoded, str):
+            raw = decoded.strip()
+    return raw
+
 
-    # 4c) Remove any leading bullet markers ("- ") per line
-    raw = re.sub(r"^\s*-\s*", "", raw, flags=re.MULTILINE)
+class ParsedRecipe(NamedTuple):
+    recipe: dict  # fields that are present and valid
+    invalid: List[str]  # fields missing or failing GeneratedRecipe validation
+    repaired: bool  # needed repair_json_object
+    error: Optional[str]
 
-    # ——— Parse JSON ——————————————————————————————————————
+
+def _validate(data: dict, repaired: bool) -> ParsedRecipe:
     try:
-        parsed = json.loads(raw)
-    except json.JSONDecodeError as e:
-        return {
-            "error": "Failed to parse LLM JSON output.",
-            "parse_error": str(e),
-            "sanitized_raw": raw,  # expose sanitized for debugging
-        }
+        recipe = GeneratedRecipe.model_validate(data).model_dump()
+    except ValidationError as e:
+        invalid = {err["loc"][0] for err in e.errors() if err["loc"]}
+        fields = [f for f in RECIPE_FIELDS if f in invalid]
+        valid = {f: data[f] for f in RECIPE_FIELDS if f in data and f not in invalid}
+        return ParsedRecipe(valid, fields, repaired, f"invalid fields: {', '.join(fields)}")
+    return ParsedRecipe(recipe, [], repaired, None)
+
+
+def parse_recipe(raw: str) -> ParsedRecipe:
+    """
+    Parse model output into a recipe: strict JSON first, then the tolerant
+    repair parser, then validation of each field.
+    """
+    text = sanitize_llm_output(raw)
+    try:
+        data = json.loads(text)
+        if not isinstance(data, dict):
+            raise ValueError("output is not a JSON object")
+        repaired = False
+    except ValueError as e:
+        data = repair_json_object(text)
+        if data is None:
+            return ParsedRecipe({}, list(RECIPE_FIELDS), False, str(e))
+        repaired = True
+    return _validate(data, repaired)
 
-    # 5) Post‑generation allergen check
+
+def check_recipe(
+    recipe: dict, excluded_allergens: Optional[List[str]], cuisine: Optional[str]
+) -> dict:
+    """
+    Post-generation checks on a parsed recipe. Returns the API response body.
+    """
+    # Post‑generation allergen check
     if excluded_allergens:
-        found = detect_allergens(parsed.get("ingredients", []), excluded_allergens)
+        found = detect_allergens(recipe.get("ingredients", []), excluded_allergens)
         if found:
             return {
                 "error": f" Recipe contains excluded allergens: {', '.join(found)}",
-                "recipe": parsed,
+                "recipe": recipe,
             }
 
-    # 6) Attach cuisine if we have one
+    # Attach cuisine if we have one
     if cuisine:
-        parsed["cuisine"] = cuisine
+        recipe["cuisine"] = cuisine
+
+    return {"recipe": recipe}
+
+
+class RecipeGenerator:
+    """
+    Recipe generation for one app: owns no resources itself, but ties the
+    LLM router, the generation cache and the search engine (for the local
+    cuisine classifier) together.
+    """
+
+    def __init__(
+        self,
+        llm: LLMRouter,
+        cache: GenerationCache,
+        search: Optional[SearchEngineLoader] = None,
+        model: str = settings.MODEL_NAME,
+    ):
+        self.llm = llm
+        self.cache = cache
+        self.search = search
+        self.model = model
+        self._classifier: Optional[KNNCuisineClassifier] = None
+        # what happened to each generation's output, see parse_stats()
+        self.parse_counts = dict.fromkeys(
+            ("outputs", "clean", "repaired", "field_retries", "recovered", "failed"), 0
+        )
+        # prompt tokens Ollama actually evaluated (those past its cached
+        # prefix) and the time it took, over all recipe calls
+        self.prefill = {"calls": 0, "prompt_eval_count": 0, "prompt_eval_s": 0.0}
+
+    def local_classifier(self) -> Optional[KNNCuisineClassifier]:
+        """
+        The k-NN classifier for the loaded search engine, or None while the
+        engine is still loading or when recipes.csv has no cuisine labels.
+        """
+        if self.search is None or not self.search.ready:
+            return None
+        engine = self.search.get()
+        if not engine.store.has_cuisine:
+            return None
+        if self._classifier is None or self._classifier.engine is not engine:
+            self._classifier = KNNCuisineClassifier(engine)
+        return self._classifier
+
+    async def choose_cuisine(
+        self, ingredients: List[str], preferred_cuisine: Optional[str]
+    ) -> Optional[str]:
+        """
+        Use the preferred cuisine if given. Otherwise ask the local k-NN
+        classifier, falling back to the LLM detector when its vote is not
+        confident enough (or the search engine isn't loaded). The LLM call is
+        hedged: it starts once the vote comes back unsure, or after
+        CUISINE_LLM_HEDGE_MS if the vote is still running, and is cancelled
+        if that vote then turns out confident.
+        """
+        if preferred_cuisine:
+            return preferred_cuisine
+
+        classifier = self.local_classifier()
+        if classifier is None:
+            return _normalize_detected(await detect_cuisine(ingredients, self.llm))
+
+        local_task = asyncio.create_task(classifier.apredict(ingredients))
+        llm_task = None
+        try:
+            if settings.CUISINE_LLM_FALLBACK:
+                done, _ = await asyncio.wait(
+                    {local_task}, timeout=settings.CUISINE_LLM_HEDGE_MS / 1000
+                )
+                if not done:
+                    llm_task = asyncio.create_task(detect_cuisine(ingredients, self.llm))
+            local = await local_task
+            if not settings.CUISINE_LLM_FALLBACK or (
+                local.cuisine and local.confidence >= settings.CUISINE_MIN_CONFIDENCE
+            ):
+                return _normalize_detected(local.cuisine)
+
+            if llm_task is None:
+                llm_task = asyncio.create_task(detect_cuisine(ingredients, self.llm))
+            detected = _normalize_detected(await llm_task)
+            # the LLM had nothing better; a low-confidence local guess beats none
+            return detected or _normalize_detected(local.cuisine)
+        finally:
+            # a confident vote (or a cancelled request) leaves nothing to wait for
+            for task in (local_task, llm_task):
+                if task is not None and not task.done():
+                    task.cancel()
+
+    def _request(
+        self, prompt: str, fields: Optional[Sequence[str]] = None
+    ) -> Tuple[str, dict]:
+        prompt, extra = prompt_request(prompt)
+        fmt = output_format(fields)
+        if fmt is not None:
+            extra["format"] = fmt
+        return prompt, extra
+
+    def _record_prefill(self, body: dict) -> None:
+        self.prefill["calls"] += 1
+        self.prefill["prompt_eval_count"] += body.get("prompt_eval_count") or 0
+        self.prefill["prompt_eval_s"] += (body.get("prompt_eval_duration") or 0) / 1e9
+
+    def prefill_stats(self) -> dict:
+        calls = self.prefill["calls"]
+        return {
+            **self.prefill,
+            "mean_prompt_eval_count": self.prefill["prompt_eval_count"] / calls if calls else 0.0,
+            "mean_prompt_eval_ms": 1000 * self.prefill["prompt_eval_s"] / calls if calls else 0.0,
+        }
+
+    async def grounding_examples(
+        self,
+        ingredients: List[str],
+        excluded_allergens: Optional[List[str]],
+        max_prep_time: Optional[int],
+        max_cook_time: Optional[int],
+    ) -> List[dict]:
+        """
+        The top LLM_GROUNDING_EXAMPLES search hits for these ingredients,
+        within the request's constraints; empty when disabled or while the
+        search engine is loading.
+        """
+        k = settings.LLM_GROUNDING_EXAMPLES
+        if k <= 0 or self.search is None or not self.search.ready:
+            return []
+        try:
+            filters = SearchFilters.create(excluded_allergens, max_prep_time, max_cook_time)
+        except ValueError:
+            filters = None  # unknown allergen category; the prompt still excludes it
+        try:
+            return await self.search.get().aretrieve(
+                clean_ingredients(ingredients), top_k=k, filters=filters
+            )
+        except Exception:
+            logger.exception("Grounding search failed; generating without examples")
+            return []
+
+    async def _retry_fields(self, prompt: str, parsed: ParsedRecipe) -> ParsedRecipe:
+        self._count("field_retries")
+        retry_prompt, extra = self._request(
+            build_field_retry_prompt(prompt, parsed.recipe, parsed.invalid), parsed.invalid
+        )
+        try:
+            with stage("llm_field_retry"):
+                body = await self.llm.generate(retry_prompt, model=self.model, **extra)
+        except LLMError:
+            return parsed
+        text = sanitize_llm_output(body.get("response", ""))
+        extra = repair_json_object(text) or {}
+        merged = {**parsed.recipe, **{f: extra[f] for f in parsed.invalid if f in extra}}
+        return _validate(merged, parsed.repaired)
+
+    async def complete(
+        self,
+        raw: str,
+        prompt: str,
+        excluded_allergens: Optional[List[str]],
+        cuisine: Optional[str],
+    ) -> dict:
+        """
+        Parse a full model output into the API response body. Fields that are
+        missing or invalid (typically a truncated or malformed tail) are asked
+        for again on their own, instead of throwing the generation away.
+        """
+        with stage("parse"):
+            parsed = parse_recipe(raw)
+        self._count("outputs")
+        if parsed.repaired:
+            self._count("repaired")
+        elif not parsed.invalid:
+            self._count("clean")
+
+        incomplete = bool(parsed.invalid)
+        for _ in range(settings.LLM_FIELD_RETRIES):
+            if not parsed.invalid:
+                break
+            parsed = await self._retry_fields(prompt, parsed)
+        if parsed.invalid:
+            self._count("failed")
+            return {
+                "error": "Failed to parse LLM JSON output.",
+                "parse_error": parsed.error,
+                "invalid_fields": parsed.invalid,
+                "recipe": parsed.recipe,
+                "sanitized_raw": sanitize_llm_output(raw),  # expose for debugging
+            }
+        if incomplete:
+            self._count("recovered")
+        return check_recipe(parsed.recipe, excluded_allergens, cuisine)
+
+    def _count(self, outcome: str) -> None:
+        self.parse_counts[outcome] += 1
+        RECIPE_PARSE.inc(outcome=outcome)
+
+    def parse_stats(self) -> dict:
+        counts = dict(self.parse_counts)
+        outputs = counts["outputs"]
+        counts["failure_rate"] = counts["failed"] / outputs if outputs else 0.0
+        counts["repair_rate"] = counts["repaired"] / outputs if outputs else 0.0
+        return counts
+
+    def _cache_keys(
+        self,
+        ingredients: List[str],
+        dietary_preference: Optional[str],
+        max_prep_time: Optional[int],
+        max_cook_time: Optional[int],
+        excluded_allergens: Optional[List[str]],
+        preferred_cuisine: Optional[str],
+    ):
+        """
+        Cache key and near-duplicate signature for a request, built from its
+        inputs alone: the detected cuisine and the grounding examples follow
+        from these, so a cache hit never waits on (or varies with) detection.
+        """
+        request = dict(
+            cuisine=preferred_cuisine,
+            dietary_preference=dietary_preference,
+            max_prep_time=max_prep_time,
+            max_cook_time=max_cook_time,
+            excluded_allergens=excluded_allergens,
+        )
+        key = _cache_text(build_recipe_prompt(ingredients, **request))
+        # the same minus the ingredients: near-duplicate entries must match it
+        signature = _cache_text(build_recipe_prompt(["<ingredients>"], **request))
+        return key, signature
+
+    async def _prepare(
+        self,
+        ingredients: List[str],
+        dietary_preference: Optional[str],
+        max_prep_time: Optional[int],
+        max_cook_time: Optional[int],
+        excluded_allergens: Optional[List[str]],
+        preferred_cuisine: Optional[str],
+    ):
+        # 1) Decide cuisine
+        with stage("detect_cuisine"):
+            cuisine = await self.choose_cuisine(ingredients, preferred_cuisine)
+
+        # 2) Similar recipes as few-shot context (LLM_GROUNDING_EXAMPLES)
+        with stage("grounding"):
+            examples = await self.grounding_examples(
+                ingredients, excluded_allergens, max_prep_time, max_cook_time
+            )
+
+        # 3) Constraints and the JSON-only prompt
+        prompt = build_recipe_prompt(
+            ingredients,
+            cuisine=cuisine,
+            dietary_preference=dietary_preference,
+            max_prep_time=max_prep_time,
+            max_cook_time=max_cook_time,
+            excluded_allergens=excluded_allergens,
+            examples=examples,
+        )
+        return prompt, cuisine
+
+    async def generate(
+        self,
+        ingredients: List[str],
+        dietary_preference: Optional[str] = None,
+        max_prep_time: Optional[int] = None,
+        max_cook_time: Optional[int] = None,
+        excluded_allergens: Optional[List[str]] = None,
+        preferred_cuisine: Optional[str] = None,
+    ) -> dict:
+        # 0) Substitute any excluded-allergen ingredients first
+        if excluded_allergens:
+            with stage("substitute"):
+                ingredients = substitute_ingredients(ingredients, excluded_allergens)
+        request = (
+            ingredients,
+            dietary_preference,
+            max_prep_time,
+            max_cook_time,
+            excluded_allergens,
+            preferred_cuisine,
+        )
+        key, signature = self._cache_keys(*request)
+
+        async def produce() -> dict:
+            prompt, cuisine = await self._prepare(*request)
+
+            # 4) Call the model
+            request_prompt, extra = self._request(prompt)
+            try:
+                with stage("llm"):
+                    body = await self.llm.generate(request_prompt, model=self.model, **extra)
+            except LLMError as e:
+                return {"error": f"LLM request failed: {e}"}
+            self._record_prefill(body)
+            raw: str = body.get("response", "")
+
+            # 5–6) Parse (retrying failed fields), allergen check, attach cuisine
+            return await self.complete(raw, prompt, excluded_allergens, cuisine)
+
+        # identical (or near-identical) requests are served from the cache, and
+        # concurrent ones share a single LLM call
+        return await self.cache.get_or_generate(
+            self.model, key, signature, ingredients, produce
+        )
+
+    async def stream(
+        self,
+        ingredients: List[str],
+        dietary_preference: Optional[str] = None,
+        max_prep_time: Optional[int] = None,
+        max_cook_time: Optional[int] = None,
+        excluded_allergens: Optional[List[str]] = None,
+        preferred_cuisine: Optional[str] = None,
+    ) -> AsyncIterator[dict]:
+        """
+        Streaming variant of generate. Yields events:
+
+            {"event": "start", "cuisine": ...}
+            {"event": "field", "name": "title", "value": ...}   per top-level field as it
+                                                                 completes, and again if
+                                                                 repair or a retry changed it
+            {"event": "done", "result": {...}, "metrics": {...}} same body as the
+                                                                 non-streaming route
+            {"event": "error", "error": ...}                     if the LLM call fails
+        """
+        started = time.perf_counter()
+        if excluded_allergens:
+            with stage("substitute"):
+                ingredients = substitute_ingredients(ingredients, excluded_allergens)
+        request = (
+            ingredients,
+            dietary_preference,
+            max_prep_time,
+            max_cook_time,
+            excluded_allergens,
+            preferred_cuisine,
+        )
+        key, signature = self._cache_keys(*request)
+
+        cached = await self.cache.lookup(self.model, key, signature, ingredients)
+        if cached is not None:
+            yield {"event": "start", "cuisine": cached.get("recipe", {}).get("cuisine")}
+            for name, value in cached.get("recipe", {}).items():
+                yield {"event": "field", "name": name, "value": value}
+            yield {
+                "event": "done",
+                "result": cached,
+                "metrics": {"cached": True, "total_ms": 1000 * (time.perf_counter() - started)},
+            }
+            return
+
+        prompt, cuisine = await self._prepare(*request)
+        yield {"event": "start", "cuisine": cuisine}
+
+        parser = IncrementalObjectParser()
+        sent: dict = {}  # field name -> value streamed to the client
+        metrics: dict = {}
+        request_prompt, extra = self._request(prompt)
+        request_sent = time.perf_counter()
+        try:
+            with stage("llm"):
+                async for chunk in self.llm.stream(request_prompt, model=self.model, **extra):
+                    token = chunk.get("response", "")
+                    if token and "ttft_ms" not in metrics:
+                        metrics["ttft_ms"] = 1000 * (time.perf_counter() - request_sent)
+                    for name, value in parser.feed(token):
+                        sent[name] = value
+                        yield {"event": "field", "name": name, "value": value}
+                    if chunk.get("done"):
+                        self._record_prefill(chunk)
+                        metrics["eval_count"] = chunk.get("eval_count")
+                        metrics["prompt_eval_count"] = chunk.get("prompt_eval_count")
+                        metrics["prompt_eval_ms"] = (
+                            chunk.get("prompt_eval_duration") or 0
+                        ) / 1e6
+                        break
+        except LLMError as e:
+            yield {"event": "error", "error": f"LLM request failed: {e}"}
+            return
 
-    return {"recipe": parsed}
+        result = await self.complete(parser.text, prompt, excluded_allergens, cuisine)
+        # fields that only parsed, or changed, after repair or a retry; the
+        # client replaces what it was sent, so the stream ends on the final recipe
+        for name, value in result.get("recipe", {}).items():
+            if name != "cuisine" and (name not in sent or sent[name] != value):
+                yield {"event": "field", "name": name, "value": value}
+        metrics["prepare_ms"] = 1000 * (request_sent - started)
+        metrics["total_ms"] = 1000 * (time.perf_counter() - started)
+        await self.cache.store(self.model, key, signature, ingredients, result)
+        yield {"event": "done", "result": result, "metrics": metrics}
@@ -0,0 +1,320 @@
+"""
+Compact, column-oriented storage for the recipe corpus.
+
+Instead of a DataFrame whose ingredients / instructions columns are object
+dtype holding Python lists, every text column is one contiguous UTF-8 buffer
+plus an int64 offsets array (Arrow's string layout); list columns add a
+second offsets level mapping each row to its range of items. Search hits are
+gathered by row id straight into response dicts, and the arrays are saved as
+.npy files next to the FAISS index so they load with mmap as well.
+
+Each row also gets an allergen bitmask (one bit per ALLERGEN_SYNONYMS
+category found in its ingredients), used by filtered search.
+"""
+import ast
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.index_store import IndexMismatchError
+from app.utils.allergen_utils import (
+    ALLERGEN_BITS,
+    allergen_matcher,
+    synonyms_fingerprint,
+)
+
+logger = logging.getLogger(__name__)
+
+STORE_DIR = "store"
+ALLERGEN_MASKS_FILE = "allergen_masks.npy"
+ALLERGEN_INFO_FILE = "allergens.json"
+# items scanned per regex pass when computing allergen masks
+_MASK_CHUNK = 20000
+
+# public response field -> CSV column it is read from
+NUMERIC_FIELDS: Dict[str, str] = {
+    "prep_time": "predicted_prep_time_rounded",
+    "cook_time": "predicted_cook_time_rounded",
+    "servings": "estimated_servings",
+}
+
+
+def parse_list_value(value) -> List[str]:
+    """
+    Parse a stringified Python list from the CSV ("['a', 'b']").
+    Unparseable strings become a one-item list, missing values an empty one.
+    """
+    if isinstance(value, str):
+        try:
+            parsed = ast.literal_eval(value)
+        except (ValueError, SyntaxError):
+            return [value]
+        if isinstance(parsed, (list, tuple)):
+            return [str(v) for v in parsed]
+        return [str(parsed)]
+    if isinstance(value, list):
+        return value
+    return []
+
+
+class StringColumn:
+    """
+    n strings stored as one UTF-8 byte buffer and n+1 offsets into it.
+    """
+
+    def __init__(self, data: np.ndarray, offsets: np.ndarray):
+        self.data = data
+        self.offsets = offsets
+
+    @classmethod
+    def from_strings(cls, values: Iterable[str]) -> "StringColumn":
+        encoded = [v.encode("utf-8") for v in values]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        data = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+        return cls(data, offsets)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        return self.data[self.offsets[i] : self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def slice(self, start: int, stop: int) -> List[str]:
+        """
+        Decode strings start..stop-1 with a single buffer copy.
+        """
+        offs = self.offsets[start : stop + 1]
+        if len(offs) < 2:
+            return []
+        raw = self.data[offs[0] : offs[-1]].tobytes()
+        rel = (offs - offs[0]).tolist()
+        return [raw[a:b].decode("utf-8") for a, b in zip(rel, rel[1:])]
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes + self.offsets.nbytes
+
+    def save(self, prefix: str) -> None:
+        np.save(f"{prefix}.data.npy", self.data)
+        np.save(f"{prefix}.offsets.npy", self.offsets)
+
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> "StringColumn":
+        mode = "r" if mmap else None
+        return cls(
+            np.load(f"{prefix}.data.npy", mmap_mode=mode),
+            np.load(f"{prefix}.offsets.npy", mmap_mode=mode),
+        )
+
+
+class ListColumn:
+    """
+    n lists of strings: the items of all rows in one StringColumn plus n+1
+    row offsets into the item sequence.
+    """
+
+    def __init__(self, items: StringColumn, row_offsets: np.ndarray):
+        self.items = items
+        self.row_offsets = row_offsets
+
+    @classmethod
+    def from_lists(cls, values: Iterable[List[str]]) -> "ListColumn":
+        values = list(values)
+        row_offsets = np.zeros(len(values) + 1, dtype=np.int64)
+        np.cumsum([len(v) for v in values], out=row_offsets[1:])
+        items = StringColumn.from_strings(s for row in values for s in row)
+        return cls(items, row_offsets)
+
+    def __len__(self) -> int:
+        return len(self.row_offsets) - 1
+
+    def __getitem__(self, i: int) -> List[str]:
+        return self.items.slice(int(self.row_offsets[i]), int(self.row_offsets[i + 1]))
+
+    @property
+    def nbytes(self) -> int:
+        return self.items.nbytes + self.row_offsets.nbytes
+
+    def save(self, prefix: str) -> None:
+        self.items.save(prefix)
+        np.save(f"{prefix}.rows.npy", self.row_offsets)
+
+    @classmethod
+    def load(cls, prefix: str, mmap: bool = True) -> "ListColumn":
+        return cls(
+            StringColumn.load(prefix, mmap),
+            np.load(f"{prefix}.rows.npy", mmap_mode="r" if mmap else None),
+        )
+
+
+def compute_allergen_masks(ingredients: ListColumn) -> np.ndarray:
+    """
+    Per-row OR of the ALLERGEN_BITS of every category matched in that row's
+    ingredients, scanning all items in a few large regex passes.
+    """
+    n_items = len(ingredients.items)
+    item_masks = np.zeros(n_items + 1, dtype=np.uint32)  # +1: pad for reduceat
+    for start in range(0, n_items, _MASK_CHUNK):
+        texts = ingredients.items.slice(start, min(start + _MASK_CHUNK, n_items))
+        for offset, matches in enumerate(allergen_matcher.scan(texts)):
+            bits = 0
+            for m in matches:
+                bits |= ALLERGEN_BITS[m.category]
+            item_masks[start + offset] = bits
+
+    starts = ingredients.row_offsets[:-1]
+    masks = np.bitwise_or.reduceat(item_masks, starts) if len(starts) else item_masks[:0]
+    # reduceat yields item_masks[start] for empty rows; they have no allergens
+    masks[np.diff(ingredients.row_offsets) == 0] = 0
+    return masks
+
+
+class RecipeStore:
+    def __init__(
+        self,
+        titles: StringColumn,
+        ingredients: ListColumn,
+        instructions: ListColumn,
+        numeric: Dict[str, Optional[np.ndarray]],
+        cuisine_labels: Optional[List[str]] = None,
+        cuisine_codes: Optional[np.ndarray] = None,
+        allergen_masks: Optional[np.ndarray] = None,
+    ):
+        self.titles = titles
+        self.ingredients = ingredients
+        self.instructions = instructions
+        # None for fields the CSV doesn't have; those come back as None
+        self.numeric = {f: numeric.get(f) for f in NUMERIC_FIELDS}
+        # labelled cuisine per row as codes into cuisine_labels (-1 = unknown);
+        # internal, used by the local cuisine classifier, not returned by gather
+        self.cuisine_labels = cuisine_labels or []
+        self.cuisine_codes = cuisine_codes
+        # ALLERGEN_BITS per row; internal, used by filtered search
+        self.allergen_masks = (
+            allergen_masks if allergen_masks is not None else compute_allergen_masks(ingredients)
+        )
+
+    @property
+    def has_cuisine(self) -> bool:
+        return self.cuisine_codes is not None and len(self.cuisine_labels) > 0
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RecipeStore":
+        titles = StringColumn.from_strings(
+            "" if pd.isna(t) else str(t) for t in df["title"]
+        )
+        ingredients = ListColumn.from_lists(df["ingredients"].map(parse_list_value))
+        instructions = ListColumn.from_lists(df["instructions"].map(parse_list_value))
+        numeric = {
+            field: pd.to_numeric(df[col], errors="coerce").to_numpy()
+            if col in df.columns
+            else None
+            for field, col in NUMERIC_FIELDS.items()
+        }
+        labels, codes = None, None
+        if settings.CUISINE_COLUMN in df.columns:
+            cuisines = df[settings.CUISINE_COLUMN].map(
+                lambda c: c.strip() if isinstance(c, str) and c.strip() else None
+            )
+            cat = pd.Categorical(cuisines)
+            labels = [str(c) for c in cat.categories]
+            codes = cat.codes.astype(np.int16)
+        return cls(titles, ingredients, instructions, numeric, labels, codes)
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    @property
+    def nbytes(self) -> int:
+        total = self.titles.nbytes + self.ingredients.nbytes + self.instructions.nbytes
+        total += self.allergen_masks.nbytes
+        return total + sum(a.nbytes for a in self.numeric.values() if a is not None)
+
+    def gather(self, ids: Sequence[int]) -> List[dict]:
+        """
+        Build response dicts for these row ids, with exactly the six public
+        fields, without materializing any intermediate frame.
+        """
+        rows = []
+        for i in ids:
+            i = int(i)
+            row = {
+                "title": self.titles[i],
+                "ingredients": self.ingredients[i],
+                "instructions": self.instructions[i],
+            }
+            for field, values in self.numeric.items():
+                row[field] = None if values is None else _scalar(values[i])
+            rows.append(row)
+        return rows
+
+    def save(self, index_dir: str) -> None:
+        root = os.path.join(index_dir, STORE_DIR)
+        os.makedirs(root, exist_ok=True)
+        for name in os.listdir(root):
+            os.remove(os.path.join(root, name))
+        self.titles.save(os.path.join(root, "title"))
+        self.ingredients.save(os.path.join(root, "ingredients"))
+        self.instructions.save(os.path.join(root, "instructions"))
+        for field, values in self.numeric.items():
+            if values is not None:
+                np.save(os.path.join(root, f"{field}.npy"), values)
+        if self.has_cuisine:
+            StringColumn.from_strings(self.cuisine_labels).save(
+                os.path.join(root, "cuisine_labels")
+            )
+            np.save(os.path.join(root, "cuisine_codes.npy"), self.cuisine_codes)
+        np.save(os.path.join(root, ALLERGEN_MASKS_FILE), self.allergen_masks)
+        with open(os.path.join(root, ALLERGEN_INFO_FILE), "w", encoding="utf-8") as f:
+            json.dump({"synonyms_sha256": synonyms_fingerprint()}, f)
+
+    @classmethod
+    def load(cls, index_dir: str, mmap: bool = True) -> "RecipeStore":
+        root = os.path.join(index_dir, STORE_DIR)
+        try:
+            titles = StringColumn.load(os.path.join(root, "title"), mmap)
+            ingredients = ListColumn.load(os.path.join(root, "ingredients"), mmap)
+            instructions = ListColumn.load(os.path.join(root, "instructions"), mmap)
+        except (OSError, ValueError) as e:
+            raise IndexMismatchError(f"unreadable recipe store: {e}") from e
+        numeric = {}
+        for field in NUMERIC_FIELDS:
+            path = os.path.join(root, f"{field}.npy")
+            if os.path.exists(path):
+                numeric[field] = np.load(path, mmap_mode="r" if mmap else None)
+        labels, codes = None, None
+        codes_path = os.path.join(root, "cuisine_codes.npy")
+        if os.path.exists(codes_path):
+            label_column = StringColumn.load(os.path.join(root, "cuisine_labels"), mmap=False)
+            labels = label_column.slice(0, len(label_column))
+            codes = np.load(codes_path, mmap_mode="r" if mmap else None)
+        masks = _load_allergen_masks(root, mmap)
+        return cls(titles, ingredients, instructions, numeric, labels, codes, masks)
+
+
+def _load_allergen_masks(root: str, mmap: bool) -> Optional[np.ndarray]:
+    """
+    Stored masks, or None (recompute) if they were made with other synonyms.
+    """
+    try:
+        with open(os.path.join(root, ALLERGEN_INFO_FILE), "r", encoding="utf-8") as f:
+            info = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if info.get("synonyms_sha256") != synonyms_fingerprint():
+        logger.info("ALLERGEN_SYNONYMS changed; recomputing allergen masks")
+        return None
+    return np.load(os.path.join(root, ALLERGEN_MASKS_FILE), mmap_mode="r" if mmap else None)
+
+
+def _scalar(value):
+    value = value.item() if hasattr(value, "item") else value
+    if isinstance(value, float) and value != value:  # NaN -> JSON null
+        return None
+    return value
@@ -0,0 +1,112 @@
+"""
+Background loader for the RecipeVectorIndex.
+
+Loading the embedding model and the index can take a long time, so the
+engine is built on a worker thread started from the FastAPI lifespan hook.
+The API serves /parse-ingredients and /recipes/generate immediately while
+/recipes/search answers 503 until the engine is ready.
+
+With PRELOAD_SEARCH_ENGINE the engine is instead built once at import time
+in the gunicorn --preload master (see app/main.py) and handed to every
+forked worker's loader with SearchEngineLoader.from_engine, so the model
+weights and the read-only index are shared copy-on-write.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+
+from app.config import settings
+from app.services.vector_index import RecipeVectorIndex
+
+logger = logging.getLogger(__name__)
+
+
+class EngineNotReady(Exception):
+    pass
+
+
+class SearchEngineLoader:
+    def __init__(self):
+        self.state = "pending"  # pending -> loading -> ready | failed
+        self.error: Optional[str] = None
+        self.load_seconds: Optional[float] = None
+        self._engine: Optional[RecipeVectorIndex] = None
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_engine(
+        cls, engine: RecipeVectorIndex, load_seconds: float
+    ) -> "SearchEngineLoader":
+        """
+        A loader that is ready at once with an engine built elsewhere.
+        """
+        loader = cls()
+        loader._engine = engine
+        loader.load_seconds = load_seconds
+        loader.state = "ready"
+        return loader
+
+    def start(self) -> None:
+        if self.state == "ready":
+            return
+        if self._thread is not None:
+            return
+        self.state = "loading"
+        self._thread = threading.Thread(
+            target=self._load, name="search-engine-loader", daemon=True
+        )
+        self._thread.start()
+
+    def _load(self) -> None:
+        t0 = time.perf_counter()
+        try:
+            engine = RecipeVectorIndex()
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            self.state = "failed"
+            logger.exception("Search engine failed to load")
+            return
+        self.load_seconds = time.perf_counter() - t0
+        self._engine = engine
+        self.state = "ready"
+        breakdown = ", ".join(f"{k}={v:.2f}s" for k, v in engine.timings.items())
+        logger.info(
+            "Search engine ready in %.2fs (%s)", self.load_seconds, breakdown
+        )
+
+    @property
+    def ready(self) -> bool:
+        return self.state == "ready"
+
+    def get(self) -> RecipeVectorIndex:
+        if self._engine is None:
+            raise EngineNotReady(self.error or f"search engine is {self.state}")
+        return self._engine
+
+    def status(self) -> dict:
+        return {
+            "state": self.state,
+            "error": self.error,
+            "load_seconds": self.load_seconds,
+            "phases": dict(self._engine.timings) if self._engine else {},
+        }
+
+    def close(self) -> None:
+        if self._engine is not None:
+            self._engine.embedder.close(timeout=5)
+
+
+def preload_engine() -> Optional[SearchEngineLoader]:
+    """
+    Build the engine synchronously when PRELOAD_SEARCH_ENGINE is set, for
+    gunicorn --preload: the master imports the app, so the engine is loaded
+    once and every forked worker starts with it ready.
+    """
+    if not settings.PRELOAD_SEARCH_ENGINE:
+        return None
+    t0 = time.perf_counter()
+    engine = RecipeVectorIndex()
+    load_seconds = time.perf_counter() - t0
+    logger.info("Search engine preloaded in %.2fs", load_seconds)
+    return SearchEngineLoader.from_engine(engine, load_seconds)
@@ -0,0 +1,112 @@
+"""
+Constraint filters for recipe search: excluded allergens, max prep / cook
+time and cuisine.
+
+Base recipes are filtered with a boolean row mask computed from the recipe
+store's precomputed columns (allergen bitmasks, numeric times, cuisine
+codes) in a few vectorized numpy operations; recipes in the index delta are
+checked one by one with recipe_passes(), using the cuisine they were
+ingested with. Rows with an unknown value for a constrained field (including
+delta recipes ingested without a cuisine) are excluded, so a filtered
+result is always safe.
+"""
+from dataclasses import dataclass
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+
+from app.services.recipe_store import RecipeStore
+from app.utils.allergen_utils import ALLERGEN_BITS, allergen_bits, allergen_matcher
+
+
+@dataclass(frozen=True)
+class SearchFilters:
+    excluded_allergens: Tuple[str, ...] = ()
+    max_prep_time: Optional[float] = None
+    max_cook_time: Optional[float] = None
+    cuisine: Optional[str] = None
+
+    @classmethod
+    def create(
+        cls,
+        excluded_allergens: Optional[Iterable[str]] = None,
+        max_prep_time: Optional[float] = None,
+        max_cook_time: Optional[float] = None,
+        cuisine: Optional[str] = None,
+    ) -> "SearchFilters":
+        """
+        Normalized (hashable, order-independent) filters; raises ValueError
+        for allergen categories that have no precomputed mask.
+        """
+        allergens = tuple(
+            sorted({a.strip().lower() for a in excluded_allergens or [] if a.strip()})
+        )
+        unknown = [a for a in allergens if a not in ALLERGEN_BITS]
+        if unknown:
+            raise ValueError(
+                f"Unknown allergen categories {unknown}; "
+                f"expected some of {sorted(ALLERGEN_BITS)}"
+            )
+        return cls(
+            excluded_allergens=allergens,
+            max_prep_time=max_prep_time or None,
+            max_cook_time=max_cook_time or None,
+            cuisine=cuisine.strip().lower() if cuisine and cuisine.strip() else None,
+        )
+
+    @property
+    def active(self) -> bool:
+        return bool(
+            self.excluded_allergens
+            or self.max_prep_time
+            or self.max_cook_time
+            or self.cuisine
+        )
+
+    def _time_limits(self):
+        return (("prep_time", self.max_prep_time), ("cook_time", self.max_cook_time))
+
+
+def allowed_rows(store: RecipeStore, filters: SearchFilters) -> np.ndarray:
+    """
+    Boolean mask over the base rows that satisfy the filters.
+    """
+    allowed = np.ones(len(store), dtype=bool)
+    bits = allergen_bits(filters.excluded_allergens)
+    if bits:
+        allowed &= (np.asarray(store.allergen_masks) & bits) == 0
+    for field, limit in filters._time_limits():
+        values = store.numeric.get(field)
+        if limit and values is not None:
+            # NaN (unknown time) compares False and is dropped
+            allowed &= np.asarray(values) <= limit
+    if filters.cuisine:
+        codes = [
+            code
+            for code, label in enumerate(store.cuisine_labels)
+            if label.lower() == filters.cuisine
+        ]
+        if store.cuisine_codes is None or not codes:
+            allowed[:] = False
+        else:
+            allowed &= np.isin(np.asarray(store.cuisine_codes), codes)
+    return allowed
+
+
+def recipe_passes(recipe: dict, filters: SearchFilters) -> bool:
+    """
+    The same checks for a single recipe dict (index delta entries).
+    """
+    if filters.excluded_allergens:
+        found = allergen_matcher.categories_in(recipe.get("ingredients") or [])
+        if found & set(filters.excluded_allergens):
+            return False
+    for field, limit in filters._time_limits():
+        if limit:
+            value = recipe.get(field)
+            if value is None or not value <= limit:
+                return False
+    if filters.cuisine:
+        if (recipe.get("cuisine") or "").lower() != filters.cuisine:
+            return False
+    return True
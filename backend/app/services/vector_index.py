@@ -1,84 +1,589 @@
-import faiss
-import pickle
-import pandas as pd
 import numpy as np
-import ast
+import asyncio
+import logging
+import math
+import time
+from contextlib import contextmanager
+from typing import NamedTuple, Optional
 
-from sentence_transformers import SentenceTransformer
+import faiss
 from app.config import settings
+from app.services.embedding_backends import load_embedding_model
+from app.services.embedding_batcher import EmbeddingBatcher
+from app.services.index_delta import IndexDelta
+from app.services.lexical_index import LexicalIndex
+from app.services.recipe_store import RecipeStore
+from app.services.search_filters import SearchFilters, allowed_rows, recipe_passes
+from app.utils.metrics import SEARCH_QUERIES, stage
+from app.utils.text_utils import corpus_text
+from app.utils.ttl_cache import TTLCache
+from app.services.index_factory import IndexSpec, search_params
+from app.services.index_store import (
+    IndexManifest,
+    IndexMismatchError,
+    build_lock,
+    file_sha256,
+    load_index,
+)
 
 
-class RecipeVectorIndex:
-    def __init__(self):
-        # 1) Load the raw CSV
-        self.df = pd.read_csv(settings.DATA_PATH)
+logger = logging.getLogger(__name__)
+
+# a query whose nearest recipe embedding is further than this matches nothing
+MAX_DISTANCE = 1.5
+# distance reported for recipes found only by the lexical index; it never
+# passes a MAX_DISTANCE check, so it can't pose as a close vector match
+LEXICAL_ONLY = np.inf
+
+
+class CachedQuery(NamedTuple):
+    vector: Optional[np.ndarray]  # None when answered by the lexical index alone
+    ids: np.ndarray
+    distances: np.ndarray
 
-        for col in ("ingredients", "instructions"):
-            self.df[col] = self.df[col].apply(self._parse_list_column)
 
-        self.embed_model = SentenceTransformer("all-MiniLM-L6-v2")
-        self.index_path = settings.EMBEDDING_CACHE_PATH
+class FilterMask(NamedTuple):
+    allowed: np.ndarray  # bool per base row, tombstones already cleared
+    count: int
+    bitmap: np.ndarray  # allowed packed little-endian, for faiss.IDSelectorBitmap
+
+
+class RecipeVectorIndex:
+    def __init__(self):
+        # seconds spent in each startup phase, logged by the search engine loader
+        self.timings: dict[str, float] = {}
+        self.model_name = settings.EMBEDDING_MODEL_NAME
+        with self._phase("load_model"):
+            self.embed_model = load_embedding_model(
+                model_name=self.model_name, threads=settings.EMBEDDING_THREADS
+            )
+        self.embedder = EmbeddingBatcher(
+            self.embed_model,
+            max_batch_size=settings.EMBED_MAX_BATCH_SIZE,
+            max_wait_ms=settings.EMBED_MAX_WAIT_MS,
+        )
+        self.index_dir = settings.INDEX_DIR
+        self.index_spec = IndexSpec.from_settings()
         self.embeddings = None
         self.index = None
+        self.store: Optional[RecipeStore] = None
+        self.lexical: Optional[LexicalIndex] = None
+        self.delta: Optional[IndexDelta] = None
+        # bumped on every (re)build; cached hits from older generations are dropped
+        self.generation = 0
+        self.query_cache = TTLCache(
+            maxsize=settings.QUERY_CACHE_SIZE, ttl_seconds=settings.QUERY_CACHE_TTL_S
+        )
+        self.filter_cache = TTLCache(
+            maxsize=settings.FILTER_CACHE_SIZE, ttl_seconds=settings.QUERY_CACHE_TTL_S
+        )
         self.build_index()
 
-    def _parse_list_column(self, value):
-        if isinstance(value, str):
-            try:
-                return ast.literal_eval(value)
-            except (ValueError, SyntaxError):
-                return [value]
-        return value
+    @contextmanager
+    def _phase(self, name: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - t0
+
+    def expected_manifest(self) -> IndexManifest:
+        with self._phase("hash_data"):
+            data_sha256 = file_sha256(settings.DATA_PATH)
+        return IndexManifest(
+            model_name=self.model_name,
+            dimension=self.embed_model.get_sentence_embedding_dimension(),
+            rows=None,  # only known after reading the CSV
+            data_sha256=data_sha256,
+            index_spec=self.index_spec.describe(),
+            embedding_dtype=settings.EMBEDDING_STORAGE,
+            embedding_backend=settings.EMBEDDING_BACKEND,
+        )
+
+    def _load(self, manifest: IndexManifest):
+        with self._phase("load_index"):
+            embeddings, index = load_index(self.index_dir, manifest)
+            store = RecipeStore.load(self.index_dir)
+        if len(store) != index.ntotal:
+            raise IndexMismatchError("recipe store does not match index size")
+        lexical = None
+        if settings.SEARCH_MODE == "hybrid":
+            with self._phase("load_lexical"):
+                lexical = LexicalIndex.load(self.index_dir, len(store))
+            if lexical is None:
+                # index built before the lexical path existed
+                logger.info("No lexical index on disk; building it in memory.")
+                with self._phase("build_lexical"):
+                    lexical = LexicalIndex.build(store.ingredients)
+        with self._phase("replay_delta"):
+            delta = IndexDelta(
+                self.index_dir, len(store), index.d, manifest.data_sha256
+            )
+        self.embeddings, self.index, self.store = embeddings, index, store
+        self.lexical = lexical
+        self.delta = delta
+        self._invalidate()
+
+    def _invalidate(self):
+        self.generation += 1
+        self.query_cache.clear()
+        self.filter_cache.clear()
 
     def build_index(self):
+        """
+        Load the index and recipe store from INDEX_DIR. The corpus is never
+        embedded here: a missing or stale index is an error that points at
+        the offline builder (app.services.index_builder).
+        """
+        manifest = self.expected_manifest()
         try:
-            with open(self.index_path, "rb") as f:
-                self.embeddings, self.index = pickle.load(f)
-            print("Loaded existing FAISS index from cache.")
-        except (OSError, IOError):
-            print("Building FAISS index from scratch...")
-            texts = self.df["cleaned_text"].tolist()
-            embs = self.embed_model.encode(texts, show_progress_bar=True)
-            self.embeddings = np.array(embs).astype("float32")
-            self.index = faiss.IndexFlatL2(self.embeddings.shape[1])
-            self.index.add(self.embeddings)
-            with open(self.index_path, "wb") as f:
-                pickle.dump((self.embeddings, self.index), f)
-
-    def retrieve(self, ingredients: list[str], top_k: int = 5):
-        # embed & search
-        query_vec = self.embed_model.encode([" ".join(ingredients)]).astype("float32")
-        D, I = self.index.search(query_vec, top_k)
-        if D[0][0] > 1.5:
-            return []
+            self._load(manifest)
+            logger.info("Loaded existing FAISS index from %s.", self.index_dir)
+            return
+        except IndexMismatchError:
+            pass
 
-        # pull out the top‐k rows
-        hits = self.df.iloc[I[0]].copy().reset_index(drop=True)
+        # the builder may be writing the index right now; wait for it once
+        waiting_since = time.perf_counter()
+        with build_lock(self.index_dir):
+            self.timings["wait_build_lock"] = time.perf_counter() - waiting_since
+        try:
+            self._load(manifest)
+        except IndexMismatchError as e:
+            raise IndexMismatchError(
+                f"{e}; build the index with `python -m app.services.index_builder`"
+            ) from e
+        logger.info("Loaded FAISS index written by the index builder.")
 
-        # map your “predicted” CSV columns into the public fields
-        # (replace these names if your CSV uses slightly different headers)
-        if "predicted_prep_time_rounded" in hits.columns:
-            hits["prep_time"] = hits["predicted_prep_time_rounded"]
-        else:
-            hits["prep_time"] = None
+    def query_key(
+        self,
+        ingredients: list[str],
+        top_k: int,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+    ) -> tuple:
+        """
+        Cache key for a query. Ingredients are expected to be clean_ingredient
+        output; they are de-duplicated and sorted so any order or repetition of
+        the same pantry maps to one entry.
+        """
+        terms = tuple(sorted({i for i in ingredients if i}))
+        return (
+            terms,
+            top_k,
+            nprobe or settings.SEARCH_NPROBE,
+            ef_search or settings.SEARCH_EF_SEARCH,
+            filters or SearchFilters(),
+        )
 
-        if "predicted_cook_time_rounded" in hits.columns:
-            hits["cook_time"] = hits["predicted_cook_time_rounded"]
-        else:
-            hits["cook_time"] = None
+    def query_text(self, terms: tuple) -> str:
+        return " ".join(terms)
+
+    def retrieve(
+        self,
+        ingredients: list[str],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+    ):
+        key = self.query_key(ingredients, top_k, nprobe, ef_search, filters)
+        hit, path = self.query_cache.get(key), "cache"
+        if hit is None and self.lexical is not None:
+            with stage("lexical"):
+                hit, path = self._lexical_only(key), "lexical"
+        if hit is None:
+            with stage("encode"):
+                query_vec = self.embedder.encode(self.query_text(key[0]))
+            with stage("index_search"):
+                hit, path = self._search_and_cache(key, query_vec), "vector"
+        SEARCH_QUERIES.inc(path=path)
+        with stage("materialize"):
+            return self.materialize(hit)
+
+    async def aretrieve(
+        self,
+        ingredients: list[str],
+        top_k: int = 5,
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+        filters: Optional[SearchFilters] = None,
+    ):
+        """
+        Async retrieve: on a cache miss the query is encoded by the shared
+        micro-batcher and the FAISS search (which releases the GIL) runs off
+        the event loop.
+        """
+        key = self.query_key(ingredients, top_k, nprobe, ef_search, filters)
+        hit, path = self.query_cache.get(key), "cache"
+        if hit is None and self.lexical is not None:
+            with stage("lexical"):
+                hit = await asyncio.to_thread(self._lexical_only, key)
+                path = "lexical"
+        if hit is None:
+            with stage("encode"):
+                query_vec = await self.embedder.embed(self.query_text(key[0]))
+            with stage("index_search"):
+                hit = await asyncio.to_thread(self._search_and_cache, key, query_vec)
+                path = "vector"
+        SEARCH_QUERIES.inc(path=path)
+        with stage("materialize"):
+            return self.materialize(hit)
+
+    async def aretrieve_batch(
+        self,
+        queries: list[tuple[list[str], int, Optional[SearchFilters]]],
+        nprobe: Optional[int] = None,
+        ef_search: Optional[int] = None,
+    ) -> list[list[dict]]:
+        """
+        Retrieve for many (ingredients, top_k, filters) queries at once. Cache
+        misses are encoded in a single SentenceTransformer.encode call and the
+        unfiltered ones share one multi-row FAISS search.
+        """
+        keys = [
+            self.query_key(ingredients, top_k, nprobe, ef_search, filters)
+            for ingredients, top_k, filters in queries
+        ]
+        hits = {}
+        for key in keys:
+            hit = self.query_cache.get(key)
+            if hit is not None:
+                hits[key] = hit
+        SEARCH_QUERIES.inc(len(hits), path="cache")
+        missing = list(dict.fromkeys(k for k in keys if k not in hits))
+        if missing:
+            hits.update(await asyncio.to_thread(self._search_batch_and_cache, missing))
+        with stage("materialize"):
+            return [self.materialize(hits[key]) for key in keys]
+
+    def _search_batch_and_cache(self, keys: list[tuple]) -> dict:
+        generation = self.generation
+        found = {}
+        with stage("lexical"):
+            for key in keys:
+                hit = self._lexical_only(key)
+                if hit is not None:
+                    found[key] = hit
+        SEARCH_QUERIES.inc(len(found), path="lexical")
+        keys = [key for key in keys if key not in found]
+        if not keys:
+            return found
+
+        texts = [self.query_text(key[0]) for key in keys]
+        with stage("encode"):
+            vecs = np.asarray(
+                self.embed_model.encode(texts, batch_size=settings.EMBED_MAX_BATCH_SIZE),
+                dtype="float32",
+            )
+        SEARCH_QUERIES.inc(len(keys), path="vector")
+        with stage("index_search"):
+            self._search_rows(keys, vecs, found)
+
+        if generation == self.generation:
+            for key, hit in found.items():
+                self.query_cache.put(key, hit)
+        return found
 
-        if "estimated_servings" in hits.columns:
-            hits["servings"] = hits["estimated_servings"]
+    def _search_rows(self, keys: list[tuple], vecs: np.ndarray, found: dict) -> None:
+        """
+        FAISS search (and fusion) for each key's row of vecs, into found.
+        """
+        plain = [row for row, key in enumerate(keys) if not key[4].active]
+        if plain:
+            # nprobe / ef_search are per batch, so every plain row shares them
+            _, _, nprobe, ef_search, _ = keys[plain[0]]
+            params = search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+            top_ks = [self._candidates(keys[row][1]) for row in plain]
+            results = self._search_ids_batch(vecs[plain], top_ks, params)
+            for row, (distances, ids) in zip(plain, results):
+                distances, ids = self._fuse(keys[row], distances, ids)
+                found[keys[row]] = CachedQuery(vecs[row : row + 1], ids, distances)
+        for row, key in enumerate(keys):
+            if key[4].active:
+                # each filter set has its own row mask, so these go one by one
+                _, top_k, nprobe, ef_search, filters = key
+                query_vec = vecs[row : row + 1]
+                distances, ids = self._search_filtered(
+                    query_vec, self._candidates(top_k), nprobe, ef_search, filters
+                )
+                distances, ids = self._fuse(key, distances, ids)
+                found[key] = CachedQuery(query_vec, ids, distances)
+
+    def _search_and_cache(self, key: tuple, query_vec: np.ndarray) -> CachedQuery:
+        _, top_k, nprobe, ef_search, filters = key
+        generation = self.generation
+        n = self._candidates(top_k)
+        if filters.active:
+            distances, ids = self._search_filtered(
+                query_vec, n, nprobe, ef_search, filters
+            )
         else:
-            hits["servings"] = None
-
-        # finally select exactly the six fields we expose
-        cols = [
-            "title",
-            "ingredients",
-            "instructions",
-            "prep_time",
-            "cook_time",
-            "servings",
+            # nprobe / ef_search only apply to IVF / HNSW backends
+            params = search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+            distances, ids = self._search_ids(query_vec, n, params)
+        distances, ids = self._fuse(key, distances, ids)
+        hit = CachedQuery(vector=query_vec, ids=ids, distances=distances)
+        # don't cache results computed against an index that was just replaced
+        if generation == self.generation:
+            self.query_cache.put(key, hit)
+        return hit
+
+    # ── lexical path and rank fusion ────────────────────────
+
+    def _candidates(self, top_k: int) -> int:
+        # with fusion, each ranking contributes a deeper candidate list
+        return top_k * settings.HYBRID_CANDIDATES if self.lexical is not None else top_k
+
+    def _lexical_search(self, terms: tuple, k: int, filters: SearchFilters):
+        allowed = None
+        if filters.active or self.delta.tombstones:
+            allowed = self._filter_mask(filters).allowed
+        return self.lexical.search(terms, k, allowed=allowed)
+
+    def _lexical_only(self, key: tuple) -> Optional[CachedQuery]:
+        """
+        Answer without the embedding model when at least top_k recipes use
+        every query ingredient; they are ranked by BM25. Recipes in the
+        delta are only reachable through the vector path.
+        """
+        if self.lexical is None or not settings.LEXICAL_SKIP_MODEL:
+            return None
+        terms, top_k = key[0], key[1]
+        if not terms:
+            return None
+        generation = self.generation
+        lex = self._lexical_search(terms, top_k, key[4])
+        if len(lex.ids) < top_k or lex.coverage[top_k - 1] < 1.0:
+            return None
+        distances = np.full(len(lex.ids), LEXICAL_ONLY, dtype="float32")
+        hit = CachedQuery(None, lex.ids, distances)
+        if generation == self.generation:
+            self.query_cache.put(key, hit)
+        return hit
+
+    def _fuse(self, key: tuple, distances: np.ndarray, ids: np.ndarray):
+        """
+        Reciprocal rank fusion of the vector ranking with the lexical one.
+        Returns (distances, ids) for the top_k fused recipes; recipes found
+        only lexically get distance LEXICAL_ONLY. The vector ranking is
+        dropped first when even its nearest recipe is beyond MAX_DISTANCE.
+        """
+        terms, top_k = key[0], key[1]
+        if len(ids) and distances[0] > MAX_DISTANCE:
+            distances, ids = distances[:0], ids[:0]
+        if self.lexical is None:
+            return distances[:top_k], ids[:top_k]
+        lex = self._lexical_search(terms, self._candidates(top_k), key[4])
+
+        scores: dict = {}
+        distance_of = {}
+        for rank, (d, i) in enumerate(zip(distances.tolist(), ids.tolist())):
+            scores[i] = 1.0 / (settings.RRF_K + rank + 1)
+            distance_of[i] = d
+        for rank, i in enumerate(lex.ids.tolist()):
+            scores[i] = scores.get(i, 0.0) + 1.0 / (settings.RRF_K + rank + 1)
+            distance_of.setdefault(i, LEXICAL_ONLY)
+
+        best = sorted(scores, key=scores.get, reverse=True)[:top_k]
+        return (
+            np.array([distance_of[i] for i in best], dtype="float32"),
+            np.array(best, dtype="int64"),
+        )
+
+    def _search_ids(self, query_vec: np.ndarray, top_k: int, params):
+        """
+        Search the base index, dropping tombstoned rows, and merge in the
+        closest recipes from the delta. Returns (distances, ids), best first.
+        """
+        tombstones = self.delta.tombstones
+        merged = self._overfetch(
+            query_vec,
+            top_k,
+            params,
+            fetch=top_k + min(len(tombstones), 4 * top_k),
+            keep=lambda ids: np.fromiter(
+                (i not in tombstones for i in ids.tolist()), dtype=bool, count=len(ids)
+            ),
+        )
+        dD, dI = self.delta.search(query_vec, top_k)
+        merged.extend(zip(dD[0].tolist(), dI[0].tolist()))
+        return self._best(merged, top_k)
+
+    def _search_ids_batch(self, query_vecs: np.ndarray, top_ks: list[int], params):
+        """
+        _search_ids for many query rows with one base and one delta search.
+        """
+        tombstones = self.delta.tombstones
+        k_max = max(top_ks)
+        fetch = k_max + min(len(tombstones), 4 * k_max)
+        D, I = self.index.search(query_vecs, fetch, params=params)
+        dD, dI = self.delta.search(query_vecs, k_max)
+
+        results = []
+        for row, top_k in enumerate(top_ks):
+            merged = [
+                (d, i)
+                for d, i in zip(D[row].tolist(), I[row].tolist())
+                if i >= 0 and i not in tombstones
+            ]
+            if len(merged) < top_k and I[row][-1] >= 0 and fetch < self.index.ntotal:
+                # rare: this query's neighbourhood is mostly tombstones
+                results.append(self._search_ids(query_vecs[row : row + 1], top_k, params))
+                continue
+            merged.extend(zip(dD[row].tolist(), dI[row].tolist()))
+            results.append(self._best(merged, top_k))
+        return results
+
+    def _search_filtered(
+        self,
+        query_vec: np.ndarray,
+        top_k: int,
+        nprobe: int,
+        ef_search: int,
+        filters: SearchFilters,
+    ):
+        """
+        _search_ids restricted to recipes passing the filters. When most rows
+        pass, the base index is over-fetched in proportion to the share that
+        passes and the hits are filtered; when few pass, FAISS is given an
+        IDSelector so it only scores matching rows. Either way one search
+        usually returns k results.
+        """
+        mask = self._filter_mask(filters)
+        merged = []
+        if mask.count:
+            selectivity = mask.count / len(mask.allowed)
+            if selectivity >= settings.FILTER_SELECTOR_THRESHOLD:
+                params = search_params(self.index, nprobe=nprobe, ef_search=ef_search)
+                merged = self._overfetch(
+                    query_vec,
+                    top_k,
+                    params,
+                    fetch=math.ceil(1.5 * top_k / selectivity),
+                    keep=lambda ids: mask.allowed[ids],
+                )
+            else:
+                sel = faiss.IDSelectorBitmap(
+                    len(mask.bitmap), faiss.swig_ptr(mask.bitmap)
+                )
+                params = search_params(
+                    self.index, nprobe=nprobe, ef_search=ef_search, sel=sel
+                )
+                D, I = self.index.search(query_vec, top_k, params=params)
+                merged = [
+                    (d, i) for d, i in zip(D[0].tolist(), I[0].tolist()) if i >= 0
+                ]
+
+        if len(self.delta):
+            dD, dI = self.delta.search(query_vec, len(self.delta))
+            passed = 0
+            for d, i in zip(dD[0].tolist(), dI[0].tolist()):
+                if passed == top_k:
+                    break
+                # may have been deleted since the search
+                recipe = self.delta.recipes.get(i)
+                if recipe is not None and recipe_passes(recipe, filters):
+                    merged.append((d, i))
+                    passed += 1
+        return self._best(merged, top_k)
+
+    def _overfetch(self, query_vec, top_k: int, params, fetch: int, keep) -> list:
+        """
+        Search `fetch` neighbours, keep those whose ids pass keep(ids), and
+        double `fetch` until top_k remain or the index is exhausted.
+        """
+        fetch = max(fetch, top_k)
+        while True:
+            D, I = self.index.search(query_vec, fetch, params=params)
+            # FAISS pads with -1 when fewer than `fetch` neighbours were found
+            found = I[0] >= 0
+            ok = found & keep(np.where(found, I[0], 0))
+            merged = list(zip(D[0][ok].tolist(), I[0][ok].tolist()))
+            exhausted = not found[-1] or fetch >= self.index.ntotal
+            if len(merged) >= top_k or exhausted:
+                return merged
+            fetch *= 2
+
+    @staticmethod
+    def _best(merged: list, top_k: int):
+        merged.sort()
+        merged = merged[:top_k]
+        return (
+            np.array([d for d, _ in merged], dtype="float32"),
+            np.array([i for _, i in merged], dtype="int64"),
+        )
+
+    def _filter_mask(self, filters: SearchFilters) -> FilterMask:
+        mask = self.filter_cache.get(filters)
+        if mask is None:
+            allowed = allowed_rows(self.store, filters)
+            if self.delta.tombstones:
+                allowed[self.delta.tombstone_ids()] = False
+            mask = FilterMask(
+                allowed=allowed,
+                count=int(allowed.sum()),
+                bitmap=np.packbits(allowed, bitorder="little"),
+            )
+            self.filter_cache.put(filters, mask)
+        return mask
+
+    def materialize(self, hit: CachedQuery):
+        # the MAX_DISTANCE cutoff was applied to the vector results in _fuse
+        if len(hit.ids) == 0:
+            return []
+        return self.gather(hit.ids)
+
+    def gather(self, ids) -> list[dict]:
+        """
+        Response dicts for these recipe ids, from the base store or the delta.
+        """
+        ids = [int(i) for i in ids]
+        n = len(self.store)
+        # the delta first: an updated base recipe keeps its id there
+        rows = {}
+        for i in ids:
+            recipe = self.delta.recipes.get(i)
+            if recipe is not None:
+                rows[i] = recipe
+        # a delta recipe may have been deleted since this hit was cached
+        base_ids = [i for i in ids if i < n and i not in rows]
+        rows.update(zip(base_ids, self.store.gather(base_ids)))
+        # like the base store, cuisine stays internal (it only feeds filters)
+        return [
+            {"id": i, **{k: v for k, v in rows[i].items() if k != "cuisine"}}
+            for i in ids
+            if i in rows
         ]
-        return hits[cols].to_dict(orient="records")
+
+    # ── incremental updates ─────────────────────────────────
+
+    def _embed_recipes(self, recipes: list[dict]) -> np.ndarray:
+        texts = [
+            corpus_text(r["title"], r["ingredients"], r["instructions"])
+            for r in recipes
+        ]
+        return np.asarray(self.embed_model.encode(texts), dtype="float32")
+
+    def add_recipes(self, recipes: list[dict]) -> list[int]:
+        """
+        Embed only these recipes and add them to the index; returns their ids.
+        """
+        if not recipes:
+            return []
+        ids = self.delta.add(recipes, self._embed_recipes(recipes))
+        self._invalidate()
+        return ids
+
+    def update_recipe(self, recipe_id: int, recipe: dict) -> None:
+        if recipe_id not in self.delta:
+            raise KeyError(recipe_id)
+        self.delta.add([recipe], self._embed_recipes([recipe]), ids=[recipe_id])
+        self._invalidate()
+
+    def delete_recipes(self, ids: list[int]) -> list[int]:
+        removed = self.delta.delete(ids)
+        if removed:
+            self._invalidate()
+        return removed
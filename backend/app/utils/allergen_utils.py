@@ -1,7 +1,12 @@
-from typing import List, Union
+import bisect
+import hashlib
+import json
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Set, Union
 
 ALLERGEN_SYNONYMS: dict[str, List[str]] = {
-    "milk": ["milk", "cream", "butter", "yogurt", "cheese", "paneer"],
+    "milk": ["milk", "cream", "butter", "yogurt", "cheese", "paneer", "buttermilk"],
     "eggs": ["egg", "eggs"],
     "fish": ["fish", "salmon", "tuna", "cod", "trout", "haddock"],
     "shellfish": ["shrimp", "prawn", "crab", "lobster", "oyster", "mussel"],
@@ -27,13 +32,134 @@ ALLERGEN_SYNONYMS: dict[str, List[str]] = {
     ],
     "wheat": ["wheat", "whole wheat", "spelt", "bulgur"],
     "gluten": ["gluten", "barley", "rye"],
-    "soy": ["soy", "tofu", "soy sauce", "edamame"],
+    "soy": ["soy", "tofu", "soy sauce", "edamame", "soymilk"],
     "sesame": ["sesame", "tahini"],
     "mustard": ["mustard"],
     "sulfites": ["sulfur dioxide", "sulfite", "sulfites"],
 }
 
 
+# words that contain an allergen synonym but are not that allergen;
+# synonyms match anywhere in a word ("catfish", "icecream", "wholewheat"), so
+# these are the only exceptions
+NOT_ALLERGENS: List[str] = [
+    "buckwheat",
+    "butternut",
+    "buttercup",
+    "butterhead",
+    "butterfl",  # butterfly, butterflied
+    "butter bean",
+    "butter lettuce",
+    "cream of tartar",
+    "eggplant",
+    "crabapple",
+    "crab apple",
+    "oyster mushroom",
+    "coddle",  # coddled eggs
+    "reggiano",  # parmigiano-reggiano
+    "veggie",
+]
+
+
+# bit per category for the per-recipe allergen masks stored with the index
+ALLERGEN_BITS: Dict[str, int] = {cat: 1 << i for i, cat in enumerate(ALLERGEN_SYNONYMS)}
+
+
+def allergen_bits(categories: Iterable[str]) -> int:
+    bits = 0
+    for category in categories:
+        bits |= ALLERGEN_BITS.get(category.lower(), 0)
+    return bits
+
+
+def synonyms_fingerprint() -> str:
+    """
+    Changes whenever ALLERGEN_SYNONYMS or NOT_ALLERGENS do, so stored masks
+    can be recomputed.
+    """
+    rules = {"synonyms": ALLERGEN_SYNONYMS, "not_allergens": NOT_ALLERGENS, "match": "substring"}
+    return hashlib.sha256(json.dumps(rules).encode("utf-8")).hexdigest()
+
+
+class AllergenMatch(NamedTuple):
+    category: str
+    synonym: str
+    start: int  # span within the ingredient string
+    end: int
+
+
+def _longest_first(words: Iterable[str]) -> str:
+    # longest first so "soy sauce" wins over "soy"
+    return "|".join(re.escape(w) for w in sorted(set(words), key=len, reverse=True))
+
+
+def _alternation(words: Iterable[str]) -> str:
+    # group 1: a NOT_ALLERGENS word, consumed so no synonym inside it matches;
+    # group 2: a synonym anywhere, like the old substring check
+    return rf"({_longest_first(NOT_ALLERGENS)})|({_longest_first(words)})"
+
+
+def _synonym_matches(pattern: "re.Pattern", text: str):
+    return (m for m in pattern.finditer(text) if m.group(2) is not None)
+
+
+class AllergenMatcher:
+    """
+    All synonyms of all categories compiled into one alternation regex, so a
+    batch of ingredient strings is scanned in a single pass. Synonyms match
+    anywhere, also inside words ("catfish", "icecream"); the only exceptions
+    are NOT_ALLERGENS, which keeps "butternut" from matching "butter" and
+    "buckwheat" from matching "wheat".
+    """
+
+    def __init__(self, synonyms: Dict[str, List[str]] = ALLERGEN_SYNONYMS):
+        self.categories: Dict[str, List[str]] = {}
+        for category, words in synonyms.items():
+            for word in words:
+                self.categories.setdefault(word.lower(), []).append(category)
+        self.pattern = re.compile(_alternation(self.categories), re.IGNORECASE)
+
+    def scan(self, texts: Sequence[str]) -> List[List[AllergenMatch]]:
+        """
+        One list of matches per input string, with spans relative to it.
+        """
+        starts = []
+        pos = 0
+        for text in texts:
+            starts.append(pos)
+            pos += len(text) + 1
+        # newline-joined so no synonym can span two ingredients
+        joined = "\n".join(texts)
+
+        matches: List[List[AllergenMatch]] = [[] for _ in texts]
+        for m in _synonym_matches(self.pattern, joined):
+            i = bisect.bisect_right(starts, m.start()) - 1
+            synonym = m.group(2).lower()
+            for category in self.categories[synonym]:
+                matches[i].append(
+                    AllergenMatch(category, synonym, m.start() - starts[i], m.end() - starts[i])
+                )
+        return matches
+
+    def categories_in(self, texts: Sequence[str]) -> Set[str]:
+        return {m.category for found in self.scan(texts) for m in found}
+
+
+allergen_matcher = AllergenMatcher()
+
+
+@lru_cache(maxsize=256)
+def _custom_pattern(category: str) -> "re.Pattern":
+    return re.compile(_alternation([category]), re.IGNORECASE)
+
+
+def _ingredient_text(item: Union[str, dict]) -> str:
+    # use .get('name') if it's a dict
+    if isinstance(item, dict):
+        return item.get("name", "") or ""
+    return str(item)
+
+
 def detect_allergens(
     ingredients: List[Union[str, dict]], exclude_list: List[str]
 ) -> List[str]:
@@ -41,22 +167,18 @@ def detect_allergens(
     Return the list of allergen categories from exclude_list
     whose synonyms appear in the ingredients list.
     """
-    # 1) Normalize all ingredients to strings (use .get('name') if it's a dict)
-    normalized = []
-    for item in ingredients:
-        if isinstance(item, dict):
-            # grab the 'name' field, or stringify the whole dict
-            normalized.append(item.get("name", "") or "")
-        else:
-            normalized.append(str(item))
-    text = " ".join(normalized).lower()
+    texts = [_ingredient_text(item) for item in ingredients]
+    present = allergen_matcher.categories_in(texts)
 
-    found: set[str] = set()
+    found: List[str] = []
     for category in exclude_list or []:
-        synonyms = ALLERGEN_SYNONYMS.get(category.lower(), [category.lower()])
-        for syn in synonyms:
-            if syn in text:
-                found.add(category)
-                break
-
-    return list(found)
+        key = category.lower()
+        if key in ALLERGEN_SYNONYMS:
+            hit = key in present
+        else:
+            # unknown category: match the word itself
+            pattern = _custom_pattern(key)
+            hit = any(next(_synonym_matches(pattern, t), None) for t in texts)
+        if hit and category not in found:
+            found.append(category)
+    return found
@@ -1,15 +1,13 @@
-import requests
 import json
 from typing import List
+from app.config import settings
+from app.services.llm_router import LLMRouter
 
-OLLAMA_URL = "http://localhost:11434/api/generate"
-MODEL_NAME = "nous-hermes"
 
-
-def detect_cuisine(ingredients: List[str]) -> str:
+async def detect_cuisine(ingredients: List[str], llm: LLMRouter) -> str:
     """
-    Ask the LLM to pick the single best cuisine for these ingredients.
-    Safely falls back to "International".
+    Ask the LLM to pick the single best cuisine for these ingredients, using
+    the (usually smaller) LLM_CUISINE_MODEL. Safely falls back to "International".
     """
     prompt = (
         "You are a culinary expert. Given these ingredients:\n"
@@ -20,12 +18,10 @@ def detect_cuisine(ingredients: List[str]) -> str:
     )
 
     try:
-        resp = requests.post(
-            OLLAMA_URL,
-            json={"model": MODEL_NAME, "prompt": prompt, "stream": False},
-            timeout=10,
+        body = await llm.generate(
+            prompt, model=settings.LLM_CUISINE_MODEL, timeout=settings.LLM_CUISINE_TIMEOUT_S
         )
-        raw = resp.json().get("response", "").strip()
+        raw = body.get("response", "").strip()
         data = json.loads(raw)
         return data.get("cuisine", "International")
     except Exception:
@@ -0,0 +1,117 @@
+"""
+Structured parsing of raw ingredient lines ("1 1/2 cups (packed) brown
+sugar") into quantity, unit and name.
+
+All patterns are compiled once at import, and parse_ingredients() handles a
+whole batch per call: one anchored match per line for the leading quantity
+and unit, then the names of every line are cleaned together with
+clean_ingredients. Use it for the /parse-ingredients endpoint, search
+queries and corpus preprocessing alike.
+"""
+import re
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from app.utils.text_utils import clean_ingredients
+
+# canonical unit -> spellings accepted after a quantity
+UNIT_ALIASES: Dict[str, List[str]] = {
+    "cup": ["cup", "cups", "c"],
+    "tablespoon": ["tablespoon", "tablespoons", "tbsp", "tbsps", "tbs", "tbl"],
+    "teaspoon": ["teaspoon", "teaspoons", "tsp", "tsps"],
+    "pound": ["pound", "pounds", "lb", "lbs"],
+    "ounce": ["ounce", "ounces", "oz", "fl oz"],
+    "gram": ["gram", "grams", "g"],
+    "kilogram": ["kilogram", "kilograms", "kg"],
+    "milliliter": ["milliliter", "milliliters", "millilitre", "millilitres", "ml"],
+    "liter": ["liter", "liters", "litre", "litres", "l"],
+    "quart": ["quart", "quarts", "qt"],
+    "pint": ["pint", "pints", "pt"],
+    "clove": ["clove", "cloves"],
+    "slice": ["slice", "slices"],
+    "can": ["can", "cans"],
+    "package": ["package", "packages", "pkg"],
+    "stick": ["stick", "sticks"],
+    "pinch": ["pinch", "pinches"],
+    "dash": ["dash", "dashes"],
+}
+_CANONICAL_UNIT = {
+    alias: unit for unit, aliases in UNIT_ALIASES.items() for alias in aliases
+}
+
+VULGAR_FRACTIONS: Dict[str, float] = {
+    "½": 1 / 2,
+    "⅓": 1 / 3,
+    "⅔": 2 / 3,
+    "¼": 1 / 4,
+    "¾": 3 / 4,
+    "⅛": 1 / 8,
+}
+_VULGAR = "".join(VULGAR_FRACTIONS)
+
+# "2", "1.5", "1/2", "1 1/2", "1½", "½"
+_NUMBER = rf"(?:\d+\s+\d+/\d+|\d+/\d+|\d+(?:\.\d+)?\s*[{_VULGAR}]?|[{_VULGAR}])"
+_UNITS = "|".join(
+    re.escape(a) for a in sorted(_CANONICAL_UNIT, key=len, reverse=True)
+)
+_LEADING_RE = re.compile(
+    rf"""^\s*
+    (?:(?P<qty>{_NUMBER})                 # quantity
+       (?:\s*(?:-|–|to)\s*{_NUMBER})?     # range upper bound, ignored
+       \s*)?
+    (?:\([^)]*\)\s*)?                     # "(15 oz)" package-size note
+    (?:(?P<unit>{_UNITS})\.?(?![\w]))?    # unit, optionally abbreviated "tbsp."
+    \s*(?:of\b)?                          # "cup of flour"
+    """,
+    re.IGNORECASE | re.VERBOSE,
+)
+
+
+class ParsedIngredient(NamedTuple):
+    raw: str
+    quantity: Optional[float]  # lower bound for ranges ("2-3 cloves" -> 2)
+    unit: Optional[str]  # canonical name from UNIT_ALIASES
+    name: str  # clean_ingredient of the rest of the line
+
+
+def parse_quantity(text: str) -> Optional[float]:
+    """
+    "1 1/2" -> 1.5, "1½" -> 1.5, "3/4" -> 0.75, "2" -> 2.0.
+    """
+    total = 0.0
+    for part in text.split():
+        if "/" in part:
+            num, den = part.split("/", 1)
+            if int(den) == 0:
+                return None
+            total += int(num) / int(den)
+            continue
+        if part[-1] in VULGAR_FRACTIONS:
+            total += VULGAR_FRACTIONS[part[-1]]
+            part = part[:-1]
+        if part:
+            total += float(part)
+    return total
+
+
+def parse_ingredients(lines: Iterable[str]) -> List[ParsedIngredient]:
+    raws = list(lines)
+    quantities: List[Optional[float]] = []
+    units: List[Optional[str]] = []
+    rests: List[str] = []
+    for raw in raws:
+        m = _LEADING_RE.match(raw)
+        qty = m.group("qty")
+        unit = m.group("unit")
+        end = m.end()
+        if unit and not qty and len(unit) <= 2:
+            # a bare "l" or "c" is only a unit after a quantity ("l'orange")
+            unit, end = None, m.start("unit")
+        quantities.append(parse_quantity(qty) if qty else None)
+        units.append(_CANONICAL_UNIT[unit.lower()] if unit else None)
+        rests.append(raw[end:])
+    names = clean_ingredients(rests)
+    return [ParsedIngredient(*row) for row in zip(raws, quantities, units, names)]
+
+
+def parse_ingredient(line: str) -> ParsedIngredient:
+    return parse_ingredients([line])[0]
@@ -0,0 +1,157 @@
+import json
+from typing import Any, List, Optional, Tuple
+
+
+class IncrementalObjectParser:
+    """
+    Parse a JSON object while it is still streaming in.
+
+    Feed text chunks as they arrive; feed() returns the (key, value) pairs of
+    top-level members whose values became complete in that chunk, so callers
+    can act on e.g. "title" long before "instructions" has been generated.
+    Text before the opening brace (stray prose, code fences) is ignored.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.done = False
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._member_start = None
+
+    def feed(self, chunk: str) -> List[Tuple[str, Any]]:
+        if self.done:
+            return []
+        self.text += chunk
+        members: List[Tuple[str, Any]] = []
+        text = self.text
+
+        for i in range(self._pos, len(text)):
+            ch = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                continue
+
+            if self._depth == 0:
+                # prose before the object: only its opening brace counts,
+                # brackets and stray closers in "[1] Here's the recipe" don't
+                if ch == "{":
+                    self._depth = 1
+                    self._member_start = i + 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                if self._depth == 1:
+                    members.extend(self._close_member(i))
+                    self.done = True
+                    self._pos = i + 1
+                    return members
+                self._depth -= 1
+            elif ch == "," and self._depth == 1:
+                members.extend(self._close_member(i))
+                self._member_start = i + 1
+
+        self._pos = len(text)
+        return members
+
+    def _close_member(self, end: int) -> List[Tuple[str, Any]]:
+        member = self.text[self._member_start : end].strip()
+        if not member:
+            return []
+        try:
+            return list(json.loads("{" + member + "}").items())
+        except json.JSONDecodeError:
+            # malformed member; the caller still sees the full text at the end
+            return []
+
+
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+def repair_json_object(text: str) -> Optional[dict]:
+    """
+    Best-effort parse of a JSON object that an LLM got slightly wrong: prose
+    or code fences around it, trailing commas, markdown bullets in front of
+    array items, raw newlines inside strings, or output cut off mid-way. A
+    truncated object keeps the members completed before the cut, so callers
+    can ask for just the missing ones. Returns None if no object can be salvaged.
+    """
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    out: List[str] = []
+    stack: List[str] = []
+    # length of out before each top-level comma: every member before it is
+    # complete, so truncated output can be cut there
+    cuts: List[int] = []
+    in_string = escape = False
+    i, n = start, len(text)
+    while i < n:
+        ch = text[i]
+        i += 1
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+        elif ch in "}]":
+            if not stack:
+                break
+            _strip_trailing_comma(out)
+            out.append(_CLOSERS[stack.pop()])
+            if not stack:
+                break
+            continue
+        elif ch == "," and len(stack) == 1:
+            cuts.append(len(out))
+        elif ch in "-*•" and not text[i : i + 1].isdigit():
+            continue  # list bullet in front of an array item, not a minus sign
+        out.append(ch)
+
+    if not stack:
+        return _loads_object("".join(out))
+
+    # truncated: the last member is unfinished (a cut-off instruction list
+    # would still parse), so keep only the members before it
+    for length in reversed(cuts[-8:]):
+        parsed = _loads_object("".join(out[:length]) + "}")
+        if parsed is not None:
+            return parsed
+    return None
+
+
+def _strip_trailing_comma(out: List[str]) -> None:
+    j = len(out) - 1
+    while j >= 0 and out[j].isspace():
+        j -= 1
+    if j >= 0 and out[j] == ",":
+        del out[j]
+
+
+def _loads_object(candidate: str) -> Optional[dict]:
+    out = list(candidate)
+    _strip_trailing_comma(out)
+    try:
+        # strict=False accepts raw newlines and tabs inside strings
+        parsed = json.loads("".join(out), strict=False)
+    except json.JSONDecodeError:
+        return None
+    return parsed if isinstance(parsed, dict) else None
@@ -0,0 +1,288 @@
+"""
+In-process Prometheus-style metrics and per-request stage timing.
+
+Hot paths wrap their stages in `with stage("encode"):`. Each stage is
+recorded in the recipe_stage_seconds histogram (METRICS_ENABLED), and
+per-request totals are collected for the Server-Timing response header
+(SERVER_TIMING). With both settings off, stage() returns a shared no-op
+context manager, which costs about as much as a function call.
+
+GET /metrics serves everything in the Prometheus text format. Metrics are
+process-wide, like prometheus_client's default registry: with several
+workers, each one exposes its own.
+"""
+import threading
+from bisect import bisect_left
+from contextlib import nullcontext
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+# seconds; from sub-millisecond index lookups to long LLM generations
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+    0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _format_labels(names: Sequence[str], values: Tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), enabled=True):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.enabled = enabled
+        self._values: Dict[Tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels) -> None:
+        if not self.enabled:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        with self._lock:
+            values = sorted(self._values.items())
+        return [
+            f"{self.name}{_format_labels(self.labelnames, key)} {value:g}"
+            for key, value in values
+        ]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        enabled=True,
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.enabled = enabled
+        # per label set: [count per bucket..., count above the last bucket, sum]
+        self._series: Dict[Tuple, List[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels) -> None:
+        if not self.enabled:
+            return
+        key = tuple(labels.get(n, "") for n in self.labelnames)
+        slot = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[slot] += 1
+            series[-1] += value
+
+    def render(self) -> List[str]:
+        with self._lock:
+            series = sorted((k, list(v)) for k, v in self._series.items())
+        lines = []
+        for key, counts in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                le = _format_labels(self.labelnames, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{le} {cumulative}")
+            total = cumulative + counts[len(self.buckets)]
+            le = _format_labels(self.labelnames, key, 'le="+Inf"')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_bucket{le} {total}")
+            lines.append(f"{self.name}_sum{labels} {counts[-1]:g}")
+            lines.append(f"{self.name}_count{labels} {total}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._metrics: List = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames, enabled=self.enabled)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets, enabled=self.enabled)
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(enabled=settings.METRICS_ENABLED)
+
+STAGE_SECONDS = metrics.histogram(
+    "recipe_stage_seconds", "Time spent in each request stage.", ("stage",)
+)
+HTTP_REQUEST_SECONDS = metrics.histogram(
+    "http_request_seconds",
+    "Time to the response headers, by route.",
+    ("method", "route", "status"),
+)
+SEARCH_QUERIES = metrics.counter(
+    "search_queries_total",
+    "Search queries by how they were answered (cache, lexical, vector).",
+    ("path",),
+)
+LLM_TOKENS = metrics.counter(
+    "llm_tokens_total", "Tokens reported by Ollama (prompt or eval).", ("model", "kind")
+)
+LLM_SECONDS = metrics.histogram(
+    "llm_duration_seconds",
+    "Durations reported by Ollama (load, prompt_eval, eval, total).",
+    ("model", "phase"),
+)
+LLM_BACKEND_REQUESTS = metrics.counter(
+    "llm_backend_requests_total",
+    "Ollama calls per backend by outcome (ok, failed, rejected).",
+    ("backend", "outcome"),
+)
+RECIPE_PARSE = metrics.counter(
+    "recipe_parse_total",
+    "Generated recipes by parse outcome (clean, repaired, recovered, failed).",
+    ("outcome",),
+)
+
+# ── stage timing ────────────────────────────────────────────
+
+_request_timings: ContextVar[Optional[Dict[str, float]]] = ContextVar(
+    "request_timings", default=None
+)
+_ACTIVE = settings.METRICS_ENABLED or settings.SERVER_TIMING
+_NULL = nullcontext()
+
+
+class _Stage:
+    __slots__ = ("name", "t0")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.t0 = perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = perf_counter() - self.t0
+        STAGE_SECONDS.observe(elapsed, stage=self.name)
+        timings = _request_timings.get()
+        if timings is not None:
+            timings[self.name] = timings.get(self.name, 0.0) + elapsed
+        return False
+
+
+def stage(name: str):
+    """
+    Context manager timing one stage of the current request.
+    """
+    if not _ACTIVE:
+        return _NULL
+    return _Stage(name)
+
+
+def record_llm_body(model: str, body: dict) -> None:
+    """
+    Token counts and durations from a final Ollama response (or stream chunk).
+    """
+    if not metrics.enabled:
+        return
+    LLM_TOKENS.inc(body.get("prompt_eval_count") or 0, model=model, kind="prompt")
+    LLM_TOKENS.inc(body.get("eval_count") or 0, model=model, kind="eval")
+    for phase in ("load", "prompt_eval", "eval", "total"):
+        ns = body.get(f"{phase}_duration")
+        if ns:
+            LLM_SECONDS.observe(ns / 1e9, model=model, phase=phase)
+
+
+def _route_label(scope) -> str:
+    """
+    The matched path template ("/recipes/{recipe_id}"), so label values stay
+    bounded; "other" for unmatched paths.
+    """
+    if scope.get("route") is None:
+        return "other"
+    # the route object only knows its path below the router prefix, so put
+    # the parameter names back into the full request path instead
+    by_value = {str(v): k for k, v in (scope.get("path_params") or {}).items()}
+    segments = scope["path"].split("/")
+    return "/".join("{%s}" % by_value[s] if s in by_value else s for s in segments)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request latency per route and, with
+    SERVER_TIMING, adding a Server-Timing header listing each stage's time.
+    Only installed when either setting is on.
+    """
+
+    def __init__(self, app, server_timing: bool = settings.SERVER_TIMING):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = perf_counter()
+        timings: Optional[Dict[str, float]] = {} if self.server_timing else None
+        token = _request_timings.set(timings)
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                elapsed = perf_counter() - started
+                route = _route_label(scope)
+                HTTP_REQUEST_SECONDS.observe(
+                    elapsed,
+                    method=scope["method"],
+                    route=route,
+                    status=str(message["status"]),
+                )
+                if timings is not None:
+                    entries = [f"{n};dur={1000 * s:.2f}" for n, s in timings.items()]
+                    entries.append(f"total;dur={1000 * elapsed:.2f}")
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", ", ".join(entries).encode()))
+                    message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _request_timings.reset(token)
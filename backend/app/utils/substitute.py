@@ -1,5 +1,5 @@
 from typing import List, Dict
-from app.utils.allergen_utils import ALLERGEN_SYNONYMS
+from app.utils.allergen_utils import allergen_matcher
 
 SUBSTITUTION_MAP: Dict[str, List[str]] = {
     "egg": ["chia seeds", "flaxseed meal"],
@@ -29,18 +29,12 @@ def substitute_ingredients(
     (via ALLERGEN_SYNONYMS) with a safe substitute from SUBSTITUTION_MAP.
     Tries singular forms if needed, otherwise drops the ingredient.
     """
+    excluded = {cat.lower() for cat in excluded_allergens}
     out: List[str] = []
-    for ing in ingredients:
+    # 1) Find which ingredients violate an excluded allergen, in one pass
+    for ing, matches in zip(ingredients, allergen_matcher.scan(ingredients)):
         lower = ing.lower()
-        # 1) Check if this ingredient violates any excluded allergen
-        violate = False
-        for cat in excluded_allergens:
-            for syn in ALLERGEN_SYNONYMS.get(cat.lower(), []):
-                if syn in lower:
-                    violate = True
-                    break
-            if violate:
-                break
+        violate = any(m.category in excluded for m in matches)
 
         if not violate:
             out.append(ing)
@@ -1,24 +1,72 @@
 import re
+from typing import Iterable, List
+
+# measurement words clean_ingredient strips (see ingredient_parser for units
+# with canonical names)
+UNITS = [
+    "cup", "cups", "tablespoon", "tablespoons", "tbsp", "teaspoon", "teaspoons", "tsp",
+    "pound", "pounds", "lb", "oz", "ounce", "ounces",
+    "grams", "gram", "g", "kg", "ml", "liter", "liters",
+    "clove", "cloves", "slice", "slices", "can", "cans", "package", "packages", "pinch", "of"
+]
+
+# compiled once, not per call
+_NUMBER_RE = re.compile(r'\b\d+\b')
+_FRACTION_RE = re.compile(r'\d+\/\d+')  # e.g., 1/2
+_UNIT_RE = re.compile(r'\b(?:' + '|'.join(UNITS) + r')\b')
+_PUNCT_RE = re.compile(r'[^\w\s]')
+_SPACE_RE = re.compile(r'\s+')
+_INLINE_SPACE_RE = re.compile(r'[^\S\n]+')
+
 
 def clean_ingredient(ingredient: str) -> str:
     ingredient = ingredient.lower()
 
     # Remove fractions and numbers
-    ingredient = re.sub(r'\b\d+\b', '', ingredient)
-    ingredient = re.sub(r'\d+\/\d+', '', ingredient)  # e.g., 1/2
+    ingredient = _NUMBER_RE.sub('', ingredient)
+    ingredient = _FRACTION_RE.sub('', ingredient)
 
     # Remove measurement units
-    units = [
-        "cup", "cups", "tablespoon", "tablespoons", "tbsp", "teaspoon", "teaspoons", "tsp",
-        "pound", "pounds", "lb", "oz", "ounce", "ounces",
-        "grams", "gram", "g", "kg", "ml", "liter", "liters",
-        "clove", "cloves", "slice", "slices", "can", "cans", "package", "packages", "pinch", "of"
-    ]
-    unit_pattern = r'\b(?:' + '|'.join(units) + r')\b'
-    ingredient = re.sub(unit_pattern, '', ingredient)
+    ingredient = _UNIT_RE.sub('', ingredient)
 
     # Remove extra spaces and punctuation
-    ingredient = re.sub(r'[^\w\s]', '', ingredient)  # Remove punctuation
-    ingredient = re.sub(r'\s+', ' ', ingredient).strip()
+    ingredient = _PUNCT_RE.sub('', ingredient)  # Remove punctuation
+    ingredient = _SPACE_RE.sub(' ', ingredient).strip()
 
     return ingredient
+
+
+def clean_ingredients(ingredients: Iterable[str]) -> List[str]:
+    """
+    clean_ingredient for many strings at once: the same passes run over one
+    newline-joined string instead of once per ingredient.
+    """
+    items = [i.replace("\n", " ") for i in ingredients]
+    if not items:
+        return []
+    text = "\n".join(items).lower()
+    text = _NUMBER_RE.sub('', text)
+    text = _FRACTION_RE.sub('', text)
+    text = _UNIT_RE.sub('', text)
+    text = _PUNCT_RE.sub('', text)
+    text = _INLINE_SPACE_RE.sub(' ', text)
+    return [line.strip() for line in text.split("\n")]
+
+
+_TEMPERATURE_RE = re.compile(r'\d{2,4}\s*(degrees?|f|°f|celsius)')
+_NON_ALNUM_RE = re.compile(r'[^a-z0-9\s]')
+
+
+def corpus_text(title: str, ingredients: list, instructions: list) -> str:
+    """
+    Rebuild the "cleaned_text" column the corpus embeddings were computed from
+    (same recipe: "<title>. Ingredients: [...]. instructions: [...]", cleaned
+    exactly as in the preprocessing notebook).
+    """
+    text = f"{title}. Ingredients: {ingredients}. instructions: {instructions}"
+    text = text.lower()
+    text = _TEMPERATURE_RE.sub('', text)
+    text = text.replace('[', '').replace(']', '')
+    text = _NON_ALNUM_RE.sub('', text)
+    text = _SPACE_RE.sub(' ', text)
+    return text.strip()
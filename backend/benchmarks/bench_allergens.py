@@ -0,0 +1,91 @@
+"""
+Throughput of allergen detection over every ingredient list in recipes.csv:
+the compiled AllergenMatcher vs the previous per-synonym substring loop.
+
+Correctness checks (false positives such as "butternut", compounds such as
+"cheesecake") are in tests/test_allergen_utils.py.
+
+    cd backend
+    python -m benchmarks.bench_allergens
+    python -m benchmarks.bench_allergens --repeat 3 --json allergens.json
+"""
+import argparse
+import json
+import time
+from typing import List
+
+import pandas as pd
+
+from app.config import settings
+from app.services.recipe_store import parse_list_value
+from app.utils.allergen_utils import ALLERGEN_SYNONYMS, detect_allergens
+
+CATEGORIES = list(ALLERGEN_SYNONYMS)
+
+
+def substring_detect(ingredients: List[str], exclude_list: List[str]) -> List[str]:
+    # the pre-AllergenMatcher implementation, kept as the baseline
+    text = " ".join(ingredients).lower()
+    found = set()
+    for category in exclude_list:
+        for syn in ALLERGEN_SYNONYMS.get(category.lower(), [category.lower()]):
+            if syn in text:
+                found.add(category)
+                break
+    return list(found)
+
+
+def load_ingredient_lists(path: str) -> List[List[str]]:
+    df = pd.read_csv(path, usecols=["ingredients"])
+    return [[str(i) for i in parse_list_value(v)] for v in df["ingredients"]]
+
+
+def time_it(fn, lists, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for ingredients in lists:
+            fn(ingredients, CATEGORIES)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Allergen matcher throughput")
+    parser.add_argument("--data", default=settings.DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    lists = load_ingredient_lists(args.data)
+    n_items = sum(len(lst) for lst in lists)
+
+    rows = []
+    for name, fn in (("substring", substring_detect), ("matcher", detect_allergens)):
+        seconds = time_it(fn, lists, args.repeat)
+        rows.append(
+            {
+                "impl": name,
+                "recipes": len(lists),
+                "ingredients": n_items,
+                "seconds": round(seconds, 3),
+                "recipes_per_s": round(len(lists) / seconds),
+            }
+        )
+    flagged = sum(
+        1
+        for lst in lists
+        if sorted(substring_detect(lst, CATEGORIES)) != sorted(detect_allergens(lst, CATEGORIES))
+    )
+
+    print(f"{'impl':<10} {'recipes':>8} {'seconds':>8} {'recipes/s':>10}")
+    for r in rows:
+        print(f"{r['impl']:<10} {r['recipes']:>8} {r['seconds']:>8} {r['recipes_per_s']:>10}")
+    print(f"recipes where the two disagree: {flagged}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"results": rows, "disagreements": flagged}, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
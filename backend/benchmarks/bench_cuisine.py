@@ -0,0 +1,104 @@
+"""
+Accuracy and latency of cuisine detection: local k-NN vote vs the LLM.
+
+Samples labelled recipes from the built index, uses their cleaned
+ingredient lists as queries, and compares each detector's answer with the
+recipe's label. The recipe itself is excluded from its own neighbours.
+The labels are the zero-shot predictions made during preprocessing, so read
+"accuracy" as agreement with them.
+
+    cd backend
+    python -m benchmarks.bench_cuisine --samples 200          # needs Ollama
+    python -m benchmarks.bench_cuisine --samples 2000 --skip-llm
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import numpy as np
+
+from app.config import settings
+from app.services.cuisine_classifier import KNNCuisineClassifier
+from app.services.llm_router import LLMRouter
+from app.services.vector_index import RecipeVectorIndex
+from app.utils.cuisine_utils import detect_cuisine
+from app.utils.text_utils import clean_ingredient
+
+
+def summarize(name: str, correct: list, latencies_ms: list) -> dict:
+    latencies_ms = sorted(latencies_ms)
+    return {
+        "detector": name,
+        "samples": len(correct),
+        "accuracy": round(sum(correct) / len(correct), 4) if correct else 0.0,
+        "p50_ms": round(statistics.median(latencies_ms), 2) if latencies_ms else None,
+        "p95_ms": (
+            round(latencies_ms[int(0.95 * (len(latencies_ms) - 1))], 2)
+            if latencies_ms
+            else None
+        ),
+    }
+
+
+async def run(samples: int, skip_llm: bool, k: int) -> list:
+    engine = RecipeVectorIndex()
+    store = engine.store
+    if not store.has_cuisine:
+        raise SystemExit(f"recipes.csv has no {settings.CUISINE_COLUMN!r} labels")
+
+    labelled = np.flatnonzero(np.asarray(store.cuisine_codes) >= 0)
+    rng = np.random.default_rng(0)
+    picks = rng.choice(labelled, size=min(samples, len(labelled)), replace=False)
+    classifier = KNNCuisineClassifier(engine, k=k)
+    llm = LLMRouter()
+
+    results = {"knn": ([], []), "llm": ([], [])}
+    for row in picks.tolist():
+        label = store.cuisine_labels[int(store.cuisine_codes[row])].lower()
+        ingredients = [clean_ingredient(i) for i in store.ingredients[row]]
+
+        t0 = time.perf_counter()
+        query_vec = await engine.embedder.embed(" ".join(ingredients))
+        pred = classifier.predict_vector(query_vec, exclude_ids=[row])
+        results["knn"][1].append(1000 * (time.perf_counter() - t0))
+        results["knn"][0].append((pred.cuisine or "").lower() == label)
+
+        if not skip_llm:
+            t0 = time.perf_counter()
+            detected = await detect_cuisine(ingredients, llm)
+            results["llm"][1].append(1000 * (time.perf_counter() - t0))
+            results["llm"][0].append(str(detected).lower() == label)
+
+    engine.embedder.close()
+    await llm.aclose()
+    return [
+        summarize(name, correct, latencies)
+        for name, (correct, latencies) in results.items()
+        if correct
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local k-NN vs LLM cuisine detection")
+    parser.add_argument("--samples", type=int, default=200)
+    parser.add_argument("--k", type=int, default=settings.CUISINE_KNN_K)
+    parser.add_argument("--skip-llm", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args.samples, args.skip_llm, args.k))
+    print(f"{'detector':<10} {'samples':>8} {'accuracy':>9} {'p50 ms':>9} {'p95 ms':>9}")
+    for r in rows:
+        print(
+            f"{r['detector']:<10} {r['samples']:>8} {r['accuracy']:>9} "
+            f"{r['p50_ms']:>9} {r['p95_ms']:>9}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of ingredient cleaning / parsing over every ingredient line in
+recipes.csv: the old per-call clean_ingredient (unit regex rebuilt on every
+call), the precompiled clean_ingredient, the batched clean_ingredients, and
+the structured parse_ingredients.
+
+    cd backend
+    python -m benchmarks.bench_ingredient_parser
+    python -m benchmarks.bench_ingredient_parser --json parser.json
+"""
+import argparse
+import json
+import re
+import time
+from typing import List
+
+import pandas as pd
+
+from app.config import settings
+from app.services.recipe_store import parse_list_value
+from app.utils.ingredient_parser import parse_ingredients
+from app.utils.text_utils import UNITS, clean_ingredient, clean_ingredients
+
+
+def clean_ingredient_uncompiled(ingredient: str) -> str:
+    # the previous implementation, kept as the baseline
+    ingredient = ingredient.lower()
+    ingredient = re.sub(r'\b\d+\b', '', ingredient)
+    ingredient = re.sub(r'\d+\/\d+', '', ingredient)
+    unit_pattern = r'\b(?:' + '|'.join(list(UNITS)) + r')\b'
+    ingredient = re.sub(unit_pattern, '', ingredient)
+    ingredient = re.sub(r'[^\w\s]', '', ingredient)
+    ingredient = re.sub(r'\s+', ' ', ingredient).strip()
+    return ingredient
+
+
+def load_lines(path: str) -> List[str]:
+    df = pd.read_csv(path, usecols=["ingredients"])
+    return [str(i) for v in df["ingredients"] for i in parse_list_value(v)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingredient parser throughput")
+    parser.add_argument("--data", default=settings.DATA_PATH)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    lines = load_lines(args.data)
+    impls = {
+        "per_call_uncompiled": lambda xs: [clean_ingredient_uncompiled(x) for x in xs],
+        "per_call_compiled": lambda xs: [clean_ingredient(x) for x in xs],
+        "bulk_clean": clean_ingredients,
+        "bulk_structured": parse_ingredients,
+    }
+
+    if clean_ingredients(lines) != [clean_ingredient(x) for x in lines]:
+        raise SystemExit("clean_ingredients disagrees with clean_ingredient")
+
+    rows = []
+    for name, fn in impls.items():
+        best = float("inf")
+        for _ in range(args.repeat):
+            t0 = time.perf_counter()
+            fn(lines)
+            best = min(best, time.perf_counter() - t0)
+        rows.append(
+            {
+                "impl": name,
+                "lines": len(lines),
+                "seconds": round(best, 3),
+                "lines_per_s": round(len(lines) / best),
+            }
+        )
+
+    print(f"{'impl':<22} {'lines':>9} {'seconds':>8} {'lines/s':>10}")
+    for r in rows:
+        print(f"{r['impl']:<22} {r['lines']:>9} {r['seconds']:>8} {r['lines_per_s']:>10}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
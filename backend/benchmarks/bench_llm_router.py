@@ -0,0 +1,173 @@
+"""
+LLM router against a pool of local fake Ollama hosts (benchmarks/fake_ollama.py).
+
+Three stand-in hosts: two serve the recipe model, one of them with twice
+the latency, and a third serves only the small cuisine model. The run has
+three phases:
+  balance   recipe and cuisine calls at a fixed concurrency
+  failover  the fast recipe host goes down halfway through; no call may fail
+  recovery  it comes back; the health check closes its circuit again
+For each phase it reports latency, the share of calls per host and the
+breaker states, then checks that cuisine calls only reached the small-model
+host, that the slow host got fewer calls than the fast one, and that failover
+and recovery happened. Exits non-zero if a check fails.
+
+    cd backend
+    python -m benchmarks.bench_llm_router --calls 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+from typing import Dict, List
+
+from app.services.llm_client import LLMError
+from app.services.llm_router import LLMBackend, LLMRouter
+from benchmarks.fake_ollama import FakeOllama, serve
+
+RECIPE_MODEL = "recipe-large"
+CUISINE_MODEL = "cuisine-small"
+
+
+async def run_calls(router: LLMRouter, calls: int, concurrency: int, on_half=None) -> dict:
+    latencies: Dict[str, List[float]] = {"recipe": [], "cuisine": []}
+    errors: List[str] = []
+    issued = 0
+
+    async def worker():
+        nonlocal issued
+        while issued < calls:
+            n = issued
+            issued += 1
+            if on_half is not None and n == calls // 2:
+                on_half()
+            # one cuisine call per four recipes, like /recipes/generate
+            kind = "cuisine" if n % 5 == 4 else "recipe"
+            t0 = time.perf_counter()
+            try:
+                if kind == "cuisine":
+                    await router.generate('{ "cuisine": string }', model=CUISINE_MODEL)
+                else:
+                    await router.generate("recipe", model=RECIPE_MODEL)
+            except LLMError as e:
+                errors.append(str(e))
+                continue
+            latencies[kind].append((time.perf_counter() - t0) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    row = {"errors": len(errors)}
+    for kind, values in latencies.items():
+        values.sort()
+        if values:
+            row[f"{kind}_p50_ms"] = round(statistics.median(values), 1)
+            row[f"{kind}_p95_ms"] = round(values[int(0.95 * (len(values) - 1))], 1)
+    return row
+
+
+def snapshot(router: LLMRouter, names: List[str], before: Dict[str, int]) -> dict:
+    return {
+        name: {"calls": b.requests - before.get(name, 0), "state": b.state}
+        for name, b in zip(names, router.backends)
+    }
+
+
+async def run(args) -> dict:
+    hosts = {
+        "fast": FakeOllama(args.first_token_ms, args.tokens_per_s, models=[RECIPE_MODEL]),
+        "slow": FakeOllama(2 * args.first_token_ms, args.tokens_per_s / 2, models=[RECIPE_MODEL]),
+        "small": FakeOllama(args.first_token_ms / 4, 4 * args.tokens_per_s, models=[CUISINE_MODEL]),
+    }
+    servers = {name: serve("127.0.0.1", 0, model) for name, model in hosts.items()}
+    names = list(hosts)
+    router = LLMRouter(
+        backends=[
+            LLMBackend(
+                f"http://127.0.0.1:{servers[name].server_address[1]}/api/generate",
+                max_concurrency=args.backend_concurrency,
+                max_retries=0,
+                failure_threshold=2,
+                cooldown=args.cooldown,
+            )
+            for name in names
+        ],
+        model=RECIPE_MODEL,
+        health_interval=args.health_interval,
+    )
+    report = {}
+    try:
+        await router.check_health()
+        router.start()
+        for phase, on_half in (
+            ("balance", None),
+            ("failover", lambda: setattr(hosts["fast"], "down", True)),
+        ):
+            before = {n: b.requests for n, b in zip(names, router.backends)}
+            row = await run_calls(router, args.calls, args.concurrency, on_half)
+            row["backends"] = snapshot(router, names, before)
+            report[phase] = row
+
+        hosts["fast"].down = False
+        # the health check probes it within one interval
+        await asyncio.sleep(args.health_interval * 2 + 0.1)
+        before = {n: b.requests for n, b in zip(names, router.backends)}
+        row = await run_calls(router, args.calls, args.concurrency)
+        row["backends"] = snapshot(router, names, before)
+        report["recovery"] = row
+    finally:
+        await router.aclose()
+        for server in servers.values():
+            server.shutdown()
+            server.server_close()
+
+    balance = report["balance"]["backends"]
+    report["checks"] = {
+        "cuisine_only_on_small_host": (
+            report["balance"]["backends"]["small"]["calls"] == args.calls // 5
+        ),
+        "slow_host_gets_fewer_calls": balance["slow"]["calls"] < balance["fast"]["calls"],
+        "no_errors_during_failover": report["failover"]["errors"] == 0,
+        "circuit_opened_on_failure": report["failover"]["backends"]["fast"]["state"] != "closed",
+        "circuit_closed_after_recovery": (
+            report["recovery"]["backends"]["fast"]["state"] == "closed"
+            and report["recovery"]["backends"]["fast"]["calls"] > 0
+        ),
+    }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LLM router against fake Ollama hosts")
+    parser.add_argument("--calls", type=int, default=200, help="per phase")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--backend-concurrency", type=int, default=4)
+    parser.add_argument("--first-token-ms", type=float, default=20.0)
+    parser.add_argument("--tokens-per-s", type=float, default=2000.0)
+    parser.add_argument("--health-interval", type=float, default=0.5)
+    parser.add_argument("--cooldown", type=float, default=30.0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    for phase in ("balance", "failover", "recovery"):
+        row = report[phase]
+        calls = ", ".join(
+            f"{n}={b['calls']} ({b['state']})" for n, b in row["backends"].items()
+        )
+        print(
+            f"{phase:<9} errors={row['errors']:<3} "
+            f"recipe p50/p95={row.get('recipe_p50_ms')}/{row.get('recipe_p95_ms')} ms  "
+            f"cuisine p50/p95={row.get('cuisine_p50_ms')}/{row.get('cuisine_p95_ms')} ms  "
+            f"{calls}"
+        )
+    for name, ok in report["checks"].items():
+        print(f"{'ok ' if ok else 'FAIL'} {name}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    if not all(report["checks"].values()):
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
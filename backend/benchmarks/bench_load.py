@@ -0,0 +1,327 @@
+"""
+End-to-end load test of the API against a fake Ollama.
+
+Generates a synthetic recipes.csv (benchmarks/synthetic_recipes.py) and
+builds its index, unless they already exist. Then it starts the fake
+Ollama server (benchmarks/fake_ollama.py) and the API under uvicorn, each
+in its own process. It measures startup until /health and /ready answer,
+then drives each endpoint at fixed concurrency levels with a fixed number
+of requests per level. Results are written to a JSON file:
+p50/p95/p99/mean latency, requests/s and errors per (endpoint,
+concurrency), startup times, the server's peak RSS, and the git commit.
+Pass an earlier file as --baseline to print the change per row.
+
+    cd backend
+    python -m benchmarks.bench_load --rows 20000 --out bench_main.json
+    git checkout my-branch
+    python -m benchmarks.bench_load --rows 20000 --out bench_branch.json \\
+        --baseline bench_main.json
+
+The work directory (default /tmp/recipe-bench) keeps the CSV and the index
+between runs, so only the first run pays for the build. The generation
+cache is off unless --generation-cache is given, so every /recipes/generate
+reaches the LLM.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.synthetic_recipes import sample_queries, write_csv
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+ENDPOINTS = ("search", "generate", "parse")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+def peak_rss_mb(pid: int) -> Optional[float]:
+    """
+    Peak resident set size of a running process (Linux only).
+    """
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=BACKEND_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        return out.stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def wait_for(url: str, deadline_s: float, proc: Optional[subprocess.Popen] = None) -> float:
+    """
+    Poll url until it answers 200; returns when that happened (perf_counter).
+    """
+    end = time.perf_counter() + deadline_s
+    while time.perf_counter() < end:
+        if proc is not None and proc.poll() is not None:
+            raise SystemExit(f"process exited with {proc.returncode} while waiting for {url}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return time.perf_counter()
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.05)
+    raise SystemExit(f"timed out waiting for {url}")
+
+
+def request_bodies(endpoint: str, n: int) -> List[tuple]:
+    """
+    (path, JSON body) per request. Queries repeat (one distinct query per
+    four requests), like real traffic, so caches see some reuse.
+    """
+    queries = sample_queries(max(1, n // 4))
+    out = []
+    for i in range(n):
+        ingredients = queries[i % len(queries)]
+        if endpoint == "search":
+            out.append(("/recipes/search", {"ingredients": ingredients, "top_k": 5}))
+        elif endpoint == "generate":
+            out.append(("/recipes/generate", {"ingredients": ingredients}))
+        else:
+            out.append(("/parse-ingredients/", [f"2 cups {x}, chopped" for x in ingredients]))
+    return out
+
+
+async def drive(
+    base_url: str, endpoint: str, concurrency: int, requests: int, timeout: float
+) -> dict:
+    bodies = request_bodies(endpoint, requests)
+    latencies: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = 0
+
+    async def worker(client: httpx.AsyncClient):
+        nonlocal next_index
+        while next_index < len(bodies):
+            path, body = bodies[next_index]
+            next_index += 1
+            t0 = time.perf_counter()
+            try:
+                resp = await client.post(path, json=body)
+                if resp.status_code >= 400:
+                    key = f"HTTP {resp.status_code}"
+                    errors[key] = errors.get(key, 0) + 1
+                    continue
+            except httpx.HTTPError as e:
+                errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                continue
+            latencies.append((time.perf_counter() - t0) * 1000)
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=timeout) as client:
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        wall_s = time.perf_counter() - started
+
+    latencies.sort()
+    row = {
+        "endpoint": endpoint,
+        "concurrency": concurrency,
+        "requests": requests,
+        "ok": len(latencies),
+        "errors": errors,
+        "wall_s": round(wall_s, 3),
+        "rps": round(len(latencies) / wall_s, 2) if wall_s else 0.0,
+    }
+    if latencies:
+        row.update(
+            {
+                "p50_ms": round(percentile(latencies, 0.50), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+                "mean_ms": round(statistics.fmean(latencies), 2),
+            }
+        )
+    return row
+
+
+def prepare_data(args, env: dict) -> dict:
+    """
+    Write the CSV and build its index if needed; returns timings.
+    """
+    timings = {}
+    csv_path = Path(env["DATA_PATH"])
+    if not csv_path.exists():
+        t0 = time.perf_counter()
+        write_csv(str(csv_path), args.rows, args.seed)
+        timings["csv_s"] = round(time.perf_counter() - t0, 3)
+    t0 = time.perf_counter()
+    cmd = [sys.executable, "-m", "app.services.index_builder"]
+    if args.build_workers:
+        cmd += ["--workers", str(args.build_workers)]
+    subprocess.run(cmd, cwd=BACKEND_DIR, env=env, check=True)
+    timings["index_build_s"] = round(time.perf_counter() - t0, 3)
+    return timings
+
+
+def compare(results: List[dict], baseline_path: str) -> None:
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = json.load(f)
+    before = {(r["endpoint"], r["concurrency"]): r for r in baseline["results"]}
+    print(f"\nvs {baseline_path} ({baseline['meta'].get('git_commit')}):")
+    print(f"{'endpoint':<10} {'conc':>5} {'p50':>9} {'p95':>9} {'p99':>9} {'rps':>9}")
+
+    def delta(new, old, key):
+        if key not in new or key not in old or not old[key]:
+            return "n/a"
+        return f"{100 * (new[key] - old[key]) / old[key]:+.1f}%"
+
+    for r in results:
+        old = before.get((r["endpoint"], r["concurrency"]))
+        if old is None:
+            continue
+        print(
+            f"{r['endpoint']:<10} {r['concurrency']:>5} {delta(r, old, 'p50_ms'):>9} "
+            f"{delta(r, old, 'p95_ms'):>9} {delta(r, old, 'p99_ms'):>9} {delta(r, old, 'rps'):>9}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API against a fake Ollama")
+    parser.add_argument("--workdir", default="/tmp/recipe-bench")
+    parser.add_argument("--rows", type=int, default=10000, help="synthetic CSV size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--csv", help="use this recipes.csv instead of a synthetic one")
+    parser.add_argument("--build-workers", type=int, default=None)
+    parser.add_argument("--endpoints", default=",".join(ENDPOINTS))
+    parser.add_argument("--concurrency", default="1,8,32")
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint and level")
+    parser.add_argument("--generate-requests", type=int, default=None,
+                        help="per level for /recipes/generate (default: --requests)")
+    parser.add_argument("--warmup", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-s", type=float, default=200.0)
+    parser.add_argument("--prompt-tokens-per-s", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--generation-cache", action="store_true")
+    parser.add_argument("--out", default="bench_load.json")
+    parser.add_argument("--baseline", help="earlier --out file to compare with")
+    args = parser.parse_args()
+
+    workdir = Path(args.workdir).resolve()
+    csv_path = (
+        Path(args.csv).resolve()
+        if args.csv
+        else workdir / f"recipes_{args.rows}_{args.seed}.csv"
+    )
+    env = {
+        **os.environ,
+        "DATA_PATH": str(csv_path),
+        "INDEX_DIR": str(workdir / f"index_{csv_path.stem}"),
+        "OLLAMA_URL": f"http://127.0.0.1:{args.ollama_port}/api/generate",
+        "GENERATION_CACHE_PATH": (
+            str(workdir / "generation_cache.sqlite3") if args.generation_cache else ""
+        ),
+        "PYTHONUNBUFFERED": "1",
+    }
+    prepare = prepare_data(args, env)
+
+    ollama = subprocess.Popen(
+        [
+            sys.executable, "-m", "benchmarks.fake_ollama",
+            "--port", str(args.ollama_port),
+            "--first-token-ms", str(args.first_token_ms),
+            "--tokens-per-s", str(args.tokens_per_s),
+            "--prompt-tokens-per-s", str(args.prompt_tokens_per_s),
+            "--malformed-rate", str(args.malformed_rate),
+            "--seed", str(args.seed),
+        ],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+    )
+    server = None
+    try:
+        wait_for(f"http://127.0.0.1:{args.ollama_port}/api/tags", 30, ollama)
+        base_url = f"http://127.0.0.1:{args.port}"
+        t0 = time.perf_counter()
+        server = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--port", str(args.port), "--log-level", "warning",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        startup = {"health_s": round(wait_for(f"{base_url}/health", 300, server) - t0, 3)}
+        startup["ready_s"] = round(wait_for(f"{base_url}/ready", 600, server) - t0, 3)
+        startup["rss_ready_mb"] = peak_rss_mb(server.pid)
+
+        results = []
+        for endpoint in args.endpoints.split(","):
+            n = args.requests
+            if endpoint == "generate" and args.generate_requests:
+                n = args.generate_requests
+            if args.warmup:
+                asyncio.run(drive(base_url, endpoint, 1, args.warmup, args.timeout))
+            for level in (int(c) for c in args.concurrency.split(",")):
+                row = asyncio.run(drive(base_url, endpoint, level, n, args.timeout))
+                results.append(row)
+                print(
+                    f"{endpoint:<10} c={level:<4} rps={row['rps']:<9} "
+                    f"p50={row.get('p50_ms')} p95={row.get('p95_ms')} "
+                    f"p99={row.get('p99_ms')} errors={sum(row['errors'].values())}",
+                    flush=True,
+                )
+        peak = peak_rss_mb(server.pid)
+        ollama_stats = httpx.get(f"http://127.0.0.1:{args.ollama_port}/stats").json()
+    finally:
+        for proc in (server, ollama):
+            if proc is not None:
+                proc.terminate()
+                proc.wait(timeout=30)
+
+    report = {
+        "meta": {
+            "git_commit": git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "csv": str(csv_path),
+            "args": vars(args),
+        },
+        "prepare": prepare,
+        "startup": startup,
+        "server": {"peak_rss_mb": peak},
+        "fake_ollama": ollama_stats,
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {args.out}")
+    if args.baseline:
+        compare(results, args.baseline)
+
+
+if __name__ == "__main__":
+    main()
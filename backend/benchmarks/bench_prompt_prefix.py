@@ -0,0 +1,166 @@
+"""
+Prefill cost of recipe prompts: the old layout vs the static-prefix layout.
+
+The old prompt put the request's ingredients in its second line, ahead of
+the fixed instructions and schema, so no two requests shared more than the
+first line and Ollama re-evaluated almost the whole prompt every time. The
+new layout sends the fixed part first (RECIPE_SYSTEM_PROMPT as `system`,
+with keep_alive), so only the per-request suffix is evaluated once the
+prefix is cached. The grounded variant adds three recipes per request as
+examples (different ones each time, as search hits would be), to show what
+grounding costs in prefill.
+
+Sends the same ingredient lists, one at a time, through each layout and
+reports prompt_eval_count and prompt_eval time per call. These come from
+the server, so against real Ollama they show actual cache reuse:
+
+    cd backend
+    python -m benchmarks.bench_prompt_prefix --url http://localhost:11434/api/generate
+    python -m benchmarks.bench_prompt_prefix     # built-in fake Ollama, CPU-like prefill
+
+The first call of each layout fills the cache and is left out of the means.
+"""
+import argparse
+import asyncio
+import json
+import statistics
+from typing import List, Optional
+
+from app.config import settings
+from app.services.llm_client import OllamaClient
+from app.services.recipe_generator import (
+    RECIPE_SYSTEM_PROMPT,
+    build_recipe_prompt,
+    output_format,
+)
+from app.services.recipe_store import parse_list_value
+from benchmarks.fake_ollama import FakeOllama, serve
+from benchmarks.synthetic_recipes import make_frame, sample_queries
+
+
+def legacy_prompt(ingredients: List[str], cuisine: Optional[str] = None) -> str:
+    # build_recipe_prompt before the static prefix was split out
+    constraint_text = f"Please style the recipe in {cuisine} cuisine." if cuisine else ""
+    return (
+        "You are a world-renowned chef with over 20 years of experience.\n"
+        "Using only these ingredients: "
+        f"{', '.join(ingredients)}, create a complete, original recipe.\n"
+        f"{constraint_text}\n\n"
+        "Respond with ONLY a single JSON object that begins with '{' and ends with '}'.\n"
+        "Do NOT include any markdown fences (```), bullets, or extra text.\n\n"
+        "The JSON schema:\n"
+        "{\n"
+        '  "title": string,\n'
+        '  "prep_time": string,\n'
+        '  "cook_time": string,\n'
+        '  "servings": string,\n'
+        '  "ingredients": [list of strings],\n'
+        '  "instructions": [list of strings]\n'
+        "}\n"
+    )
+
+
+def example_recipes(n: int) -> List[dict]:
+    frame = make_frame(n, seed=7)
+    return [
+        {"title": row.title, "ingredients": parse_list_value(row.ingredients)}
+        for row in frame.itertuples()
+    ]
+
+
+def requests_for(layout: str, queries: List[List[str]], cuisine: str):
+    examples = example_recipes(3 * len(queries))
+    for i, ingredients in enumerate(queries):
+        if layout == "legacy":
+            yield legacy_prompt(ingredients, cuisine), {}
+        else:
+            prompt = build_recipe_prompt(
+                ingredients,
+                cuisine=cuisine,
+                examples=examples[3 * i : 3 * i + 3] if layout == "prefix+grounding" else None,
+            )
+            yield prompt, {"system": RECIPE_SYSTEM_PROMPT}
+
+
+async def run_layout(client: OllamaClient, layout: str, queries, cuisine: str, model: str):
+    rows = []
+    for prompt, extra in requests_for(layout, queries, cuisine):
+        fmt = output_format()
+        if fmt is not None:
+            extra["format"] = fmt
+        body = await client.generate(prompt, model=model, **extra)
+        rows.append(
+            {
+                "prompt_chars": len(prompt) + len(extra.get("system", "")),
+                "prompt_eval_count": body.get("prompt_eval_count") or 0,
+                "prompt_eval_ms": (body.get("prompt_eval_duration") or 0) / 1e6,
+                "total_ms": (body.get("total_duration") or 0) / 1e6,
+            }
+        )
+    # the first call fills the cache
+    steady = rows[1:] or rows
+    return {
+        "layout": layout,
+        "calls": len(rows),
+        "first_prompt_eval_count": rows[0]["prompt_eval_count"],
+        **{
+            f"mean_{key}": round(statistics.fmean(r[key] for r in steady), 1)
+            for key in ("prompt_chars", "prompt_eval_count", "prompt_eval_ms", "total_ms")
+        },
+    }
+
+
+async def run(args) -> List[dict]:
+    server = None
+    url = args.url
+    if url is None:
+        fake = FakeOllama(
+            first_token_ms=5, tokens_per_s=0, prompt_tokens_per_s=args.fake_prefill_rate
+        )
+        server = serve("127.0.0.1", 0, fake)
+        url = f"http://127.0.0.1:{server.server_address[1]}/api/generate"
+    client = OllamaClient(url=url, timeout=600)
+    queries = sample_queries(args.requests, seed=args.seed)
+    try:
+        return [
+            await run_layout(client, layout, queries, args.cuisine, args.model)
+            for layout in ("legacy", "prefix", "prefix+grounding")
+        ]
+    finally:
+        await client.aclose()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prompt prefix reuse: prefill before/after")
+    parser.add_argument("--url", help="Ollama /api/generate URL (default: built-in fake)")
+    parser.add_argument("--model", default=settings.MODEL_NAME)
+    parser.add_argument("--requests", type=int, default=20, help="per layout")
+    parser.add_argument("--cuisine", default="Italian")
+    parser.add_argument("--seed", type=int, default=3)
+    parser.add_argument(
+        "--fake-prefill-rate", type=float, default=100.0, help="fake server, prompt tokens/s"
+    )
+    parser.add_argument("--json", help="also write the rows to this file")
+    args = parser.parse_args()
+
+    rows = asyncio.run(run(args))
+    print(
+        f"{'layout':<18} {'chars':>7} {'first eval':>11} {'eval tokens':>12} "
+        f"{'eval ms':>9} {'total ms':>10}"
+    )
+    for r in rows:
+        print(
+            f"{r['layout']:<18} {r['mean_prompt_chars']:>7} {r['first_prompt_eval_count']:>11} "
+            f"{r['mean_prompt_eval_count']:>12} {r['mean_prompt_eval_ms']:>9} "
+            f"{r['mean_total_ms']:>10}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(rows, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Per-request result materialization: DataFrame.iloc().copy() vs RecipeStore.
+
+Each variant runs in its own process so resident memory is comparable.
+
+    cd backend
+    python -m benchmarks.bench_recipe_store --csv app/data/recipes.csv
+"""
+import argparse
+import json
+import multiprocessing as mp
+import resource
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.services.recipe_store import RecipeStore, parse_list_value
+
+COLUMNS = ["title", "ingredients", "instructions", "prep_time", "cook_time", "servings"]
+
+
+def rss_mb() -> float:
+    """
+    Current resident set size; falls back to peak RSS off Linux.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def load_dataframe(csv_path: str):
+    df = pd.read_csv(csv_path)
+    for col in ("ingredients", "instructions"):
+        df[col] = df[col].apply(parse_list_value)
+
+    def materialize(ids):
+        # the pre-RecipeStore code path from RecipeVectorIndex.retrieve
+        hits = df.iloc[ids].copy().reset_index(drop=True)
+        hits["prep_time"] = hits.get("predicted_prep_time_rounded")
+        hits["cook_time"] = hits.get("predicted_cook_time_rounded")
+        hits["servings"] = hits.get("estimated_servings")
+        return hits[COLUMNS].to_dict(orient="records")
+
+    return len(df), materialize
+
+
+def load_store(csv_path: str):
+    df = pd.read_csv(csv_path)
+    store = RecipeStore.from_frame(df)
+    del df
+    return len(store), store.gather
+
+
+def run_variant(variant: str, csv_path: str, requests: int, top_k: int, out):
+    base = rss_mb()
+    t0 = time.perf_counter()
+    n, materialize = (load_dataframe if variant == "dataframe" else load_store)(csv_path)
+    load_s = time.perf_counter() - t0
+    loaded = rss_mb()
+
+    rng = np.random.default_rng(0)
+    latencies = []
+    for _ in range(requests):
+        ids = rng.integers(0, n, size=top_k)
+        t0 = time.perf_counter()
+        materialize(ids)
+        latencies.append((time.perf_counter() - t0) * 1e6)
+    latencies.sort()
+
+    out.put(
+        {
+            "variant": variant,
+            "rows": n,
+            "load_s": round(load_s, 3),
+            "rss_delta_mb": round(loaded - base, 1),
+            "p50_us": round(statistics.median(latencies), 1),
+            "p95_us": round(latencies[int(0.95 * (len(latencies) - 1))], 1),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="RecipeStore vs DataFrame materialization")
+    parser.add_argument("--csv", default=settings.DATA_PATH)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    ctx = mp.get_context("spawn")
+    results = []
+    for variant in ("dataframe", "store"):
+        out = ctx.Queue()
+        proc = ctx.Process(
+            target=run_variant, args=(variant, args.csv, args.requests, args.top_k, out)
+        )
+        proc.start()
+        results.append(out.get())
+        proc.join()
+
+    print(f"{'variant':<10} {'rows':>9} {'load s':>8} {'RSS MB':>8} {'p50 us':>9} {'p95 us':>9}")
+    for r in results:
+        print(
+            f"{r['variant']:<10} {r['rows']:>9} {r['load_s']:>8} {r['rss_delta_mb']:>8} "
+            f"{r['p50_us']:>9} {r['p95_us']:>9}"
+        )
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Stand-in for Ollama's /api/generate, for load tests without a GPU.
+
+Answers like Ollama does: the non-streaming JSON body or NDJSON chunks,
+with prompt_eval_count / eval_count and *_duration fields. Latency is
+modelled as a fixed time to the first token, plus prefill at
+--prompt-tokens-per-s, plus eval at a fixed token rate. Like Ollama's
+runner, it keeps the last prompt per model (`system` + prompt) and prefills
+only the part past the prefix shared with it, unless keep_alive is 0.
+Recipes follow the `format` schema the app sends (only its properties, so
+field retries get just the fields they asked for). Cuisine prompts get a
+cuisine. A share of responses (--malformed-rate) come back broken the way
+real models break them: fenced, with trailing commas, or cut off. With
+--models, /api/tags lists those and other models get Ollama's 404, so
+several instances can stand in for a pool of hosts (see bench_llm_router).
+
+Standard library only, so it runs anywhere the benchmark does:
+    cd backend
+    python -m benchmarks.fake_ollama --port 11500 --first-token-ms 200 --tokens-per-s 50
+"""
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Optional, Tuple
+
+CUISINES = ["Italian", "Mexican", "Indian", "Chinese", "French", "Thai", "American"]
+
+# roughly what a llama tokenizer does with English text
+CHARS_PER_TOKEN = 4
+
+
+def _recipe(rng: random.Random, fields: Optional[List[str]] = None) -> dict:
+    steps = rng.randint(4, 8)
+    recipe = {
+        "title": f"Benchmark {rng.choice(CUISINES)} Skillet",
+        "prep_time": f"{rng.randint(5, 30)} minutes",
+        "cook_time": f"{rng.randint(10, 60)} minutes",
+        "servings": str(rng.randint(2, 6)),
+        "ingredients": [
+            f"{rng.randint(1, 3)} cups ingredient {i}" for i in range(rng.randint(5, 10))
+        ],
+        "instructions": [
+            f"Step {i + 1}: stir everything together and cook until done." for i in range(steps)
+        ],
+    }
+    if fields:
+        return {k: v for k, v in recipe.items() if k in fields}
+    return recipe
+
+
+def _malformed(text: str, rng: random.Random) -> str:
+    kind = rng.choice(("fence", "trailing_comma", "truncated"))
+    if kind == "fence":
+        return f"Here is your recipe:\n```json\n{text}\n```"
+    if kind == "trailing_comma":
+        return text.replace("]", ",]", 1)
+    return text[: int(len(text) * rng.uniform(0.5, 0.9))]
+
+
+def _tokens(text: str) -> List[str]:
+    return [text[i : i + CHARS_PER_TOKEN] for i in range(0, len(text), CHARS_PER_TOKEN)]
+
+
+class FakeOllama:
+    """
+    The response model; the HTTP handler only does I/O. seed makes the
+    malformed-response sequence reproducible for a fixed request order.
+    """
+
+    def __init__(
+        self,
+        first_token_ms: float = 200.0,
+        tokens_per_s: float = 50.0,
+        malformed_rate: float = 0.0,
+        seed: int = 0,
+        models: Optional[List[str]] = None,
+        prompt_tokens_per_s: float = 0.0,
+    ):
+        self.first_token_s = first_token_ms / 1000
+        self.tokens_per_s = tokens_per_s
+        self.prompt_tokens_per_s = prompt_tokens_per_s
+        self.malformed_rate = malformed_rate
+        # None serves any model
+        self.models = models
+        # set to simulate a dead host: connections are dropped unanswered
+        self.down = False
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        # model -> last prompt text, standing in for the loaded KV cache
+        self._cached_prompt: Dict[str, str] = {}
+
+    def has_model(self, name: str) -> bool:
+        return self.models is None or name in self.models
+
+    def respond(self, payload: dict) -> str:
+        with self._lock:
+            self.requests += 1
+            rng = random.Random(self._rng.random())
+        prompt = payload.get("prompt", "")
+        if '"cuisine"' in prompt:
+            text = json.dumps({"cuisine": rng.choice(CUISINES)})
+        else:
+            fmt = payload.get("format")
+            fields = list(fmt.get("properties", {})) if isinstance(fmt, dict) else None
+            text = json.dumps(_recipe(rng, fields), indent=2)
+            if rng.random() < self.malformed_rate:
+                text = _malformed(text, rng)
+        return text
+
+    def prefill(self, payload: dict) -> Tuple[int, float]:
+        """
+        Prompt tokens to evaluate and the time that takes, given the prefix
+        cached from this model's previous request.
+        """
+        model = payload.get("model", "")
+        text = f"{payload.get('system', '')}\n{payload.get('prompt', '')}"
+        with self._lock:
+            cached = self._cached_prompt.get(model, "")
+            if str(payload.get("keep_alive", "")) in ("0", "0s"):
+                self._cached_prompt.pop(model, None)
+            else:
+                self._cached_prompt[model] = text
+        shared = len(os.path.commonprefix([cached, text]))
+        count = max(1, (len(text) - shared) // CHARS_PER_TOKEN)
+        seconds = count / self.prompt_tokens_per_s if self.prompt_tokens_per_s else 0.0
+        return count, seconds
+
+    def final_fields(
+        self, payload: dict, prompt: Tuple[int, float], tokens: int, elapsed_s: float
+    ) -> dict:
+        eval_s = tokens / self.tokens_per_s if self.tokens_per_s else 0.0
+        return {
+            "model": payload.get("model", "fake"),
+            "done": True,
+            "done_reason": "stop",
+            "prompt_eval_count": prompt[0],
+            "eval_count": tokens,
+            "load_duration": 0,
+            "prompt_eval_duration": int((self.first_token_s + prompt[1]) * 1e9),
+            "eval_duration": int(eval_s * 1e9),
+            "total_duration": int(elapsed_s * 1e9),
+        }
+
+    def stream(self, payload: dict) -> Iterator[dict]:
+        started = time.perf_counter()
+        prompt = self.prefill(payload)
+        tokens = _tokens(self.respond(payload))
+        first_token_s = self.first_token_s + prompt[1]
+        time.sleep(first_token_s)
+        per_token = 1 / self.tokens_per_s if self.tokens_per_s else 0.0
+        for i, token in enumerate(tokens):
+            # sleep to the token's due time, so the rate holds however slow
+            # writing the chunks is
+            due = started + first_token_s + i * per_token
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            yield {"model": payload.get("model", "fake"), "response": token, "done": False}
+        yield {
+            "response": "",
+            **self.final_fields(payload, prompt, len(tokens), time.perf_counter() - started),
+        }
+
+    def generate(self, payload: dict) -> dict:
+        started = time.perf_counter()
+        prompt = self.prefill(payload)
+        text = self.respond(payload)
+        tokens = len(_tokens(text))
+        eval_s = tokens / self.tokens_per_s if self.tokens_per_s else 0.0
+        time.sleep(self.first_token_s + prompt[1] + eval_s)
+        return {
+            "response": text,
+            **self.final_fields(payload, prompt, tokens, time.perf_counter() - started),
+        }
+
+
+def make_handler(model: FakeOllama):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive, like the real server
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status: int, body: dict) -> None:
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _drop(self) -> bool:
+            if model.down:
+                self.close_connection = True
+            return model.down
+
+        def do_GET(self):
+            if self._drop():
+                return
+            if self.path == "/api/tags":
+                names = model.models or []
+                self._send_json(200, {"models": [{"name": n} for n in names]})
+            elif self.path == "/stats":
+                self._send_json(200, {"requests": model.requests})
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if self._drop():
+                return
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "invalid JSON"})
+                return
+            if self.path != "/api/generate":
+                self._send_json(404, {"error": "not found"})
+                return
+            name = payload.get("model", "")
+            if not model.has_model(name):
+                self._send_json(404, {"error": f"model '{name}' not found"})
+                return
+            if not payload.get("stream", True):
+                self._send_json(200, model.generate(payload))
+                return
+
+            self.send_response(200)
+            self.send_header("Content-Type", "application/x-ndjson")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            try:
+                for chunk in model.stream(payload):
+                    line = json.dumps(chunk).encode() + b"\n"
+                    self.wfile.write(b"%x\r\n%s\r\n" % (len(line), line))
+                    self.wfile.flush()
+                self.wfile.write(b"0\r\n\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                self.close_connection = True
+
+    return Handler
+
+
+def serve(host: str, port: int, model: FakeOllama) -> ThreadingHTTPServer:
+    """
+    Start the server on a daemon thread and return it (port 0 picks a free
+    port: read server.server_address). Stop it with shutdown().
+    """
+    server = ThreadingHTTPServer((host, port), make_handler(model))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fake Ollama server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--first-token-ms", type=float, default=200.0)
+    parser.add_argument("--tokens-per-s", type=float, default=50.0, help="0 = no eval delay")
+    parser.add_argument(
+        "--prompt-tokens-per-s", type=float, default=0.0, help="prefill rate; 0 = no delay"
+    )
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--models", help="comma-separated; default: serve any model")
+    args = parser.parse_args()
+
+    models = args.models.split(",") if args.models else None
+    model = FakeOllama(
+        args.first_token_ms,
+        args.tokens_per_s,
+        args.malformed_rate,
+        args.seed,
+        models,
+        args.prompt_tokens_per_s,
+    )
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(model))
+    server.daemon_threads = True
+    print(f"fake Ollama on http://{args.host}:{server.server_address[1]}/api/generate", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Synthetic recipes.csv with the columns the app reads, at any size.
+
+Ingredients come from a fixed vocabulary with a Zipf-like popularity, so
+common ingredients (salt, garlic) hit many recipes and rare ones few, like
+real data. The same seed and size always give the same file, so results
+from different commits are comparable.
+
+    cd backend
+    python -m benchmarks.synthetic_recipes --rows 50000 --out /tmp/bench/recipes.csv
+"""
+import argparse
+import os
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+
+INGREDIENTS = [
+    "salt", "black pepper", "olive oil", "garlic", "onion", "butter", "egg",
+    "all-purpose flour", "sugar", "milk", "water", "lemon juice", "tomato",
+    "chicken breast", "ground beef", "parmesan cheese", "cheddar cheese",
+    "heavy cream", "soy sauce", "ginger", "cilantro", "basil", "oregano",
+    "cumin", "paprika", "chili powder", "rice", "pasta", "potato", "carrot",
+    "celery", "bell pepper", "mushroom", "spinach", "zucchini", "broccoli",
+    "shrimp", "salmon", "pork chop", "bacon", "tofu", "black beans",
+    "chickpeas", "coconut milk", "honey", "maple syrup", "vanilla extract",
+    "baking powder", "baking soda", "walnuts", "almonds", "peanut butter",
+    "yogurt", "sour cream", "lime", "avocado", "corn", "green onion",
+    "red wine vinegar", "dijon mustard", "mayonnaise", "bread crumbs",
+    "thyme", "rosemary", "cinnamon", "nutmeg", "brown sugar", "cocoa powder",
+    "chocolate chips", "oats", "quinoa", "lentils", "kale", "cabbage",
+    "cucumber", "feta cheese", "mozzarella", "ricotta", "sesame oil",
+    "fish sauce", "curry powder", "turmeric", "garam masala", "jalapeno",
+]
+UNITS = [
+    "1 cup", "2 cups", "1/2 cup", "1 tablespoon", "2 teaspoons", "1 pound",
+    "3 cloves", "1 pinch",
+]
+DISHES = [
+    "Skillet", "Bake", "Salad", "Soup", "Stew", "Stir-Fry", "Casserole",
+    "Tacos", "Curry", "Pasta",
+]
+CUISINES = ["Italian", "Mexican", "Indian", "Chinese", "French", "Thai", "American"]
+VERBS = ["Chop", "Mix", "Whisk", "Saute", "Simmer", "Bake", "Season", "Fold in", "Roast", "Serve"]
+
+
+def _pylist(items: List[str]) -> str:
+    # the CSV stores lists as Python literals ("['a', 'b']")
+    return repr(list(items))
+
+
+def make_frame(rows: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(INGREDIENTS) + 1)
+    weights /= weights.sum()
+
+    records = []
+    for i in range(rows):
+        names = rng.choice(INGREDIENTS, size=rng.integers(4, 13), replace=False, p=weights)
+        ingredients = [f"{UNITS[rng.integers(len(UNITS))]} {n}" for n in names]
+        steps = [
+            f"{VERBS[rng.integers(len(VERBS))]} the {n} "
+            f"and cook for {rng.integers(2, 20)} minutes."
+            for n in names[: rng.integers(3, len(names) + 1)]
+        ]
+        title = f"{names[0].title()} {DISHES[rng.integers(len(DISHES))]} {i}"
+        records.append(
+            {
+                "title": title,
+                "ingredients": _pylist(ingredients),
+                "instructions": _pylist(steps),
+                "cleaned_text": " ".join(ingredients + [title]).lower(),
+                "predicted_prep_time_rounded": int(rng.integers(1, 13)) * 5,
+                "predicted_cook_time_rounded": int(rng.integers(1, 25)) * 5,
+                "estimated_servings": int(rng.integers(1, 9)),
+                settings.CUISINE_COLUMN: CUISINES[rng.integers(len(CUISINES))],
+            }
+        )
+    return pd.DataFrame.from_records(records)
+
+
+def sample_queries(n: int, seed: int = 1) -> List[List[str]]:
+    """
+    Search/generate request ingredient lists drawn like the corpus's.
+    """
+    rng = np.random.default_rng(seed)
+    weights = 1.0 / np.arange(1, len(INGREDIENTS) + 1)
+    weights /= weights.sum()
+    return [
+        rng.choice(INGREDIENTS, size=rng.integers(2, 6), replace=False, p=weights).tolist()
+        for _ in range(n)
+    ]
+
+
+def write_csv(path: str, rows: int, seed: int = 0) -> str:
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    make_frame(rows, seed).to_csv(path, index=False)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic recipes.csv")
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    print(write_csv(args.out, args.rows, args.seed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import pytest
+
+from app.utils.allergen_utils import ALLERGEN_SYNONYMS, detect_allergens
+from app.utils.substitute import substitute_ingredients
+
+
+@pytest.mark.parametrize(
+    "ingredients, excluded, expected",
+    [
+        (["3 tbsp butter"], ["milk"], ["milk"]),
+        (["2 large eggs, beaten"], ["eggs"], ["eggs"]),
+        (["1 cup buttermilk"], ["milk"], ["milk"]),
+        (["1/2 lb prawns"], ["shellfish"], ["shellfish"]),
+        (["2 tbsp peanut butter"], ["peanuts", "milk"], ["peanuts", "milk"]),
+        (["1/4 cup pine nuts"], ["tree nuts"], ["tree nuts"]),
+        # compounds and run-together words the substring check caught
+        (["1 slice cheesecake"], ["milk"], ["milk"]),
+        (["2 cups buttercream frosting"], ["milk"], ["milk"]),
+        (["1 cup eggnog"], ["eggs"], ["eggs"]),
+        (["8 oz crabmeat"], ["shellfish"], ["shellfish"]),
+        (["4 fishcakes"], ["fish"], ["fish"]),
+        (["2 tbsp peanutbutter"], ["peanuts"], ["peanuts"]),
+        (["1 cup Soymilk"], ["soy"], ["soy"]),
+        # synonyms inside a word
+        (["1 lb catfish fillets"], ["fish"], ["fish"]),
+        (["2 swordfish steaks"], ["fish"], ["fish"]),
+        (["1 cup vanilla icecream"], ["milk"], ["milk"]),
+        (["1 cup wholewheat flour"], ["wheat"], ["wheat"]),
+    ],
+)
+def test_detects_allergens(ingredients, excluded, expected):
+    assert sorted(detect_allergens(ingredients, excluded)) == sorted(expected)
+
+
+@pytest.mark.parametrize(
+    "ingredients, excluded",
+    [
+        (["1 butternut squash, cubed"], ["milk"]),
+        (["1 buttercup squash"], ["milk"]),
+        (["2 eggplants, sliced"], ["eggs"]),
+        (["1 cup buckwheat flour"], ["wheat"]),
+        (["1 can butter beans"], ["milk"]),
+        (["1 tsp cream of tartar"], ["milk"]),
+        (["1 lb butterflied pork chops"], ["milk"]),
+        (["200 g oyster mushrooms"], ["shellfish"]),
+        (["2 coddled eggs"], ["fish"]),
+        (["1/2 cup grated Parmigiano-Reggiano"], ["eggs"]),
+        (["2 cups mixed veggies"], ["eggs"]),
+    ],
+)
+def test_ignores_lookalike_words(ingredients, excluded):
+    assert detect_allergens(ingredients, excluded) == []
+
+
+def test_custom_category_matches_anywhere():
+    assert detect_allergens(["2 kiwis"], ["kiwi"]) == ["kiwi"]
+    assert detect_allergens(["1 golden kiwifruit"], ["kiwi"]) == ["kiwi"]
+    assert detect_allergens(["1 banana"], ["kiwi"]) == []
+
+
+def test_every_category_detects_its_own_synonyms():
+    for category, words in ALLERGEN_SYNONYMS.items():
+        for word in words:
+            assert detect_allergens([f"1 cup {word}"], [category]) == [category], word
+
+
+def test_substitute_keeps_lookalike_ingredients():
+    kept = substitute_ingredients(["butternut squash", "eggplant"], ["milk", "eggs"])
+    assert kept == ["butternut squash", "eggplant"]
@@ -0,0 +1,58 @@
+import asyncio
+from types import SimpleNamespace
+
+import numpy as np
+
+from app.services.cuisine_classifier import KNNCuisineClassifier
+from app.services.vector_index import RecipeVectorIndex
+
+
+class RecordingIndex:
+    def __init__(self):
+        self.fetched = []
+
+    def search(self, query_vec, k):
+        self.fetched.append(k)
+        ids = np.arange(k, dtype="int64")[None, :]
+        return np.zeros(ids.shape, dtype="float32"), ids
+
+
+class RecordingEmbedder:
+    def __init__(self):
+        self.texts = []
+
+    async def embed(self, text):
+        self.texts.append(text)
+        return np.zeros((1, 4), dtype="float32")
+
+
+def classifier_over(rows, tombstones=()):
+    engine = SimpleNamespace(
+        index=RecordingIndex(),
+        embedder=RecordingEmbedder(),
+        delta=SimpleNamespace(tombstones=set(tombstones)),
+        store=SimpleNamespace(
+            cuisine_codes=np.zeros(rows, dtype="int16"), cuisine_labels=["Italian"]
+        ),
+        query_text=lambda terms: RecipeVectorIndex.query_text(None, terms),
+    )
+    return KNNCuisineClassifier(engine, k=5), engine
+
+
+def test_tombstone_overfetch_is_capped():
+    classifier, engine = classifier_over(1000, tombstones=range(500))
+
+    prediction = classifier.predict_vector(np.zeros((1, 4), dtype="float32"))
+
+    assert engine.index.fetched == [5 + 4 * 5]
+    # every fetched row was a tombstone: no vote rather than a huge search
+    assert prediction.cuisine is None
+
+
+def test_apredict_embeds_cleaned_ingredients():
+    classifier, engine = classifier_over(10)
+
+    prediction = asyncio.run(classifier.apredict(["2 cups Flour", "salt", "1 tsp salt"]))
+
+    assert engine.embedder.texts == ["flour salt"]
+    assert prediction.cuisine == "Italian"
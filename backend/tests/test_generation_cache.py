@@ -0,0 +1,63 @@
+import asyncio
+
+from app.services.generation_cache import GenerationCache
+
+RECIPE = {"recipe": {"title": "Soup"}}
+
+
+def make_cache(tmp_path):
+    return GenerationCache(path=str(tmp_path / "cache.sqlite3"), max_entries=10)
+
+
+def test_cancelled_leader_does_not_cancel_coalesced_waiters(tmp_path):
+    cache = make_cache(tmp_path)
+    calls = 0
+
+    async def produce():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        return RECIPE
+
+    async def scenario():
+        args = ("model", "prompt", "sig", ["salt"], produce)
+        leader = asyncio.create_task(cache.get_or_generate(*args))
+        await asyncio.sleep(0.01)
+        waiter = asyncio.create_task(cache.get_or_generate(*args))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        result = await waiter
+        assert leader.cancelled()
+        return result
+
+    assert asyncio.run(scenario()) == RECIPE
+    assert calls == 1
+    assert cache.coalesced == 1
+    assert not cache._inflight
+
+
+def test_last_cancelled_waiter_cancels_the_call(tmp_path):
+    cache = make_cache(tmp_path)
+    finished = False
+
+    async def produce():
+        nonlocal finished
+        await asyncio.sleep(1)
+        finished = True
+        return RECIPE
+
+    async def scenario():
+        caller = asyncio.create_task(
+            cache.get_or_generate("model", "prompt", "sig", ["salt"], produce)
+        )
+        await asyncio.sleep(0.01)
+        caller.cancel()
+        await asyncio.sleep(0.05)
+
+    asyncio.run(scenario())
+    assert not finished
+    assert not cache._inflight
+
+
+def test_near_duplicate_matching_is_off_by_default(tmp_path):
+    assert make_cache(tmp_path).similarity == 0
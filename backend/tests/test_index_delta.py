@@ -0,0 +1,43 @@
+import numpy as np
+
+from app.services.index_delta import IndexDelta
+
+DIM = 4
+
+
+def recipe(title):
+    return {"title": title, "ingredients": ["salt"], "instructions": ["Mix."]}
+
+
+def vecs(n):
+    return np.random.default_rng(n).random((n, DIM), dtype="float32")
+
+
+def test_writers_sharing_a_delta_never_reuse_ids(tmp_path):
+    # a running server and the CLI each hold their own IndexDelta
+    server = IndexDelta(str(tmp_path), base_rows=10, dimension=DIM, base_sha256="x")
+    cli = IndexDelta(str(tmp_path), base_rows=10, dimension=DIM, base_sha256="x")
+
+    first = server.add([recipe("A")], vecs(1))
+    second = cli.add([recipe("B"), recipe("C")], vecs(2))
+    third = server.add([recipe("D")], vecs(1))
+
+    assert first == [10]
+    assert second == [11, 12]
+    assert third == [13]
+    # the server caught up on the CLI's batch before allocating
+    assert server.recipes[11]["title"] == "B"
+
+    replayed = IndexDelta(str(tmp_path), base_rows=10, dimension=DIM, base_sha256="x")
+    assert sorted(replayed.recipes) == [10, 11, 12, 13]
+    assert replayed.index.ntotal == 4
+
+
+def test_delete_sees_other_writers_additions(tmp_path):
+    server = IndexDelta(str(tmp_path), base_rows=10, dimension=DIM, base_sha256="x")
+    cli = IndexDelta(str(tmp_path), base_rows=10, dimension=DIM, base_sha256="x")
+    (new_id,) = cli.add([recipe("A")], vecs(1))
+
+    assert server.delete([new_id, 3]) == [new_id, 3]
+    assert sorted(server.tombstone_ids().tolist()) == [3]
+    assert new_id not in server
@@ -0,0 +1,30 @@
+import numpy as np
+import pytest
+
+from app.services.index_factory import IndexSpec, build_faiss_index
+from app.services.index_store import IndexManifest, IndexMismatchError, load_index, save_index
+
+
+def write_index(index_dir, **manifest_fields):
+    embeddings = np.random.default_rng(0).random((50, 8), dtype="float32")
+    manifest = IndexManifest(
+        model_name="m", dimension=8, rows=50, data_sha256="x", **manifest_fields
+    )
+    save_index(index_dir, manifest, embeddings, build_faiss_index(embeddings, IndexSpec()))
+    return manifest
+
+
+def test_roundtrip(tmp_path):
+    manifest = write_index(str(tmp_path))
+    embeddings, index = load_index(str(tmp_path), manifest)
+    assert embeddings.shape == (50, 8)
+    assert index.ntotal == 50
+
+
+def test_embedding_backend_mismatch_forces_rebuild(tmp_path):
+    write_index(str(tmp_path), embedding_backend="onnx")
+    expected = IndexManifest(
+        model_name="m", dimension=8, rows=None, data_sha256="x", embedding_backend="torch"
+    )
+    with pytest.raises(IndexMismatchError, match="embedding_backend"):
+        load_index(str(tmp_path), expected)
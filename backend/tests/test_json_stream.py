@@ -0,0 +1,26 @@
+import json
+
+from app.utils.json_stream import IncrementalObjectParser
+
+RECIPE = {"title": "Soup", "ingredients": ["salt"], "servings": "2"}
+
+
+def feed_in_chunks(text, size=5):
+    parser = IncrementalObjectParser()
+    members = []
+    for i in range(0, len(text), size):
+        members.extend(parser.feed(text[i : i + size]))
+    return parser, members
+
+
+def test_streams_members_of_a_bare_object():
+    parser, members = feed_in_chunks(json.dumps(RECIPE))
+    assert dict(members) == RECIPE
+    assert parser.done
+
+
+def test_leading_prose_with_brackets_is_skipped():
+    text = "[1] Sure] here's one (see [note]):\n```json\n" + json.dumps(RECIPE) + "\n```"
+    parser, members = feed_in_chunks(text)
+    assert dict(members) == RECIPE
+    assert parser.done
@@ -0,0 +1,47 @@
+import asyncio
+
+from app.services.llm_client import LLMError
+from app.services.llm_router import LLMBackend, LLMRouter
+
+
+class FlakyClient:
+    """
+    Stands in for OllamaClient: fails the first `failures` calls, then streams.
+    """
+
+    def __init__(self, failures):
+        self.failures = failures
+
+    async def stream(self, prompt, model=None, **extra):
+        if self.failures:
+            self.failures -= 1
+            raise LLMError("connection refused")
+        yield {"response": "{}", "done": False}
+        yield {"response": "", "done": True}
+
+    async def aclose(self):
+        pass
+
+
+def test_stream_stopped_at_done_chunk_resets_failure_count():
+    backend = LLMBackend("http://host/api/generate", max_retries=0, failure_threshold=3)
+    backend.client = FlakyClient(failures=2)
+    router = LLMRouter(backends=[backend], health_interval=0)
+
+    async def stream_once():
+        try:
+            async for chunk in router.stream("prompt"):
+                if chunk.get("done"):
+                    # as RecipeGenerator.stream does
+                    break
+        except LLMError:
+            pass
+
+    async def scenario():
+        for _ in range(5):
+            await stream_once()
+
+    asyncio.run(scenario())
+    assert backend.failures == 0
+    assert backend.state == "closed"
+    assert backend.outstanding == 0
@@ -0,0 +1,148 @@
+import asyncio
+import json
+
+from app.services.cuisine_classifier import CuisinePrediction
+from app.services.generation_cache import GenerationCache
+from app.services.recipe_generator import RecipeGenerator
+
+STREAMED = {
+    "title": "Tomato Soup",
+    "prep_time": "10 minutes",
+    "cook_time": "20 minutes",
+    "servings": "4",
+    "ingredients": [],  # invalid: the schema needs at least one
+    "instructions": ["Simmer the tomatoes."],
+}
+
+
+class FakeLLM:
+    """
+    Streams STREAMED in small chunks, then answers the field retry.
+    """
+
+    async def stream(self, prompt, model=None, **extra):
+        text = json.dumps(STREAMED)
+        for i in range(0, len(text), 7):
+            yield {"response": text[i : i + 7], "done": False}
+        yield {"response": "", "done": True}
+
+    async def generate(self, prompt, model=None, **extra):
+        return {"response": json.dumps({"ingredients": ["4 tomatoes"]})}
+
+
+def run_stream():
+    generator = RecipeGenerator(FakeLLM(), GenerationCache(path=""))
+
+    async def collect():
+        return [
+            event
+            async for event in generator.stream(["tomato"], preferred_cuisine="Italian")
+        ]
+
+    return asyncio.run(collect())
+
+
+def test_stream_re_emits_fields_fixed_by_a_retry():
+    events = run_stream()
+    ingredients = [
+        e["value"] for e in events if e["event"] == "field" and e["name"] == "ingredients"
+    ]
+    done = events[-1]
+
+    assert done["event"] == "done"
+    assert done["result"]["recipe"]["ingredients"] == ["4 tomatoes"]
+    # first the invalid value as it streamed, then the corrected one
+    assert ingredients == [[], ["4 tomatoes"]]
+
+
+def test_stream_does_not_repeat_unchanged_fields():
+    titles = [e for e in run_stream() if e["event"] == "field" and e["name"] == "title"]
+    assert len(titles) == 1
+
+
+def test_cache_hit_skips_cuisine_detection(tmp_path):
+    recipe = {**STREAMED, "ingredients": ["4 tomatoes"]}
+
+    class RecipeLLM(FakeLLM):
+        async def generate(self, prompt, model=None, **extra):
+            return {"response": json.dumps(recipe)}
+
+    cache = GenerationCache(path=str(tmp_path / "cache.sqlite3"), max_entries=10)
+    generator = RecipeGenerator(RecipeLLM(), cache)
+    detected = []
+
+    async def choose_cuisine(ingredients, preferred_cuisine):
+        detected.append(ingredients)
+        return "Mexican"
+
+    generator.choose_cuisine = choose_cuisine
+
+    async def scenario():
+        first = await generator.generate(["tomato"])
+        again = await generator.generate(["tomato"])
+        streamed = [event async for event in generator.stream(["tomato"])]
+        return first, again, streamed
+
+    first, again, streamed = asyncio.run(scenario())
+    assert first["recipe"]["cuisine"] == "Mexican"
+    assert again == first
+    assert streamed[0] == {"event": "start", "cuisine": "Mexican"}
+    assert streamed[-1]["metrics"]["cached"] is True
+    # only the first request, a miss, detected the cuisine
+    assert len(detected) == 1
+
+
+class CuisineLLM:
+    def __init__(self):
+        self.calls = 0
+        self.cancelled = 0
+
+    async def generate(self, prompt, model=None, **extra):
+        self.calls += 1
+        try:
+            await asyncio.sleep(0.05)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        return {"response": json.dumps({"cuisine": "Thai"})}
+
+
+class SlowClassifier:
+    def __init__(self, prediction, delay):
+        self.prediction = prediction
+        self.delay = delay
+
+    async def apredict(self, ingredients):
+        await asyncio.sleep(self.delay)
+        return self.prediction
+
+
+def choose(prediction, delay=0.0):
+    llm = CuisineLLM()
+    generator = RecipeGenerator(llm, GenerationCache(path=""))
+    generator.local_classifier = lambda: SlowClassifier(prediction, delay)
+
+    async def scenario():
+        cuisine = await generator.choose_cuisine(["rice"], None)
+        await asyncio.sleep(0.1)  # let a cancelled LLM call unwind
+        return cuisine
+
+    return asyncio.run(scenario()), llm
+
+
+def test_confident_local_vote_makes_no_llm_call():
+    cuisine, llm = choose(CuisinePrediction("Italian", 0.9))
+    assert cuisine == "Italian"
+    assert llm.calls == 0
+
+
+def test_unsure_local_vote_falls_back_to_the_llm():
+    cuisine, llm = choose(CuisinePrediction("Italian", 0.2))
+    assert cuisine == "Thai"
+    assert llm.calls == 1
+
+
+def test_slow_confident_vote_cancels_the_hedged_llm_call():
+    cuisine, llm = choose(CuisinePrediction("Italian", 0.9), delay=0.07)
+    assert cuisine == "Italian"
+    assert (llm.calls, llm.cancelled) == (1, 1)
@@ -0,0 +1,54 @@
+import numpy as np
+import pandas as pd
+
+from app.config import settings
+from app.schemas.recipe import RecipeIn
+from app.services.recipe_store import RecipeStore
+from app.services.search_filters import SearchFilters, allowed_rows, recipe_passes
+
+
+def ingested(**fields):
+    base = {"title": "Soup", "ingredients": ["1 onion"], "instructions": ["Simmer."]}
+    return RecipeIn(**{**base, **fields}).model_dump()
+
+
+def test_ingested_recipe_with_cuisine_passes_cuisine_filter():
+    filters = SearchFilters.create(cuisine="Italian")
+    assert recipe_passes(ingested(cuisine="italian"), filters)
+    assert not recipe_passes(ingested(cuisine="Thai"), filters)
+
+
+def test_ingested_recipe_without_cuisine_never_matches_cuisine_filter():
+    recipe = ingested()
+    assert not recipe_passes(recipe, SearchFilters.create(cuisine="Italian"))
+    assert recipe_passes(recipe, SearchFilters.create())
+
+
+def test_delta_and_base_checks_agree():
+    cuisines = ["Italian", "Italian", None]
+    frame = pd.DataFrame(
+        {
+            "title": ["A", "B", "C"],
+            "ingredients": [["2 eggs"], ["1 cup rice"], ["1 cup rice"]],
+            "instructions": [["Mix."]] * 3,
+            "predicted_prep_time_rounded": [10, 40, None],
+            settings.CUISINE_COLUMN: cuisines,
+        }
+    )
+    store = RecipeStore.from_frame(frame)
+    recipes = [
+        ingested(
+            ingredients=store.ingredients[i],
+            prep_time=store.gather([i])[0]["prep_time"],
+            cuisine=cuisines[i],
+        )
+        for i in range(len(store))
+    ]
+    for filters in (
+        SearchFilters.create(excluded_allergens=["eggs"]),
+        SearchFilters.create(max_prep_time=30),
+        SearchFilters.create(cuisine="italian"),
+    ):
+        expected = allowed_rows(store, filters)
+        got = np.array([recipe_passes(r, filters) for r in recipes])
+        assert (got == expected).all(), filters
@@ -0,0 +1,93 @@
+import numpy as np
+import pandas as pd
+
+from app.services.index_delta import IndexDelta
+from app.services.lexical_index import LexicalHits
+from app.services.recipe_store import RecipeStore
+from app.services.search_filters import SearchFilters
+from app.services.vector_index import LEXICAL_ONLY, CachedQuery, RecipeVectorIndex
+from app.utils.ttl_cache import TTLCache
+
+DIM = 4
+
+
+class ZeroEmbedder:
+    def encode(self, texts, **kwargs):
+        return np.zeros((len(texts), DIM), dtype="float32")
+
+
+def engine_over(tmp_path, titles):
+    store = RecipeStore.from_frame(
+        pd.DataFrame(
+            {
+                "title": titles,
+                "ingredients": [["salt"]] * len(titles),
+                "instructions": [["Mix."]] * len(titles),
+            }
+        )
+    )
+    # the parts of RecipeVectorIndex that updates and gather use, without
+    # loading an embedding model or FAISS index
+    engine = RecipeVectorIndex.__new__(RecipeVectorIndex)
+    engine.store = store
+    engine.delta = IndexDelta(str(tmp_path), len(store), DIM, "x")
+    engine.embed_model = ZeroEmbedder()
+    engine.generation = 0
+    engine.query_cache = TTLCache(maxsize=8, ttl_seconds=60)
+    engine.filter_cache = TTLCache(maxsize=8, ttl_seconds=60)
+    return engine
+
+
+def test_gather_returns_updated_base_recipe(tmp_path):
+    engine = engine_over(tmp_path, ["A", "B", "C"])
+    updated = {"title": "B-updated", "ingredients": ["pepper"], "instructions": ["Stir."]}
+
+    engine.update_recipe(1, updated)
+
+    rows = engine.gather([0, 1, 2])
+    assert [r["title"] for r in rows] == ["A", "B-updated", "C"]
+    assert rows[1]["ingredients"] == ["pepper"]
+
+
+def test_gather_skips_deleted_delta_recipe(tmp_path):
+    engine = engine_over(tmp_path, ["A"])
+    (new_id,) = engine.add_recipes(
+        [{"title": "N", "ingredients": ["salt"], "instructions": ["Mix."]}]
+    )
+    engine.delete_recipes([new_id])
+
+    assert [r["title"] for r in engine.gather([0, new_id])] == ["A"]
+
+
+class OneHitLexical:
+    def search(self, terms, k, allowed=None):
+        one = np.ones(1, dtype="float32")
+        return LexicalHits(np.array([2], dtype="int64"), one, one)
+
+
+def fused_titles(engine, distances):
+    key = (("salt",), 2, None, None, SearchFilters())
+    distances, ids = engine._fuse(
+        key, np.array(distances, dtype="float32"), np.array([0, 1], dtype="int64")
+    )
+    return distances, [r["title"] for r in engine.materialize(CachedQuery(None, ids, distances))]
+
+
+def test_far_vector_results_are_dropped_before_fusion(tmp_path):
+    engine = engine_over(tmp_path, ["A", "B", "C"])
+    engine.lexical = OneHitLexical()
+
+    distances, titles = fused_titles(engine, [2.0, 2.5])
+
+    # the lexical hit survives on its own instead of riding on distance 0
+    assert titles == ["C"]
+    assert distances.tolist() == [LEXICAL_ONLY]
+
+
+def test_close_vector_results_fuse_with_lexical_ones(tmp_path):
+    engine = engine_over(tmp_path, ["A", "B", "C"])
+    engine.lexical = OneHitLexical()
+
+    _, titles = fused_titles(engine, [0.5, 0.7])
+
+    assert titles == ["A", "C"]
@@ -1,7 +1,13 @@
 # frontend/streamlit_app/app.py
 
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import streamlit as st
 import requests
+from requests.adapters import HTTPAdapter
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # ─── 1) MUST be the very first Streamlit call ───────────────
 st.set_page_config(page_title="LLM‑CookBook", layout="wide")
@@ -61,8 +67,10 @@ with st.sidebar:
         "Dietary Preference",
         ["", "vegan", "vegetarian", "gluten‑free", "keto", "paleo"],
     )
-    max_prep = st.slider("Max Prep Time (min)", 0, 120, 10)
-    max_cook = st.slider("Max Cook Time (min)", 0, 190, 20)
+    # 0 = no limit; any other value is a hard filter that also drops recipes
+    # with an unknown time
+    max_prep = st.slider("Max Prep Time (min, 0 = no limit)", 0, 120, 0)
+    max_cook = st.slider("Max Cook Time (min, 0 = no limit)", 0, 190, 0)
     allergens = st.multiselect(
         "Exclude Allergens",
         [
@@ -81,6 +89,20 @@ with st.sidebar:
         "Preferred Cuisine", ["", "Italian", "Mexican", "Indian", "Thai", "American"]
     )
     search_clicked = st.button("🔍 Search Recipes")
+    both_clicked = st.button("⚡ Search & Generate")
+
+
+@st.cache_resource
+def get_session() -> requests.Session:
+    """
+    One pooled keep-alive session for the whole app (every user and rerun),
+    instead of a new connection per request.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=1)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
 def build_payload():
@@ -99,77 +121,218 @@ def build_payload():
     return payload
 
 
+def payload_key(payload) -> str:
+    # canonical JSON of build_payload(): the cache key for both calls
+    return json.dumps(payload, sort_keys=True)
+
+
 # ─── Search block ─────────────────────────────────────────────
+@st.cache_data(ttl=600, max_entries=256, show_spinner=False)
+def search_recipes(key: str):
+    """
+    /recipes/search for a build_payload() key. Cached, so reruns (moving a
+    slider, clicking again) don't hit the backend for the same filters.
+    """
+    payload = json.loads(key)
+    search_payload = {
+        "ingredients": payload["ingredients"],
+        "excluded_allergens": payload.get("excluded_allergens"),
+        "max_prep_time": payload.get("max_prep_time"),
+        "max_cook_time": payload.get("max_cook_time"),
+        "cuisine": payload.get("preferred_cuisine"),
+    }
+    res = get_session().post(f"{API_URL}/recipes/search", json=search_payload, timeout=10)
+    res.raise_for_status()
+    return res.json().get("results", [])
+
+
+def render_search(results, error=None):
+    if error is not None:
+        st.error(f"Search failed: {error}")
+        results = []
+    if results:
+        st.success(f"Found {len(results)} matching recipes:")
+        for r in results:
+            with st.expander(r["title"]):
+                st.markdown(
+                    f"Preparation Time: {str(r.get('prep_time', 'N/A'))}   Serves: {str(r.get('servings', 'N/A'))}"
+                )
+                st.subheader("Ingredients")
+                for ing in r["ingredients"]:
+                    st.write(f"- {ing}")
+                st.subheader("Instructions")
+                for step in r["instructions"]:
+                    st.write(f"- {step}")
+    else:
+        st.info("No matches found. Try “Generate New Recipe” below.")
+
+
 if search_clicked:
     if not ingredients_input.strip():
         st.sidebar.error("Enter at least one ingredient!")
     else:
-        payload = build_payload()
         with st.spinner("Searching…"):
             try:
-                res = requests.post(
-                    f"{API_URL}/recipes/search", json=payload["ingredients"], timeout=10
-                )
-                res.raise_for_status()
-                results = res.json().get("results", [])
+                results, error = search_recipes(payload_key(build_payload())), None
             except Exception as e:
-                st.error(f"Search failed: {e}")
-                results = []
-
-        if results:
-            st.success(f"Found {len(results)} matching recipes:")
-            for r in results:
-                with st.expander(r["title"]):
-                    st.markdown(
-                        f"Preparation Time: {str(r.get('prep_time', 'N/A'))}   Serves: {str(r.get('servings', 'N/A'))}"
-                    )
-                    st.subheader("Ingredients")
-                    for ing in r["ingredients"]:
-                        st.write(f"- {ing}")
-                    st.subheader("Instructions")
-                    for step in r["instructions"]:
-                        st.write(f"- {step}")
-        else:
-            st.info("No matches found. Try “Generate New Recipe” below.")
+                results, error = [], e
+        render_search(results, error)
 
 
 # ─── Generate block ───────────────────────────────────────────
+class GenerationFailed(Exception):
+    pass
+
+
+def stream_generation(payload):
+    """
+    Yield the NDJSON events of /recipes/generate/stream as they arrive.
+    """
+    with get_session().post(
+        f"{API_URL}/recipes/generate/stream",
+        json=payload,
+        stream=True,
+        timeout=(5, 60),
+    ) as res:
+        res.raise_for_status()
+        for line in res.iter_lines():
+            if line:
+                yield json.loads(line)
+
+
+GENERATED_MAX_ENTRIES = 64
+
+
+def generated_recipes() -> dict:
+    # build_payload() key -> final result, per browser session
+    return st.session_state.setdefault("generated_recipes", {})
+
+
+def generate_recipe(key: str, on_event=None):
+    """
+    The final /recipes/generate result for a build_payload() key. On a miss
+    the stream is consumed here and every event is passed to on_event for
+    progressive rendering; on a hit the kept result comes back at once.
+    Results are kept in st.session_state rather than st.cache_data, which
+    would replay on_event's drawing on every hit. Failures raise, so they
+    aren't kept.
+    """
+    kept = generated_recipes()
+    if key in kept:
+        return kept[key]
+    result = {}
+    for event in stream_generation(json.loads(key)):
+        if on_event is not None:
+            on_event(event)
+        if event["event"] == "done":
+            result = event["result"]
+        elif event["event"] == "error":
+            raise GenerationFailed(event["error"])
+    if not result or result.get("error"):
+        raise GenerationFailed(result.get("error", "no result"))
+    kept[key] = result
+    while len(kept) > GENERATED_MAX_ENTRIES:
+        del kept[next(iter(kept))]  # oldest first
+    return result
+
+
+def render_recipe(data, boxes):
+    """
+    (Re)draw whatever recipe fields are available into the placeholders.
+    """
+    if data.get("title"):
+        boxes["title"].success(f"📝 {data['title']}")
+    if any(k in data for k in ("prep_time", "cook_time", "servings")):
+        meta = (
+            f"**Prep Time:** {data.get('prep_time','N/A')}  &nbsp; "
+            f"**Cook Time:** {data.get('cook_time','N/A')}  &nbsp; "
+            f"**Servings:** {data.get('servings','N/A')}"
+        )
+        if data.get("cuisine"):
+            meta += f"  \n**Cuisine:** {data['cuisine']}"
+        boxes["meta"].markdown(meta)
+    if data.get("ingredients"):
+        boxes["ingredients"].markdown(
+            "#### Ingredients\n" + "\n".join(f"- {ing}" for ing in data["ingredients"])
+        )
+    if data.get("instructions"):
+        boxes["instructions"].markdown(
+            "#### Instructions\n"
+            + "\n".join(f"- {step}" for step in data["instructions"])
+        )
+
+
+def generate_into(key, boxes, on_progress=None):
+    """
+    Generate (or fetch from this session's results) the recipe for key, drawing fields into
+    boxes as they stream in. on_progress runs after every event.
+    """
+    fields = {}
+
+    def on_event(event):
+        if event["event"] == "start" and event.get("cuisine"):
+            fields["cuisine"] = event["cuisine"]
+        elif event["event"] == "field":
+            fields[event["name"]] = event["value"]
+            render_recipe(fields, boxes)
+        if on_progress is not None:
+            on_progress()
+
+    try:
+        result = generate_recipe(key, on_event=on_event)
+    except Exception as e:
+        st.error(f"Generation failed: {e}")
+        return
+    # the final, validated recipe replaces the progressively drawn one
+    render_recipe(result.get("recipe", {}), boxes)
+
+
+def recipe_boxes():
+    return {name: st.empty() for name in ("title", "meta", "ingredients", "instructions")}
+
+
+# ─── Search & generate at once ────────────────────────────────
+if both_clicked:
+    if not ingredients_input.strip():
+        st.sidebar.error("Enter at least one ingredient!")
+    else:
+        key = payload_key(build_payload())
+        search_area = st.container()
+        st.markdown("---")
+        boxes = recipe_boxes()
+
+        # the search runs on a worker thread while this one streams the
+        # generation; the script context lets it use the st.cache_data cache
+        ctx = get_script_run_ctx()
+        with ThreadPoolExecutor(
+            max_workers=1,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx),
+        ) as pool:
+            search_future = pool.submit(search_recipes, key)
+            shown = []
+
+            def show_search_when_ready():
+                # Streamlit elements are only drawn from the script thread
+                if not shown and search_future.done():
+                    shown.append(True)
+                    with search_area:
+                        error = search_future.exception()
+                        render_search([] if error else search_future.result(), error)
+
+            with st.spinner("Searching and generating…"):
+                generate_into(key, boxes, on_progress=show_search_when_ready)
+                search_future.exception()  # wait for the search
+                show_search_when_ready()
+
 st.markdown("---")
 if st.button("🤖 Generate New Recipe"):
     if not ingredients_input.strip():
         st.error("Enter at least one ingredient!")
     else:
-        payload = build_payload()
+        key = payload_key(build_payload())
+        boxes = recipe_boxes()
         with st.spinner("Generating recipe…"):
-            try:
-                res = requests.post(
-                    f"{API_URL}/recipes/generate", json=payload, timeout=30
-                )
-                res.raise_for_status()
-                data = res.json().get("recipe", {})
-            except Exception as e:
-                st.error(f"Generation failed: {e}")
-                data = {}
-
-        if data.get("error"):
-            st.error(data["error"])
-            data = data.get("recipe", {})
-
-        if data:
-            st.success(f"📝 {data.get('##title','##Untitled Recipe')}")
-            st.markdown(
-                f"**Prep Time:** {data.get('prep_time','N/A')}  &nbsp; "
-                f"**Cook Time:** {data.get('cook_time','N/A')}  &nbsp; "
-                f"**Servings:** {data.get('servings','N/A')}"
-            )
-            if data.get("cuisine"):
-                st.markdown(f"**Cuisine:** {data['cuisine']}")
-            st.subheader("Ingredients")
-            for ing in data.get("ingredients", []):
-                st.write(f"- {ing}")
-            st.subheader("Instructions")
-            for step in data.get("instructions", []):
-                st.write(f"- {step}")
+            generate_into(key, boxes)
 
 st.markdown("---")
 st.caption("Powered by FastAPI + FAISS + Ollama LLM")